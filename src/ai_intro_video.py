@@ -25,12 +25,87 @@ import face_recognition
 import mediapipe as mp
 import librosa
 import wave
+from render_trace import get_tracer, enable_tracing
+from render_planner import plan_render, print_plan
+from encoding_profiles import select_encoder_profile
+from shm_frame_ring import write_frames_multiprocess
+from pipelined_writer import write_frames
+from audio_track_cache import encode_audio_file
+from frame_store import FrameStore, MEMORY_BUDGET_MB
+from resource_governor import govern, add_governor_arguments
+from asset_ingest import ingest_photo
+
+INTRO_TEXTS = [
+    "Hello! I'm exploring AI's importance",
+    "AI revolutionizes how we solve problems",
+    "From healthcare to climate solutions",
+    "AI amplifies human potential",
+    "Join me in the age of AI!"
+]
+TARGET_SIZE = (1280, 720)
+
+
+def zoom_frame(img, frame_num, fps, target_size=TARGET_SIZE, out=None):
+    """Subtle breathing zoom of the photo; renders into `out` when given"""
+    zoom_factor = 1.0 + 0.1 * np.sin(2 * np.pi * frame_num / (fps * 3))
+    center_x, center_y = target_size[0] // 2, target_size[1] // 2
+    M = cv2.getRotationMatrix2D((center_x, center_y), 0, zoom_factor)
+    return cv2.warpAffine(img, M, target_size, dst=out)
+
+
+def draw_caption(frame, text):
+    """Draw a caption on a black bar at the bottom of the frame, in place"""
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    font_scale = 1.2
+    color = (255, 255, 255)  # White
+    thickness = 2
+    
+    # Get text size
+    text_size = cv2.getTextSize(text, font, font_scale, thickness)[0]
+    
+    # Position text at bottom
+    text_x = (frame.shape[1] - text_size[0]) // 2
+    text_y = frame.shape[0] - 50
+    
+    # Add black background for text
+    cv2.rectangle(frame, (text_x - 10, text_y - 30), 
+                 (text_x + text_size[0] + 10, text_y + 10), 
+                 (0, 0, 0), -1)
+    
+    # Add text
+    cv2.putText(frame, text, (text_x, text_y), 
+               font, font_scale, color, thickness)
+    return frame
+
+
+class IntroFrameRenderer:
+    """Renders any frame of the simple animation by index (for worker processes)"""
+    
+    def __init__(self, base_frame, fps, duration):
+        self.base_frame = base_frame
+        self.fps = fps
+        self.frames_per_text = int(duration / len(INTRO_TEXTS) * fps)
+    
+    def caption(self, index):
+        return INTRO_TEXTS[min(index // self.frames_per_text, len(INTRO_TEXTS) - 1)]
+    
+    def __call__(self, index, out):
+        zoom_frame(self.base_frame, index, self.fps, out=out)
+        draw_caption(out, self.caption(index))
+    
+    def frame(self, index):
+        out = np.empty_like(self.base_frame)
+        self(index, out)
+        return out
+
 
 class AIIntroVideoGenerator:
-    def __init__(self, photo_path, audio_path, output_path):
+    def __init__(self, photo_path, audio_path, output_path, workers=0, frame_memory_mb=MEMORY_BUDGET_MB):
         self.photo_path = Path(photo_path)
         self.audio_path = Path(audio_path)
         self.output_path = Path(output_path)
+        self.workers = workers  # Render processes; 0 keeps the frame store
+        self.frame_memory_mb = frame_memory_mb  # Frames beyond this spill to temp_dir
         self.temp_dir = Path(tempfile.mkdtemp())
         
         # Initialize MediaPipe
@@ -59,12 +134,9 @@ class AIIntroVideoGenerator:
     
     def preprocess_image(self):
         """Prepare the input photo for processing"""
-        img = cv2.imread(str(self.photo_path))
-        if img is None:
-            raise ValueError(f"Could not load image: {self.photo_path}")
-        
-        # Convert to RGB
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        # Upright RGB photo, decoded at video height rather than full resolution
+        img_rgb = ingest_photo(str(self.photo_path), height=TARGET_SIZE[1])
+        img = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR)
         
         # Detect face
         results = self.face_detection.process(img_rgb)
@@ -105,34 +177,27 @@ class AIIntroVideoGenerator:
         
         return processed_audio_path, duration
     
+    def load_base_frame(self):
+        """Load the photo as an RGB frame at HD resolution (from the asset cache)"""
+        return ingest_photo(str(self.photo_path), size=TARGET_SIZE)
+    
     def create_simple_animation(self, duration):
         """Fallback: Create simple animated video without advanced lip-sync"""
         print("Creating simple animation...")
         
         # Load and prepare image
-        img = cv2.imread(str(self.photo_path))
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        
-        # Resize to HD resolution
-        target_size = (1280, 720)
-        img_resized = cv2.resize(img_rgb, target_size)
+        img_resized = self.load_base_frame()
         
         # Create video frames with subtle animations
+        tracer = get_tracer()
         fps = 24
         total_frames = int(duration * fps)
-        frames = []
+        frames = FrameStore(self.frame_memory_mb, scratch_dir=str(self.temp_dir))
         
         for frame_num in range(total_frames):
-            # Create a copy of the image
-            frame = img_resized.copy()
-            
-            # Add subtle zoom effect
-            zoom_factor = 1.0 + 0.1 * np.sin(2 * np.pi * frame_num / (fps * 3))
-            center_x, center_y = target_size[0] // 2, target_size[1] // 2
-            
-            # Apply zoom
-            M = cv2.getRotationMatrix2D((center_x, center_y), 0, zoom_factor)
-            frame = cv2.warpAffine(frame, M, target_size)
+            with tracer.measure("frame.render"):
+                # Add subtle zoom effect
+                frame = zoom_frame(img_resized, frame_num, fps)
             
             frames.append(frame)
         
@@ -140,86 +205,55 @@ class AIIntroVideoGenerator:
     
     def add_text_overlay(self, frames, fps, duration):
         """Add animated text overlay"""
-        intro_texts = [
-            "Hello! I'm exploring AI's importance",
-            "AI revolutionizes how we solve problems",
-            "From healthcare to climate solutions",
-            "AI amplifies human potential",
-            "Join me in the age of AI!"
-        ]
+        intro_texts = INTRO_TEXTS
         
         text_duration = duration / len(intro_texts)
         frames_per_text = int(text_duration * fps)
         
-        annotated_frames = []
-        
         for i, frame in enumerate(frames):
             # Determine which text to show
             text_index = min(i // frames_per_text, len(intro_texts) - 1)
             current_text = intro_texts[text_index]
             
-            # Add text overlay
-            font = cv2.FONT_HERSHEY_SIMPLEX
-            font_scale = 1.2
-            color = (255, 255, 255)  # White
-            thickness = 2
-            
-            # Get text size
-            text_size = cv2.getTextSize(current_text, font, font_scale, thickness)[0]
-            
-            # Position text at bottom
-            text_x = (frame.shape[1] - text_size[0]) // 2
-            text_y = frame.shape[0] - 50
-            
-            # Add black background for text
-            cv2.rectangle(frame, (text_x - 10, text_y - 30), 
-                         (text_x + text_size[0] + 10, text_y + 10), 
-                         (0, 0, 0), -1)
-            
-            # Add text
-            cv2.putText(frame, current_text, (text_x, text_y), 
-                       font, font_scale, color, thickness)
-            
-            annotated_frames.append(frame)
+            # Add text overlay (in place, spilled frames included)
+            draw_caption(frame, current_text)
         
-        return annotated_frames
+        return frames
     
     def save_video(self, frames, fps, audio_path):
         """Save frames as video with audio"""
         print("Rendering final video...")
         
-        # Create temporary video file
-        temp_video = self.temp_dir / "temp_video.mp4"
-        
-        # Define codec and create VideoWriter
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        height, width = frames[0].shape[:2]
-        out = cv2.VideoWriter(str(temp_video), fourcc, fps, (width, height))
-        
-        # Write frames
-        for frame in frames:
-            # Convert RGB to BGR for OpenCV
-            frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-            out.write(frame_bgr)
-        
-        out.release()
+        # Frames are already in memory, so motion analysis only costs the comparisons
+        last = len(frames) - 1
+        encoder = select_encoder_profile(lambda t: frames[min(last, int(round(t * fps)))],
+                                         len(frames) / fps, fps)
         
-        # Combine with audio using ffmpeg
-        cmd = [
-            'ffmpeg', '-i', str(temp_video), 
-            '-i', str(audio_path),
-            '-c:v', 'libx264', '-c:a', 'aac',
-            '-strict', 'experimental',
-            '-shortest',
-            str(self.output_path)
-        ]
+        # RGB frames go straight to the encoder; the AAC track is cached and stream-copied
+        output_args = ['-map', '0:v', '-map', '1:a', '-c:a', 'copy', '-shortest'] + \
+            encoder.ffmpeg_args() + [str(self.output_path)]
         
+        tracer = get_tracer()
         try:
-            subprocess.run(cmd, check=True, capture_output=True)
+            with tracer.span("encode_frames", frames=len(frames)):
+                audio_track = encode_audio_file(str(audio_path), fps=None)
+                write_frames(frames, str(self.output_path), fps, audio_path=audio_track,
+                             output_args=output_args)
             print(f"✅ Video saved successfully: {self.output_path}")
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Error combining video and audio: {e}")
-            print("Stderr:", e.stderr.decode())
+        except (RuntimeError, subprocess.CalledProcessError) as e:
+            print(f"❌ Error encoding video: {e}")
+    
+    def render_multiprocess(self, duration, audio_path, fps=24):
+        """Render frames in worker processes through a shared-memory ring and encode them"""
+        renderer = IntroFrameRenderer(self.load_base_frame(), fps, duration)
+        total_frames = int(duration * fps)
+        encoder = select_encoder_profile(lambda t: renderer.frame(min(total_frames - 1, int(round(t * fps)))),
+                                         duration, fps)
+        
+        write_frames_multiprocess(renderer, total_frames, TARGET_SIZE, fps, str(self.output_path),
+                                  encoder=encoder, workers=self.workers,
+                                  audio_path=encode_audio_file(str(audio_path), fps=None))
+        print(f"✅ Video saved successfully: {self.output_path}")
     
     def generate_video(self):
         """Main method to generate the intro video"""
@@ -228,28 +262,43 @@ class AIIntroVideoGenerator:
         print(f"Audio: {self.audio_path}")
         print(f"Output: {self.output_path}")
         
+        tracer = get_tracer()
+        
         try:
             # Preprocess inputs
-            processed_audio, duration = self.preprocess_audio()
+            with tracer.span("preprocess_audio"):
+                processed_audio, duration = self.preprocess_audio()
             print(f"Audio duration: {duration:.2f} seconds")
             
             # Check for Wav2Lip (advanced approach)
-            wav2lip_model = self.setup_wav2lip()
+            with tracer.span("load_models"):
+                wav2lip_model = self.setup_wav2lip()
+            
+            if self.workers > 0 and not wav2lip_model:
+                # Frames go straight from the render processes to ffmpeg, never into a list
+                with tracer.span("render_encode"):
+                    self.render_multiprocess(duration, processed_audio)
+                print("🎉 Video generation completed!")
+                return
             
-            if wav2lip_model:
-                print("Using advanced lip-sync...")
-                # TODO: Implement Wav2Lip integration
-                # For now, fall back to simple animation
-                frames, fps = self.create_simple_animation(duration)
-            else:
-                print("Using simple animation approach...")
-                frames, fps = self.create_simple_animation(duration)
+            with tracer.span("animation"):
+                if wav2lip_model:
+                    print("Using advanced lip-sync...")
+                    # TODO: Implement Wav2Lip integration
+                    # For now, fall back to simple animation
+                    frames, fps = self.create_simple_animation(duration)
+                else:
+                    print("Using simple animation approach...")
+                    frames, fps = self.create_simple_animation(duration)
             
             # Add text overlays
-            frames = self.add_text_overlay(frames, fps, duration)
+            with tracer.span("compositing"):
+                frames = self.add_text_overlay(frames, fps, duration)
             
             # Save final video
-            self.save_video(frames, fps, processed_audio)
+            with tracer.span("encoding"):
+                self.save_video(frames, fps, processed_audio)
+            frames.close()
             
             print("🎉 Video generation completed!")
             
@@ -271,16 +320,45 @@ def main():
     parser.add_argument('--audio', required=True, help='Path to voice recording (WAV)')
     parser.add_argument('--output', required=True, help='Output video path')
     parser.add_argument('--name', required=True, help='Your first and last name')
+    parser.add_argument('--trace', default=None, metavar='TRACE_JSON',
+                        help='Record per-stage timings and write a Chrome trace to this file')
+    
+    parser.add_argument('--plan', action='store_true', help='Estimate render cost from metadata and exit')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Render processes sharing frames through shared memory (0 = frame store)')
+    parser.add_argument('--frame-memory', type=float, default=MEMORY_BUDGET_MB, metavar='MB',
+                        help='RAM for rendered frames before they spill to disk (with --workers 0)')
+    add_governor_arguments(parser)
     
     args = parser.parse_args()
     
+    if args.plan:
+        print_plan(plan_render("intro", photo_path=args.photo, audio_path=args.audio,
+                               workers=args.workers, frame_memory_mb=args.frame_memory))
+        return
+    
+    # Forked render processes inherit the limits and the CPU pinning
+    budget = govern(args.cores, args.pin, workers=args.workers)
+    if budget is not None:
+        args.workers = budget.workers
+    
+    if args.trace:
+        enable_tracing()
+    
     # Generate output filename
     output_filename = f"{args.name.replace(' ', '_').lower()}_intro.mp4"
     output_path = Path(args.output) / output_filename
     
     # Create generator and run
-    generator = AIIntroVideoGenerator(args.photo, args.audio, output_path)
-    generator.generate_video()
+    generator = AIIntroVideoGenerator(args.photo, args.audio, output_path, workers=args.workers,
+                                      frame_memory_mb=args.frame_memory)
+    try:
+        generator.generate_video()
+    finally:
+        if args.trace:
+            summary = get_tracer().export(args.trace)
+            print(f"📊 Trace: {args.trace}")
+            print(f"📊 {summary}")
 
 if __name__ == "__main__":
     main()
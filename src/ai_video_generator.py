@@ -16,6 +16,8 @@ Features:
 """
 
 import os
+import shutil
+import tempfile
 import torch
 import cv2
 import numpy as np
@@ -28,6 +30,18 @@ import open_clip
 from modelscope import AutoModel, AutoTokenizer
 import moviepy.editor as mp
 from moviepy.editor import VideoFileClip, ImageClip, CompositeVideoClip
+from render_trace import get_tracer, enable_tracing
+from render_planner import plan_render, print_plan
+from encoding_profiles import select_encoder_profile
+from pipelined_writer import render_video, write_frames, DEFAULT_WORKERS
+from frame_format import as_rgb_frame
+from frame_store import FrameStore, MEMORY_BUDGET_MB
+from render_cache import RenderCache, render_key, render_atomically, default_cache_dir, MAX_CACHE_MB
+from poster_selector import PosterSelector, FRAME_BUDGET
+from resource_governor import govern, add_governor_arguments
+from culled_composite import CulledCompositeVideoClip
+from sprite_atlas import SpriteAtlas
+from background_library import background_clip
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -39,17 +53,26 @@ OUTPUT_PATH = r"C:\Users\hp\Video_Generation_Project\Video_Generation_Project\ou
 VIDEO_SIZE = (1280, 720)  # HD resolution
 FONT_SIZE = 48
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+FACE_MODEL_NAME = "damo/cv_3d-human-face-generation"
+# Intermediate face animation: near-lossless and quick, it is decoded again for compositing.
+# yuv420p needs even dimensions: an odd model frame loses its last row/column (a pad
+# would add a black edge that the resize to VIDEO_SIZE stretches)
+ANIMATION_ENCODE_ARGS = ["-vf", "crop=trunc(iw/2)*2:trunc(ih/2)*2",
+                         "-c:v", "libx264", "-preset", "veryfast", "-crf", "16", "-pix_fmt", "yuv420p"]
 
 print(f"🚀 Using device: {DEVICE}")
 
 class FaceAnimationModel(pl.LightningModule):
     """PyTorch Lightning module for face animation"""
     
-    def __init__(self, model_name="damo/cv_3d-human-face-generation"):
+    def __init__(self, model_name=FACE_MODEL_NAME, onnx_engine=None,
+                 frame_memory_mb=MEMORY_BUDGET_MB):
         super().__init__()
         self.model_name = model_name
         self.model = None
         self.tokenizer = None
+        self.onnx_engine = onnx_engine
+        self.frame_memory_mb = frame_memory_mb
         
     def setup(self, stage=None):
         """Load ModelScope face animation model"""
@@ -67,6 +90,14 @@ class FaceAnimationModel(pl.LightningModule):
     
     def forward(self, face_image, audio_features):
         """Generate face animation from image and audio"""
+        if self.onnx_engine is not None:
+            try:
+                # Exported network running on ONNX Runtime
+                return FrameStore.collect(self.onnx_engine.infer(face_image, audio_features),
+                                          self.frame_memory_mb)
+            except Exception as e:
+                print(f"⚠️  ONNX Runtime animation failed: {e}")
+        
         if self.model is None:
             # Fallback to basic face animation
             return self.basic_face_animation(face_image, audio_features)
@@ -77,7 +108,8 @@ class FaceAnimationModel(pl.LightningModule):
                 'image': face_image,
                 'audio': audio_features
             })
-            return result
+            # Copied into the store so the model's own frame list can be released
+            return FrameStore.collect(result, self.frame_memory_mb)
         except Exception as e:
             print(f"⚠️  Advanced animation failed: {e}")
             return self.basic_face_animation(face_image, audio_features)
@@ -85,18 +117,18 @@ class FaceAnimationModel(pl.LightningModule):
     def basic_face_animation(self, face_image, audio_features):
         """Basic face animation fallback"""
         # Create simple lip movement based on audio
-        frames = []
+        base = as_rgb_frame(face_image)
+        frames = FrameStore(self.frame_memory_mb)
         for i in range(len(audio_features)):
             # Simple lip animation based on audio intensity
             intensity = audio_features[i] if i < len(audio_features) else 0.5
-            animated_frame = self.animate_lips(face_image, intensity)
+            animated_frame = self.animate_lips(base, intensity)
             frames.append(animated_frame)
         return frames
     
     def animate_lips(self, image, intensity):
-        """Animate lips based on audio intensity"""
-        # Convert PIL image to OpenCV format
-        img_array = np.array(image)
+        """Animate lips based on audio intensity (RGB array in, new RGB array out)"""
+        img_array = image.copy()
         
         # Simple lip animation (mouth opening/closing)
         height, width = img_array.shape[:2]
@@ -113,7 +145,7 @@ class FaceAnimationModel(pl.LightningModule):
                      (mouth_x + mouth_width, mouth_y + mouth_height),
                      (0, 0, 0), -1)
         
-        return Image.fromarray(img_array)
+        return img_array
 
 class TextToVideoGenerator:
     """Advanced text-to-video generation using OpenCLIP"""
@@ -216,11 +248,20 @@ class AudioProcessor:
 class AIVideoGenerator:
     """Main AI Video Generator class"""
     
-    def __init__(self):
+    def __init__(self, engine="torch", onnx_model_path=None, workers=DEFAULT_WORKERS,
+                 frame_memory_mb=MEMORY_BUDGET_MB, cache=None, poster_frames=FRAME_BUDGET):
+        self.engine = engine
+        self.onnx_model_path = onnx_model_path
+        self.workers = workers
+        self.frame_memory_mb = frame_memory_mb  # Animation frames beyond this spill to disk
+        self.cache = cache  # RenderCache of finished videos, or None to always render
+        self.poster_frames = poster_frames  # Candidate frames for the thumbnail (0 = no thumbnail)
         self.face_model = None
-        self.text_generator = TextToVideoGenerator()
-        self.audio_processor = AudioProcessor()
-        self.setup_models()
+        self.temp_dir = None  # Per-job directory for intermediate files while rendering
+        with get_tracer().span("load_models"):
+            self.text_generator = TextToVideoGenerator()
+            self.audio_processor = AudioProcessor()
+            self.setup_models()
     
     def setup_models(self):
         """Initialize all AI models"""
@@ -228,13 +269,29 @@ class AIVideoGenerator:
         
         # Initialize face animation model
         try:
-            self.face_model = FaceAnimationModel()
+            self.face_model = FaceAnimationModel(onnx_engine=self.setup_onnx_engine(),
+                                                 frame_memory_mb=self.frame_memory_mb)
             print("✅ Face animation model initialized")
         except Exception as e:
             print(f"⚠️  Face model initialization failed: {e}")
         
         print("✅ All models initialized")
     
+    def setup_onnx_engine(self):
+        """Initialize the ONNX Runtime face engine when requested"""
+        if self.engine != "onnx":
+            return None
+        
+        try:
+            from onnx_face_engine import OnnxFaceEngine, ONNX_INT8_MODEL_PATH
+            engine = OnnxFaceEngine(self.onnx_model_path or ONNX_INT8_MODEL_PATH)
+            print(f"✅ ONNX Runtime face engine loaded: {engine.model_path}")
+            return engine
+        except Exception as e:
+            print(f"⚠️  ONNX Runtime engine not available: {e}")
+            print("🔄 Falling back to PyTorch face animation...")
+            return None
+    
     def load_intro_text(self, file_path):
         """Load and parse intro text"""
         with open(file_path, "r", encoding="utf-8") as f:
@@ -243,31 +300,8 @@ class AIVideoGenerator:
         return sentences
     
     def create_professional_background(self, duration):
-        """Create AI-enhanced professional background"""
-        def make_frame(t):
-            # Create dynamic background with AI-inspired patterns
-            frame = np.zeros((VIDEO_SIZE[1], VIDEO_SIZE[0], 3), dtype=np.uint8)
-            
-            # AI-inspired gradient
-            progress = t / duration
-            
-            # Create neural network-like pattern
-            for y in range(VIDEO_SIZE[1]):
-                for x in range(VIDEO_SIZE[0]):
-                    # Neural network inspired colors
-                    intensity = (np.sin(x * 0.01 + progress * 2) + 
-                               np.cos(y * 0.01 + progress * 1.5)) * 0.5 + 0.5
-                    
-                    # Professional color scheme
-                    r = int(20 + intensity * 40)
-                    g = int(30 + intensity * 50)
-                    b = int(50 + intensity * 60)
-                    
-                    frame[y, x] = [r, g, b]
-            
-            return frame
-        
-        return VideoFileClip(make_frame, duration=duration)
+        """Create AI-enhanced professional background (rendered once per resolution, then shared)"""
+        return background_clip("neural", VIDEO_SIZE, duration)
     
     def create_ai_enhanced_text(self, text, fontsize=FONT_SIZE, color='white'):
         """Create AI-enhanced text with advanced styling"""
@@ -303,17 +337,20 @@ class AIVideoGenerator:
     def generate_face_animation(self, photo_path, audio_path):
         """Generate face animation using AI models"""
         print("🎭 Generating AI face animation...")
+        tracer = get_tracer()
         
         # Load photo
         face_image = Image.open(photo_path).convert('RGB')
         
         # Extract audio features
-        audio_features = self.audio_processor.extract_audio_features(audio_path)
+        with tracer.span("audio_features"):
+            audio_features = self.audio_processor.extract_audio_features(audio_path)
         
         # Generate face animation
         if self.face_model:
             try:
-                animated_frames = self.face_model(face_image, audio_features)
+                with tracer.span("animate", engine=self.engine):
+                    animated_frames = self.face_model(face_image, audio_features)
                 return self.frames_to_video(animated_frames)
             except Exception as e:
                 print(f"⚠️  AI face animation failed: {e}")
@@ -325,20 +362,24 @@ class AIVideoGenerator:
         """Create fallback video with basic animation"""
         print("🔄 Creating fallback video with basic animation...")
         
-        frames = []
+        tracer = get_tracer()
+        frames = FrameStore(self.frame_memory_mb)
         duration = len(audio_features) / 30.0  # 30 FPS
         
-        for i, intensity in enumerate(audio_features):
-            # Create animated frame
-            animated_frame = self.animate_lips_basic(face_image, intensity)
-            frames.append(animated_frame)
+        base = as_rgb_frame(face_image)
+        with tracer.span("animate", engine="fallback"):
+            for i, intensity in enumerate(audio_features):
+                # Create animated frame
+                with tracer.measure("frame.animate"):
+                    animated_frame = self.animate_lips_basic(base, intensity)
+                frames.append(animated_frame)
         
         # Convert frames to video
         return self.frames_to_video(frames)
     
     def animate_lips_basic(self, image, intensity):
-        """Basic lip animation"""
-        img_array = np.array(image)
+        """Basic lip animation (RGB array in, new RGB array out)"""
+        img_array = image.copy()
         
         # Simple mouth animation
         height, width = img_array.shape[:2]
@@ -356,49 +397,80 @@ class AIVideoGenerator:
                          (mouth_x + mouth_width, mouth_y + mouth_height),
                          (0, 0, 0), -1)
         
-        return Image.fromarray(img_array)
+        return img_array
     
     def frames_to_video(self, frames):
         """Convert frames to video clip"""
-        # Save frames as temporary video
-        temp_video_path = "temp_animation.mp4"
-        
         if not frames:
             return None
         
-        # Get frame size
-        frame_size = frames[0].size
+        # Save frames as temporary video in this job's directory (removed after the render,
+        # since the clip reads the file again while compositing)
+        temp_dir = self.temp_dir or tempfile.mkdtemp(prefix="ai_video_")
+        temp_video_path = os.path.join(temp_dir, "animation.mp4")
         
-        # Create video writer
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(temp_video_path, fourcc, 30.0, frame_size)
-        
-        for frame in frames:
-            frame_array = np.array(frame)
-            frame_array = cv2.cvtColor(frame_array, cv2.COLOR_RGB2BGR)
-            out.write(frame_array)
-        
-        out.release()
+        with get_tracer().span("frames_to_video", frames=len(frames)):
+            # RGB frames are piped to ffmpeg as they are (PIL images from a model are converted once)
+            write_frames(frames, temp_video_path, 30.0, output_args=ANIMATION_ENCODE_ARGS + [temp_video_path])
+        if isinstance(frames, FrameStore):
+            frames.close()  # The encoded file replaces the spilled frames
         
         # Load as MoviePy clip
-        video_clip = VideoFileClip(temp_video_path)
-        
-        # Clean up
-        if os.path.exists(temp_video_path):
-            os.remove(temp_video_path)
-        
-        return video_clip
+        return VideoFileClip(temp_video_path)
     
-    def generate_video(self):
-        """Main video generation function"""
+    def generate_video(self, key=None):
+        """Main video generation function, served from the render cache when possible
+
+        key: output_key of a render cache lookup that already missed, so it is not repeated
+        """
+        if self.cache is None:
+            # Rendered beside the output and renamed into place: never a truncated video
+            success = render_atomically(self.render, OUTPUT_PATH)
+        elif key is not None:
+            success = self.cache.render_once(key, self.render, OUTPUT_PATH)
+        else:
+            key = output_key(self.engine, self.onnx_model_path)
+            success = self.cache.fetch_or_render(key, self.render, OUTPUT_PATH)
+        if success:
+            self.write_poster(OUTPUT_PATH)
+        return success
+    
+    def write_poster(self, video_path):
+        """Save the OpenCLIP-selected thumbnail next to the video"""
+        if self.poster_frames <= 0 or self.text_generator.clip_model is None:
+            return None
+        try:
+            with get_tracer().span("poster", frames=self.poster_frames):
+                selector = PosterSelector(self.text_generator.clip_model, self.text_generator.preprocess,
+                                          DEVICE, budget=self.poster_frames)
+                intro_text = " ".join(self.load_intro_text(TEXT_PATH))
+                return selector.write_poster(video_path, intro_text)[0]
+        except Exception as e:
+            print(f"⚠️  Poster selection failed: {e}")
+            return None
+    
+    def render(self, output_path):
+        """Render the video to output_path, with intermediate files in a per-job temp directory"""
+        self.temp_dir = tempfile.mkdtemp(prefix="ai_video_")
+        try:
+            return self.render_composite(output_path)
+        finally:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+            self.temp_dir = None
+    
+    def render_composite(self, output_path):
+        """Animate the face, composite all layers and encode to output_path"""
         print("🎬 Starting AI-powered video generation...")
+        tracer = get_tracer()
         
         # Load intro text
-        sentences = self.load_intro_text(TEXT_PATH)
+        with tracer.span("load_text"):
+            sentences = self.load_intro_text(TEXT_PATH)
         print(f"📝 Loaded {len(sentences)} sentences")
         
         # Generate face animation
-        face_video = self.generate_face_animation(PHOTO_PATH, VOICE_PATH)
+        with tracer.span("face_animation"):
+            face_video = self.generate_face_animation(PHOTO_PATH, VOICE_PATH)
         
         if face_video is None:
             print("❌ Face animation generation failed")
@@ -417,81 +489,145 @@ class AIVideoGenerator:
         face_video = face_video.resize(VIDEO_SIZE).set_duration(duration)
         
         # Create text overlays
-        text_clips = []
-        time_per_sentence = (duration - 4) / len(sentences)
-        
-        for i, sentence in enumerate(sentences):
-            start_time = 3.5 + i * time_per_sentence
-            sentence_duration = time_per_sentence - 0.5
+        with tracer.span("text_overlays"):
+            # Glow text trimmed to its ink and packed into one shared array
+            sprites = SpriteAtlas()
+            text_clips = []
+            time_per_sentence = (duration - 4) / len(sentences)
             
-            # Create AI-enhanced text
-            text_img = self.create_ai_enhanced_text(sentence, fontsize=42, color='white')
-            text_array = np.array(text_img)
+            for i, sentence in enumerate(sentences):
+                start_time = 3.5 + i * time_per_sentence
+                sentence_duration = time_per_sentence - 0.5
+                
+                # Create AI-enhanced text
+                text_img = self.create_ai_enhanced_text(sentence, fontsize=42, color='white')
+                
+                text_clip = sprites.clip(text_img, ('center', 200 + i * 80), VIDEO_SIZE)
+                text_clip = text_clip.set_start(start_time).set_duration(sentence_duration)
+                text_clip = text_clip.fadein(0.8).fadeout(0.8)
+                
+                text_clips.append(text_clip)
             
-            text_clip = ImageClip(text_array, transparent=True)
-            text_clip = text_clip.set_start(start_time).set_duration(sentence_duration)
-            text_clip = text_clip.set_position(('center', 200 + i * 80))
-            text_clip = text_clip.fadein(0.8).fadeout(0.8)
+            # Create title
+            title_img = self.create_ai_enhanced_text("Hello! I'm Shrikanth", fontsize=64, color='#FFD700')
+            title_clip = sprites.clip(title_img, ('center', 100), VIDEO_SIZE)
+            title_clip = title_clip.set_start(0).set_duration(3.5)
+            title_clip = title_clip.fadein(1.5).fadeout(0.8)
             
-            text_clips.append(text_clip)
-        
-        # Create title
-        title_img = self.create_ai_enhanced_text("Hello! I'm Shrikanth", fontsize=64, color='#FFD700')
-        title_array = np.array(title_img)
-        title_clip = ImageClip(title_array, transparent=True)
-        title_clip = title_clip.set_start(0).set_duration(3.5)
-        title_clip = title_clip.set_position(('center', 100))
-        title_clip = title_clip.fadein(1.5).fadeout(0.8)
-        
-        # Create closing message
-        closing_img = self.create_ai_enhanced_text("Thank you for watching!", fontsize=56, color='#FFD700')
-        closing_array = np.array(closing_img)
-        closing_clip = ImageClip(closing_array, transparent=True)
-        closing_clip = closing_clip.set_start(duration - 3).set_duration(3)
-        closing_clip = closing_clip.set_position(('center', 600))
-        closing_clip = closing_clip.fadein(1.0).fadeout(1.0)
+            # Create closing message
+            closing_img = self.create_ai_enhanced_text("Thank you for watching!", fontsize=56, color='#FFD700')
+            closing_clip = sprites.clip(closing_img, ('center', 600), VIDEO_SIZE)
+            closing_clip = closing_clip.set_start(duration - 3).set_duration(3)
+            closing_clip = closing_clip.fadein(1.0).fadeout(1.0)
+            sprites.report()
         
         # Combine all elements
         print("🎭 Compositing final AI video...")
         all_clips = [background, face_video, title_clip] + text_clips + [closing_clip]
         
-        final_clip = CompositeVideoClip(all_clips, size=VIDEO_SIZE)
+        # The resized face video fills the frame, hiding the neural background
+        final_clip = CulledCompositeVideoClip(all_clips, size=VIDEO_SIZE)
         final_clip = final_clip.set_audio(audio_clip)
         final_clip = final_clip.set_fps(24)
+        # Compositing is lazy: it runs per frame inside write_videofile
+        tracer.instrument_clip(final_clip, "frame.composite")
         
         # Ensure output folder exists
-        os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        
+        # Sample only a few points in case the background is visible (no face video)
+        with tracer.span("encoder_analysis"):
+            encoder = select_encoder_profile(final_clip.get_frame, final_clip.duration, 24, samples=4)
         
         # Export video
         print("🎥 Rendering AI-enhanced video...")
-        final_clip.write_videofile(
-            OUTPUT_PATH,
-            fps=24,
-            codec='libx264',
-            audio_codec='aac',
-            temp_audiofile='temp-audio.m4a',
-            remove_temp=True
-        )
+        with tracer.span("render_encode"), tracer.instrument_encoder("frame.encode"):
+            render_video(final_clip, output_path, 24, encoder, workers=self.workers)
+        final_clip.report_culling()
         
         print(f"✅ AI-powered video created successfully!")
-        print(f"📁 Output: {OUTPUT_PATH}")
+        print(f"📁 Output: {output_path}")
         print(f"🤖 Features: AI face animation + Advanced text + Professional effects")
         
         return True
 
+def output_key(engine, onnx_model_path=None):
+    """Render cache key of everything that shapes the output video"""
+    files = [PHOTO_PATH, VOICE_PATH, TEXT_PATH]
+    if engine == "onnx":
+        from onnx_face_engine import ONNX_INT8_MODEL_PATH
+        files.append(onnx_model_path or ONNX_INT8_MODEL_PATH)
+    params = {
+        "template": "ai_professional",
+        "video_size": VIDEO_SIZE,
+        "font_size": FONT_SIZE,
+        "fps": 24,
+        "engine": engine,
+        "face_model": FACE_MODEL_NAME,
+        "device": DEVICE,
+    }
+    return render_key(files, params)
+
 def main():
     """Main function"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Generate AI-powered intro video')
+    parser.add_argument('--engine', choices=['torch', 'onnx'], default='torch',
+                        help='Inference engine for the face animation model')
+    parser.add_argument('--onnx-model', default=None,
+                        help='ONNX face model path (default: models/face_animation.int8.onnx)')
+    parser.add_argument('--trace', default=None, metavar='TRACE_JSON',
+                        help='Record per-stage timings and write a Chrome trace to this file')
+    parser.add_argument('--plan', action='store_true', help='Estimate render cost from metadata and exit')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Render threads feeding the encoder (0 = MoviePy write_videofile)')
+    parser.add_argument('--frame-memory', type=float, default=MEMORY_BUDGET_MB, metavar='MB',
+                        help='RAM for animation frames before they spill to disk')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always render, even if an identical video was rendered before')
+    parser.add_argument('--cache-size', type=float, default=MAX_CACHE_MB, metavar='MB',
+                        help='Size bound of the render cache (least recently used outputs are evicted)')
+    parser.add_argument('--poster-frames', type=int, default=FRAME_BUDGET, metavar='N',
+                        help='Candidate frames OpenCLIP scores for the thumbnail (0 = no thumbnail)')
+    add_governor_arguments(parser)
+    args = parser.parse_args()
+    
+    if args.plan:
+        print_plan(plan_render("ai", photo_path=PHOTO_PATH, audio_path=VOICE_PATH, text_path=TEXT_PATH))
+        return
+    
+    # Before the models load, so torch and OpenCV start with the job's thread counts
+    budget = govern(args.cores, args.pin, workers=args.workers)
+    if budget is not None:
+        args.workers = budget.workers
+    
+    if args.trace:
+        enable_tracing()
+    
     print("🤖 Advanced AI Video Generator")
     print("=" * 50)
     print("Using: ModelScope + OpenCLIP + PyTorch Lightning")
     print()
     
     try:
+        # Identical inputs were rendered before: no need to load any model
+        cache = None if args.no_cache else RenderCache(default_cache_dir(OUTPUT_PATH), args.cache_size)
+        key = None
+        if cache is not None:
+            # Hashed once: a miss goes straight to rendering with this key
+            key = output_key(args.engine, args.onnx_model)
+            if cache.fetch(key, OUTPUT_PATH):
+                print("\n🎉 SUCCESS! AI-powered professional video ready (cached render)")
+                return
+        
         # Initialize AI video generator
-        generator = AIVideoGenerator()
+        generator = AIVideoGenerator(engine=args.engine, onnx_model_path=args.onnx_model,
+                                     workers=args.workers, frame_memory_mb=args.frame_memory,
+                                     cache=cache, poster_frames=args.poster_frames)
         
         # Generate video
-        success = generator.generate_video()
+        success = generator.generate_video(key)
         
         if success:
             print("\n🎉 SUCCESS! AI-powered professional video created!")
@@ -504,6 +640,11 @@ def main():
         else:
             print("\n❌ Video generation failed")
             print("💡 Check error messages above for details")
+        
+        if args.trace:
+            summary = get_tracer().export(args.trace)
+            print(f"\n📊 Trace: {args.trace}")
+            print(f"📊 {summary}")
     
     except Exception as e:
         print(f"\n❌ Error: {e}")
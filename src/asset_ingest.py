@@ -0,0 +1,156 @@
+"""
+Asset Ingestion
+===============
+
+Photos are decoded once, straight to the working resolution, and cached:
+- JPEGs use libjpeg's reduced-size (draft) decoding at the smallest 1/2,
+  1/4 or 1/8 scale that still covers the working size, so a 12-48 MP phone
+  capture is never expanded to full resolution in memory
+- EXIF orientation is applied, so portrait phone photos stand upright
+- The last resize uses MoviePy's own cv2 filters (area when shrinking,
+  linear when enlarging), so PNG photos give the same pixels as before
+- Normalized photos are stored in output/.cache/assets, keyed by the file's
+  content hash and the working size; later jobs load the small array as is
+- ffmpeg consumers (filtergraph_backend.py) get the same photo as a PNG
+
+Usage:
+    photo = ingest_photo(PHOTO_PATH, height=720)   # RGB uint8 array
+    path = ingest_photo_file(PHOTO_PATH, height=720)
+    python src/asset_ingest.py assets/photo.jpg --height 720
+"""
+
+import os
+import time
+import hashlib
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from render_cache import file_digest
+from render_trace import get_tracer
+
+# === Configuration ===
+ASSET_CACHE_DIR = os.path.join("output", ".cache", "assets")
+ORIENTATION_TAG = 0x0112  # EXIF Orientation
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)  # Orientations that swap width and height
+
+
+def exif_orientation(img):
+    """EXIF orientation of an opened image (1 when absent)"""
+    try:
+        return img.getexif().get(ORIENTATION_TAG, 1)
+    except Exception:
+        return 1
+
+
+def oriented_size(path):
+    """Photo size as displayed (after EXIF orientation), from the header only"""
+    with Image.open(path) as img:
+        width, height = img.size
+        if exif_orientation(img) in TRANSPOSED_ORIENTATIONS:
+            return height, width
+        return width, height
+
+
+def working_size(source_size, size=None, height=None):
+    """Target size: an exact (width, height), or a height keeping the aspect ratio like MoviePy's resize"""
+    if size is not None:
+        return int(size[0]), int(size[1])
+    return int(source_size[0] * height / source_size[1]), int(height)
+
+
+def resize_like_moviepy(frame, size):
+    """cv2 resize with the filters MoviePy's resize picks"""
+    import cv2  # Imported here: the planner reads oriented sizes without loading cv2
+
+    if (frame.shape[1], frame.shape[0]) == size:
+        return frame
+    if size[0] > frame.shape[1] or size[1] > frame.shape[0]:
+        interpolation = cv2.INTER_LINEAR
+    else:
+        interpolation = cv2.INTER_AREA
+    return cv2.resize(frame, size, interpolation=interpolation)
+
+
+def decode_photo(path, size):
+    """Decode a photo at (about) the target size, upright and RGB; returns (frame, decoded size)"""
+    with Image.open(path) as img:
+        # draft() takes the size in stored orientation and only acts on JPEGs
+        target = size[::-1] if exif_orientation(img) in TRANSPOSED_ORIENTATIONS else size
+        img.draft("RGB", target)
+        decoded_size = img.size
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        frame = np.asarray(img)
+    return np.ascontiguousarray(resize_like_moviepy(frame, size)), decoded_size
+
+
+def cache_path(path, size, extension, cache_dir=ASSET_CACHE_DIR):
+    key = f"{file_digest(path)}:{size[0]}x{size[1]}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{digest}_{size[0]}x{size[1]}.{extension}")
+
+
+def ingest_photo(path, size=None, height=None, cache_dir=ASSET_CACHE_DIR):
+    """Photo as an RGB uint8 array at the working size, decoded once per content and size"""
+    if (size is None) == (height is None):
+        raise ValueError("Pass exactly one of size or height")
+    source_size = oriented_size(path)
+    size = working_size(source_size, size, height)
+    array_path = cache_path(path, size, "npy", cache_dir)
+
+    hit = os.path.exists(array_path)
+    get_tracer().cache("asset", hit)
+    if hit:
+        print(f"🔁 Reusing ingested photo: {array_path}")
+        return np.load(array_path)
+
+    start = time.perf_counter()
+    frame, decoded_size = decode_photo(path, size)
+    print(f"📥 Ingested {os.path.basename(path)}: {source_size[0]}x{source_size[1]} -> {size[0]}x{size[1]} "
+          f"(decoded at {decoded_size[0]}x{decoded_size[1]}) in {time.perf_counter() - start:.2f}s")
+
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_path = f"{array_path}.{os.getpid()}.tmp.npy"
+    try:
+        np.save(temp_path, frame)
+        os.replace(temp_path, array_path)
+    except Exception as e:
+        print(f"⚠️  Could not cache ingested photo: {e}")
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return frame
+
+
+def ingest_photo_file(path, size=None, height=None, cache_dir=ASSET_CACHE_DIR):
+    """Path of the normalized photo as a PNG, for ffmpeg inputs"""
+    frame = ingest_photo(path, size, height, cache_dir)
+    png_path = cache_path(path, (frame.shape[1], frame.shape[0]), "png", cache_dir)
+    if not os.path.exists(png_path):
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f"{png_path}.{os.getpid()}.tmp.png"
+        try:
+            Image.fromarray(frame).save(temp_path)
+            os.replace(temp_path, png_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return png_path
+
+
+def main(argv=None):
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Decode a photo to its working size into the asset cache')
+    parser.add_argument('photo', help='Photo to ingest')
+    parser.add_argument('--height', type=int, default=720, help='Working height (aspect ratio kept)')
+    parser.add_argument('--cache-dir', default=ASSET_CACHE_DIR, help='Asset cache directory')
+    args = parser.parse_args(argv)
+
+    frame = ingest_photo(args.photo, height=args.height, cache_dir=args.cache_dir)
+    print(f"✅ {args.photo}: {frame.shape[1]}x{frame.shape[0]} RGB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Encoded Audio Track Cache
+=========================
+
+The voice track is encoded to AAC once and stream-copied into every render:
+- Tracks are cached per (audio content hash, duration, bitrate, sample rate)
+  in output/.cache/audio, so re-renders of the same voice skip audio encoding
+- Each job encodes to its own temporary name and renames it into place, so
+  parallel jobs never collide (no more temp-audio.m4a in the working directory)
+- Only audio that plays a file unmodified (an AudioFileClip, possibly with a
+  shorter duration, or the only audio layer of a composite) is cached; audio
+  changed by effects or mixed from several layers is encoded for the job in
+  its temporary directory as before
+
+Usage:
+    track = audio_track(final_clip, temp_dir)   # then mux with -c:a copy
+    track = encode_audio_file("assets/voice_recording.wav")
+"""
+
+import os
+import hashlib
+
+from ffmpeg_tools import run_ffmpeg
+from render_cache import file_digest
+from render_trace import get_tracer
+
+# === Configuration ===
+AUDIO_CACHE_DIR = os.path.join("output", ".cache", "audio")
+AUDIO_FPS = 44100
+AUDIO_BITRATE = "192k"
+AUDIO_CHANNELS = 2  # MoviePy's audio readers always produce stereo
+
+
+def audio_source(audio):
+    """(file, duration) of an audio clip that plays a file unmodified from its start, else None"""
+    layers = getattr(audio, "clips", None)
+    if layers is not None:
+        # A composite's audio mixes its layers' tracks; one track at 0 is that track as is
+        if len(layers) != 1 or layers[0].start:
+            return None
+        source = audio_source(layers[0])
+        return source and (source[0], min(source[1], audio.duration))
+
+    filename = getattr(audio, "filename", None)
+    if not filename or not os.path.exists(filename):
+        return None
+    # set_duration copies keep the reader's frame function; fx/subclip replace it
+    if not getattr(audio.make_frame, "__qualname__", "").startswith("AudioFileClip."):
+        return None
+    if audio.start:
+        return None
+    return filename, audio.duration
+
+
+def encode_audio_file(path, duration=None, bitrate=AUDIO_BITRATE, fps=AUDIO_FPS, cache_dir=AUDIO_CACHE_DIR):
+    """AAC track of an audio (or video) file, encoded once per content, duration, bitrate and rate"""
+    key = f"{file_digest(path)}:{duration}:{bitrate}:{fps}:{AUDIO_CHANNELS}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    track_path = os.path.join(cache_dir, f"{digest}_{bitrate}_{fps or 'src'}.m4a")
+
+    hit = os.path.exists(track_path)
+    get_tracer().cache("audio_track", hit)
+    if hit:
+        print(f"🔁 Reusing encoded audio track: {track_path}")
+        return track_path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_path = f"{track_path}.{os.getpid()}.tmp.m4a"
+    args = ["-i", path, "-vn", "-map", "0:a:0"]
+    if duration:
+        args += ["-t", f"{duration:.6f}"]
+    args += ["-c:a", "aac", "-b:a", bitrate, "-ac", str(AUDIO_CHANNELS)]
+    if fps:
+        args += ["-ar", str(fps)]
+    try:
+        run_ffmpeg(args + [temp_path])
+        os.replace(temp_path, track_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return track_path
+
+
+def audio_track(clip, temp_dir, fps=AUDIO_FPS, bitrate=AUDIO_BITRATE):
+    """AAC track of a clip's audio: from the cache when it plays a file as is, else encoded into temp_dir"""
+    if clip.audio is None:
+        return None
+    source = audio_source(clip.audio)
+    if source is not None:
+        try:
+            return encode_audio_file(source[0], source[1], bitrate, fps)
+        except Exception as e:
+            print(f"⚠️  Audio track cache unavailable ({e}), encoding for this job only")
+
+    audio_path = os.path.join(temp_dir, "audio.m4a")
+    clip.audio.write_audiofile(audio_path, fps=fps, codec="aac", bitrate=bitrate, logger=None)
+    return audio_path
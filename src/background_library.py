@@ -0,0 +1,271 @@
+"""
+Background Loop Library
+=======================
+
+The animated backgrounds look the same for every user apart from their
+duration, so each style is rendered once per resolution and shared by jobs:
+- Styles are referenced by id, the same ids the render planner uses:
+  "dynamic_gradient" (create_dynamic_video.py), "professional_wave"
+  (enhance_ai_video.py) and "neural" (ai_video_generator.py)
+- A style is a fixed set of distinct frames plus a mapping from job time to
+  one of them; the mapping stretches the frames over the job's duration (or
+  loops them), so one library entry serves every duration
+- Styles with few distinct frames are stored as a raw frame bank (.npy,
+  memory-mapped): lookups are stateless, so render threads stay parallel,
+  and concurrent jobs share the pages
+- Styles with many frames are stored as a lossless pre-encoded clip
+  (libx264rgb, exact RGB) and decoded in order with FFmpegVideoSource
+- Entries are built on first use in output/.cache/backgrounds under a
+  temporary name and renamed into place, so jobs never read a partial entry
+- video_entry gives any style as a lossless clip for the ffmpeg filtergraph
+  backend (filtergraph_backend.py); banks are encoded on first request
+
+Usage:
+    background = background_clip("dynamic_gradient", (1280, 720), duration)
+    python src/background_library.py --build all --sizes 1280x720 640x360
+"""
+
+import os
+
+import numpy as np
+
+from pipelined_writer import write_frames
+from ffmpeg_video_source import FFmpegVideoSource
+from frame_dedup import set_frame_key
+from render_trace import get_tracer
+
+# === Configuration ===
+BACKGROUND_DIR = os.path.join("output", ".cache", "backgrounds")
+LIBRARY_FPS = 24  # Frame rate of pre-encoded entries (frame i is at i / LIBRARY_FPS)
+NEURAL_STEPS = 240  # Progress steps of the neural pattern (~0.25 colour levels apart)
+LOSSLESS_ARGS = ["-c:v", "libx264rgb", "-qp", "0", "-preset", "veryfast"]
+
+
+class GradientRamp:
+    """create_dynamic_video.py: vertical blue gradient brightening from 30 to 80 over the intro"""
+
+    style_id = "dynamic_gradient"
+    storage = "bank"
+    frame_count = 51
+
+    def frame_index(self, t, duration):
+        return min(self.frame_count - 1, max(0, int(30 + t / duration * 50) - 30))
+
+    def pts_expr(self, duration):
+        """ffmpeg expression for the time frame N first shows (filtergraph_backend.py)"""
+        return f"N*{duration / 50:.9f}"
+
+    def render(self, index, size):
+        width, height = size
+        blue_intensity = 30 + index
+        intensity = (blue_intensity * (1 - np.arange(height) / height)).astype(np.int64)
+        column = np.stack([intensity // 3, intensity // 2, intensity], axis=1).astype(np.uint8)
+        return np.ascontiguousarray(np.broadcast_to(column[:, None, :], (height, width, 3)))
+
+
+class WaveGradient:
+    """enhance_ai_video.py: professional vertical gradient under a sideways wave"""
+
+    style_id = "professional_wave"
+    storage = "bank"
+    # The wave rolls the frame along x, and every row of the gradient is one
+    # colour, so all wave offsets give the same pixels: one frame loops forever
+    frame_count = 1
+
+    def frame_index(self, t, duration):
+        return 0
+
+    def pts_expr(self, duration):
+        return "0"
+
+    def render(self, index, size):
+        width, height = size
+        intensity = (20 + (1 - np.arange(height) / height) * 60).astype(np.int64)
+        column = np.stack([intensity // 4, intensity // 3, intensity], axis=1).astype(np.uint8)
+        return np.ascontiguousarray(np.broadcast_to(column[:, None, :], (height, width, 3)))
+
+
+class NeuralPattern:
+    """ai_video_generator.py: sine/cosine interference pattern drifting over the intro"""
+
+    style_id = "neural"
+    storage = "clip"
+    frame_count = NEURAL_STEPS
+
+    def frame_index(self, t, duration):
+        progress = min(1.0, max(0.0, t / duration))
+        return int(round(progress * (self.frame_count - 1)))
+
+    def pts_expr(self, duration):
+        return f"max(0,(N-0.5)*{duration / (self.frame_count - 1):.9f})"
+
+    def render(self, index, size):
+        width, height = size
+        progress = index / (self.frame_count - 1)
+        # Same formula as the old per-pixel loop, evaluated on whole rows and columns
+        intensity = (np.sin(np.arange(width) * 0.01 + progress * 2)[None, :] +
+                     np.cos(np.arange(height) * 0.01 + progress * 1.5)[:, None]) * 0.5 + 0.5
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:, :, 0] = (20 + intensity * 40).astype(np.int64)
+        frame[:, :, 1] = (30 + intensity * 50).astype(np.int64)
+        frame[:, :, 2] = (50 + intensity * 60).astype(np.int64)
+        return frame
+
+
+STYLES = {style.style_id: style for style in (GradientRamp(), WaveGradient(), NeuralPattern())}
+
+
+def get_style(style_id):
+    try:
+        return STYLES[style_id]
+    except KeyError:
+        raise ValueError(f"Unknown background style: {style_id} "
+                         f"(expected one of {', '.join(STYLES)})") from None
+
+
+class BackgroundLibrary:
+    """Pre-rendered background entries, one per style and resolution"""
+
+    def __init__(self, library_dir=BACKGROUND_DIR):
+        self.library_dir = library_dir
+        self.banks = {}  # Memory-mapped banks already opened by this process
+
+    def entry_path(self, style, size, extension=None):
+        extension = extension or ("npy" if style.storage == "bank" else "mp4")
+        return os.path.join(self.library_dir, f"{style.style_id}_{size[0]}x{size[1]}.{extension}")
+
+    def encode(self, frames, path):
+        """Store frames as a lossless clip under a temporary name, then rename it into place"""
+        root, extension = os.path.splitext(path)
+        temp_path = f"{root}.{os.getpid()}.tmp{extension}"
+        try:
+            write_frames(frames, None, LIBRARY_FPS, output_args=LOSSLESS_ARGS + [temp_path])
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return path
+
+    def build(self, style_id, size):
+        """Render a style's frames once and store them; returns the entry path"""
+        style = get_style(style_id)
+        size = (int(size[0]), int(size[1]))
+        path = self.entry_path(style, size)
+        hit = os.path.exists(path)
+        get_tracer().cache("background", hit)
+        if hit:
+            return path
+
+        print(f"🎨 Rendering background '{style.style_id}' at {size[0]}x{size[1]} "
+              f"({style.frame_count} frames) into the library...")
+        os.makedirs(self.library_dir, exist_ok=True)
+        root, extension = os.path.splitext(path)
+        temp_path = f"{root}.{os.getpid()}.tmp{extension}"
+        try:
+            if style.storage == "bank":
+                bank = np.lib.format.open_memmap(temp_path, mode="w+", dtype=np.uint8,
+                                                 shape=(style.frame_count, size[1], size[0], 3))
+                for index in range(style.frame_count):
+                    bank[index] = style.render(index, size)
+                bank.flush()
+                del bank
+                os.replace(temp_path, path)
+            else:
+                self.encode((style.render(index, size) for index in range(style.frame_count)), path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return path
+
+    def video_entry(self, style_id, size):
+        """A style's frames as a lossless clip (frame i at i / LIBRARY_FPS), for ffmpeg to read"""
+        style = get_style(style_id)
+        size = (int(size[0]), int(size[1]))
+        if style.storage == "clip":
+            return self.build(style_id, size)
+        path = self.entry_path(style, size, "mp4")
+        hit = os.path.exists(path)
+        get_tracer().cache("background.video", hit)
+        if not hit:
+            self.encode(iter(self.bank(style_id, size)), path)
+        return path
+
+    def bank(self, style_id, size):
+        """All frames of a bank-stored style, memory-mapped read-only"""
+        key = (style_id, tuple(size))
+        if key not in self.banks:
+            self.banks[key] = np.load(self.build(style_id, size), mmap_mode="r")
+        return self.banks[key]
+
+    def clip(self, style_id, size, duration):
+        """MoviePy clip of a style mapped onto a job's duration"""
+        from moviepy.editor import VideoClip
+
+        style = get_style(style_id)
+
+        def frame_index(t):
+            return style.frame_index(t, duration)
+
+        if style.storage == "bank":
+            frames = self.bank(style_id, size)
+
+            def make_frame(t):
+                return frames[frame_index(t)]
+
+            clip = VideoClip(make_frame, duration=duration)
+        else:
+            source = FFmpegVideoSource(self.build(style_id, size))
+
+            def make_frame(t):
+                # Time of the frame inside the library clip
+                return source.get_frame(frame_index(t) / source.fps)
+
+            clip = VideoClip(make_frame, duration=duration)
+            # Decoding is stateful: pipelined_writer renders clips with a reader one at a time
+            clip.reader = source
+        # Repeated library frames are rendered once (frame_dedup)
+        return set_frame_key(clip, frame_index)
+
+
+_library = None
+
+
+def background_clip(style_id, size, duration, library_dir=BACKGROUND_DIR):
+    """Background of a style for one job, from the shared library"""
+    global _library
+    if _library is None or _library.library_dir != library_dir:
+        _library = BackgroundLibrary(library_dir)
+    return _library.clip(style_id, size, duration)
+
+
+def parse_size(text):
+    """'1280x720' -> (1280, 720)"""
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Pre-render backgrounds into the shared library')
+    parser.add_argument('--build', nargs='+', default=['all'], metavar='STYLE',
+                        help=f'Styles to build: {", ".join(STYLES)} or all')
+    parser.add_argument('--sizes', nargs='+', type=parse_size, default=[(1280, 720)], metavar='WxH',
+                        help='Resolutions to build (e.g. 1280x720 640x360)')
+    parser.add_argument('--library-dir', default=BACKGROUND_DIR, help='Library directory')
+    args = parser.parse_args(argv)
+
+    styles = list(STYLES) if 'all' in args.build else args.build
+    library = BackgroundLibrary(args.library_dir)
+    for style_id in styles:
+        for size in args.sizes:
+            try:
+                path = library.build(style_id, size)
+                print(f"✅ {style_id} {size[0]}x{size[1]}: {path}")
+            except Exception as e:
+                print(f"⚠️  Could not build {style_id} at {size[0]}x{size[1]}: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+"""
+Rendering Pipeline Benchmark Suite
+==================================
+
+This script measures the performance of the video generation pipeline:
+- Generates synthetic assets locally (random photo, sine-sweep WAV, text file)
+- Micro benchmarks of each hot function at 720p and 1080p
+- End-to-end renders of each generator script
+- JSON results compared against a stored baseline with regression thresholds
+- The persistent caches (output/.cache: backgrounds, assets, audio, proxies)
+  live in the scratch directory, never the working tree; end-to-end renders
+  start from empty caches unless --caches warm times them on primed ones
+
+Usage:
+    python src/benchmark_pipeline.py                      # run and compare with baseline
+    python src/benchmark_pipeline.py --save-baseline      # store results as the new baseline
+    python src/benchmark_pipeline.py --filter background  # run matching benchmarks only
+    python src/benchmark_pipeline.py --skip-e2e           # micro benchmarks only
+    python src/benchmark_pipeline.py --caches warm        # end-to-end renders on primed caches
+"""
+
+import os
+import sys
+import json
+import time
+import wave
+import shutil
+import platform
+import tempfile
+import importlib
+import statistics
+from contextlib import contextmanager
+from functools import lru_cache
+import numpy as np
+from PIL import Image
+
+# === Configuration ===
+BENCHMARK_DIR = "benchmarks"
+RESULTS_PATH = os.path.join(BENCHMARK_DIR, "results.json")
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080)}
+REGRESSION_THRESHOLD = 0.10  # Fail when a benchmark is 10% slower than baseline
+MICRO_REPEAT = 5
+CACHE_MODES = ("cold", "warm")  # End-to-end renders on empty or on primed caches
+E2E_DURATION = 8.0  # Seconds of synthetic audio for end-to-end renders
+SAMPLE_RATE = 44100
+SYNTHETIC_TEXT = (
+    "Hello, my name is Benchmark. "
+    "I am a Python Developer with experience in Data Analysis, Machine Learning, and Cloud technologies. "
+    "I enjoy building solutions that automate tasks and deliver insights. "
+    "Thank you for watching my intro!"
+)
+
+
+# ====================== Synthetic assets ======================
+def create_synthetic_assets(asset_dir, duration=E2E_DURATION, photo_size=(3024, 4032)):
+    """Create a random photo, a sine-sweep WAV and an intro text file"""
+    os.makedirs(asset_dir, exist_ok=True)
+    rng = np.random.default_rng(0)
+
+    # Random photo (portrait phone-camera size by default)
+    photo_path = os.path.join(asset_dir, "photo.png")
+    photo = rng.integers(0, 256, size=(photo_size[1], photo_size[0], 3), dtype=np.uint8)
+    Image.fromarray(photo).save(photo_path)
+
+    # Sine sweep from 100 Hz to 4 kHz
+    voice_path = os.path.join(asset_dir, "voice_recording.wav")
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    f0, f1 = 100.0, 4000.0
+    phase = 2 * np.pi * (f0 * t + (f1 - f0) * t ** 2 / (2 * duration))
+    samples = (0.5 * np.sin(phase) * 32767).astype(np.int16)
+    with wave.open(voice_path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+
+    text_path = os.path.join(asset_dir, "intro_text.txt")
+    with open(text_path, "w", encoding="utf-8") as f:
+        f.write(SYNTHETIC_TEXT)
+
+    return {"photo": photo_path, "voice": voice_path, "text": text_path}
+
+
+# ====================== Helpers ======================
+@lru_cache(maxsize=None)
+def load_module(name):
+    """Import a generator script, returning None when its dependencies are missing"""
+    try:
+        return importlib.import_module(name)
+    except Exception as e:
+        print(f"⚠️  Skipping {name} benchmarks: {e}")
+        return None
+
+
+@contextmanager
+def patched(module, **values):
+    """Temporarily override module-level configuration (VIDEO_SIZE, paths, ...)"""
+    original = {key: getattr(module, key) for key in values}
+    for key, value in values.items():
+        setattr(module, key, value)
+    try:
+        yield module
+    finally:
+        for key, value in original.items():
+            setattr(module, key, value)
+
+
+@contextmanager
+def cache_root(root):
+    """Run with the CWD-relative caches (output/.cache/...) under root"""
+    # The cache directories are bound as default arguments, so patching the
+    # module constants would not reach them; moving the working directory does
+    os.makedirs(root, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        # The shared background library also keeps opened banks in memory
+        with patched(load_module("background_library"), _library=None):
+            yield root
+    finally:
+        os.chdir(cwd)
+
+
+def cold(fn, scratch_dir):
+    """fn run on empty caches, in a directory of its own that is removed afterwards"""
+    def run():
+        root = tempfile.mkdtemp(prefix="caches_", dir=scratch_dir)
+        try:
+            with cache_root(root):
+                fn()
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return run
+
+
+def time_function(fn, repeat, warmup=True):
+    """Time a function: an optional warm-up call followed by `repeat` timed calls"""
+    if warmup:
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "runs": repeat,
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+    }
+
+
+class BenchmarkSuite:
+    """Collects benchmark cases and runs them"""
+
+    def __init__(self, name_filter=None):
+        self.name_filter = name_filter
+        self.cases = []
+
+    def add(self, name, fn, repeat=MICRO_REPEAT, warmup=True):
+        """Register a benchmark case"""
+        if self.name_filter and self.name_filter not in name:
+            return
+        self.cases.append((name, fn, repeat, warmup))
+
+    def run(self):
+        """Run all registered cases, skipping the ones that fail"""
+        results = {}
+        for name, fn, repeat, warmup in self.cases:
+            try:
+                result = time_function(fn, repeat, warmup)
+            except Exception as e:
+                print(f"⚠️  {name}: failed ({e})")
+                continue
+            results[name] = result
+            print(f"⏱️  {name:<50} median {result['median_s'] * 1000:10.2f} ms")
+        return results
+
+
+# ====================== Micro benchmarks ======================
+def add_micro_benchmarks(suite, assets):
+    """Register per-function benchmarks at each resolution"""
+    create_video = load_module("create_video")
+    dynamic = load_module("create_dynamic_video")
+    enhance = load_module("enhance_ai_video")
+    ai_generator = load_module("ai_video_generator")
+
+    photo = np.array(Image.open(assets["photo"]).convert("RGB"))
+
+    for label, size in RESOLUTIONS.items():
+        duration = 10.0
+
+        if dynamic is not None:
+            def dynamic_background(size=size):
+                with patched(dynamic, VIDEO_SIZE=size):
+                    dynamic.create_background_clip(duration).get_frame(duration / 2)
+            suite.add(f"dynamic.background.make_frame@{label}", dynamic_background)
+
+            def dynamic_text(size=size):
+                with patched(dynamic, VIDEO_SIZE=size):
+                    dynamic.create_text_image_pil("Python Developer with Machine Learning experience")
+            suite.add(f"dynamic.create_text_image_pil@{label}", dynamic_text)
+
+            with patched(dynamic, VIDEO_SIZE=size):
+                photo_clip = dynamic.create_photo_animation_clip(assets["photo"], duration)
+            suite.add(f"dynamic.zoom_effect@{label}",
+                      lambda clip=photo_clip: clip.get_frame(duration / 2))
+
+        if enhance is not None:
+            def enhance_background(size=size):
+                with patched(enhance, VIDEO_SIZE=size):
+                    enhance.create_professional_background(duration).get_frame(duration / 2)
+            suite.add(f"enhance.background.make_frame@{label}", enhance_background)
+
+            def enhance_text(size=size):
+                with patched(enhance, VIDEO_SIZE=size):
+                    enhance.create_text_image_pil("Python Developer with Machine Learning experience")
+            suite.add(f"enhance.create_text_image_pil@{label}", enhance_text)
+
+        if ai_generator is not None:
+            generator = object.__new__(ai_generator.AIVideoGenerator)
+
+            def ai_background(size=size):
+                with patched(ai_generator, VIDEO_SIZE=size):
+                    generator.create_professional_background(duration).get_frame(duration / 2)
+            # Every call opens a decoder on the library clip, so keep repeats low
+            suite.add(f"ai.background.make_frame@{label}", ai_background, repeat=1)
+
+            def ai_text(size=size):
+                with patched(ai_generator, VIDEO_SIZE=size):
+                    generator.create_ai_enhanced_text("Python Developer with Machine Learning experience")
+            suite.add(f"ai.create_ai_enhanced_text@{label}", ai_text)
+
+        if create_video is not None:
+            def basic_text(size=size):
+                create_video.make_text_image(SYNTHETIC_TEXT, size=size)
+            suite.add(f"basic.make_text_image@{label}", basic_text)
+
+        def compositing(size=size):
+            composite_frame(size, photo)
+        suite.add(f"compositing@{label}", compositing)
+
+        def encoding(size=size):
+            encode_clip(size, assets["scratch"])
+        suite.add(f"write_videofile.libx264@{label}", encoding, repeat=1)
+
+    if ai_generator is not None:
+        audio_array = load_wav(assets["voice"])
+        processor = ai_generator.AudioProcessor()
+        suite.add("ai.compute_audio_features",
+                  lambda: processor.compute_audio_features(audio_array))
+
+
+def load_wav(path):
+    """Load a 16-bit WAV into a float array shaped like AudioFileClip.to_soundarray"""
+    with wave.open(path, "rb") as wav:
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        channels = wav.getnchannels()
+    return (samples.reshape(-1, channels) / 32768.0).astype(np.float64)
+
+
+def composite_frame(size, photo):
+    """Blend a background, a photo and masked text sprites into one frame"""
+    from moviepy.editor import ImageClip, CompositeVideoClip
+
+    width, height = size
+    background = ImageClip(np.full((height, width, 3), 40, dtype=np.uint8)).set_duration(10)
+    photo_clip = ImageClip(photo).resize(height=height).set_duration(10)
+
+    sprite = np.zeros((100, width - 100, 4), dtype=np.uint8)
+    sprite[30:70, 50:-50] = 255
+    text_clips = [
+        ImageClip(sprite, transparent=True).set_duration(10).set_position(("center", 100 + i * 80))
+        for i in range(6)
+    ]
+
+    clip = CompositeVideoClip([background, photo_clip] + text_clips, size=size)
+    clip.get_frame(5.0)
+
+
+def encode_clip(size, scratch_dir, duration=2.0, fps=24):
+    """Encode a short clip of a scrolling gradient with libx264"""
+    from moviepy.editor import VideoClip
+
+    width, height = size
+    ramp = np.linspace(0, 255, width, dtype=np.uint8)
+    gradient = np.repeat(np.stack([ramp, ramp[::-1], ramp // 2], axis=-1)[None], height, axis=0)
+
+    clip = VideoClip(lambda t: np.roll(gradient, int(t * 100), axis=1), duration=duration)
+    output_path = os.path.join(scratch_dir, f"encode_{width}x{height}.mp4")
+    clip.write_videofile(output_path, fps=fps, codec='libx264', audio=False, logger=None)
+
+
+# ====================== End-to-end benchmarks ======================
+def add_e2e_benchmarks(suite, assets, caches="cold"):
+    """Register full renders of each generator script, on empty or on primed caches"""
+    if caches not in CACHE_MODES:
+        raise ValueError(f"Unknown cache mode: {caches} (expected one of {', '.join(CACHE_MODES)})")
+    output_dir = assets["scratch"]
+    config = dict(PHOTO_PATH=assets["photo"], VOICE_PATH=assets["voice"], TEXT_PATH=assets["text"])
+
+    def add(name, fn):
+        if caches == "warm":
+            # The warm-up render fills the caches; warm results never compare with cold baselines
+            suite.add(f"{name}@warm", fn, repeat=1, warmup=True)
+        else:
+            suite.add(name, cold(fn, output_dir), repeat=1, warmup=False)
+
+    create_video = load_module("create_video")
+    if create_video is not None:
+        def basic_render():
+            with patched(create_video, OUTPUT_PATH=os.path.join(output_dir, "basic.mp4"), **config):
+                create_video.main([])
+        add("e2e.create_video", basic_render)
+
+    dynamic = load_module("create_dynamic_video")
+    if dynamic is not None:
+        def dynamic_render():
+            with patched(dynamic, OUTPUT_PATH=os.path.join(output_dir, "dynamic.mp4"), **config):
+                dynamic.main([])
+        add("e2e.create_dynamic_video", dynamic_render)
+
+    enhance = load_module("enhance_ai_video")
+    if enhance is not None:
+        def enhance_render():
+            lipsync_path = os.path.join(output_dir, "lip_sync_base.mp4")
+            if not os.path.exists(lipsync_path):
+                make_lipsync_base(assets, lipsync_path)
+            with patched(enhance, AI_LIPSYNC_VIDEO=lipsync_path,
+                         OUTPUT_PATH=os.path.join(output_dir, "enhanced.mp4"), **config):
+                enhance.enhance_ai_video()
+        add("e2e.enhance_ai_video", enhance_render)
+
+    ai_generator = load_module("ai_video_generator")
+    if ai_generator is not None:
+        def ai_render():
+            with patched(ai_generator, OUTPUT_PATH=os.path.join(output_dir, "ai.mp4"), **config):
+                ai_generator.AIVideoGenerator().generate_video()
+        add("e2e.ai_video_generator", ai_render)
+
+    ai_intro = load_module("ai_intro_video")
+    if ai_intro is not None:
+        def intro_render():
+            generator = ai_intro.AIIntroVideoGenerator(
+                assets["photo"], assets["voice"], os.path.join(output_dir, "intro.mp4"))
+            generator.generate_video()
+        add("e2e.ai_intro_video", intro_render)
+
+
+def make_lipsync_base(assets, output_path):
+    """Stand-in for a D-ID/HeyGen lip-sync clip: the photo with the voice track"""
+    from moviepy.editor import ImageClip, AudioFileClip
+
+    audio = AudioFileClip(assets["voice"])
+    clip = ImageClip(assets["photo"]).resize(height=720).set_duration(audio.duration)
+    clip = clip.set_audio(audio)
+    clip.write_videofile(output_path, fps=24, codec='libx264', audio_codec='aac', logger=None)
+
+
+# ====================== Baseline comparison ======================
+def compare_with_baseline(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Compare median timings against the baseline and return the regressions"""
+    thresholds = baseline.get("thresholds", {})
+    regressions = []
+
+    print("\n📊 Comparison with baseline:")
+    for name, result in sorted(results.items()):
+        reference = baseline.get("results", {}).get(name)
+        if reference is None:
+            print(f"   {name:<50} (new)")
+            continue
+
+        ratio = result["median_s"] / reference["median_s"]
+        limit = thresholds.get(name, threshold)
+        status = "✅"
+        if ratio > 1 + limit:
+            status = "❌"
+            regressions.append((name, ratio))
+        elif ratio < 1 - limit:
+            status = "🚀"
+        print(f"{status} {name:<50} {ratio:6.2f}x baseline")
+
+    return regressions
+
+
+def environment_info():
+    """Describe the machine the benchmarks ran on"""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the video rendering pipeline')
+    parser.add_argument('--filter', default=None, help='Only run benchmarks whose name contains this')
+    parser.add_argument('--skip-e2e', action='store_true', help='Skip end-to-end renders')
+    parser.add_argument('--caches', choices=CACHE_MODES, default="cold",
+                        help='Time end-to-end renders on empty caches or on primed ones')
+    parser.add_argument('--output', default=RESULTS_PATH, help='Where to write the JSON results')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='Allowed slowdown ratio before a benchmark counts as a regression')
+    args = parser.parse_args()
+
+    # Generator scripts live next to this file
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    print("📏 Rendering Pipeline Benchmarks")
+    print("=" * 50)
+
+    scratch_dir = tempfile.mkdtemp(prefix="video_bench_")
+    try:
+        assets = create_synthetic_assets(os.path.join(scratch_dir, "assets"))
+        assets["scratch"] = scratch_dir
+
+        # Micro benchmarks (and warm renders) share one cache directory in the scratch dir
+        with cache_root(os.path.join(scratch_dir, "caches")):
+            suite = BenchmarkSuite(name_filter=args.filter)
+            add_micro_benchmarks(suite, assets)
+            if not args.skip_e2e:
+                add_e2e_benchmarks(suite, assets, caches=args.caches)
+
+            results = suite.run()
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    report = {"environment": environment_info(), "results": results}
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📁 Results: {args.output}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📌 Baseline saved: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"💡 No baseline found at {args.baseline} (run with --save-baseline)")
+        return
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = compare_with_baseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) regressed beyond {args.threshold:.0%}")
+        sys.exit(1)
+    print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
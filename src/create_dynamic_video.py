@@ -3,6 +3,19 @@ import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 from moviepy.editor import *
 import cv2
+from render_planner import plan_render, print_plan
+from preview_mode import FINAL_PROFILE, preview_profile, publish_profile, PREVIEW_SCALE, PREVIEW_FPS
+from encoding_profiles import select_encoder_profile
+from pipelined_writer import render_video, DEFAULT_WORKERS
+from resource_governor import govern, add_governor_arguments
+from sprite_atlas import SpriteAtlas
+from frame_dedup import set_frame_key, mark_still
+from background_library import background_clip
+from multi_rendition import publish, RENDITIONS
+from streaming_output import stream_render, STREAM_FORMATS
+from render_timeline import build_timeline
+from filtergraph_backend import render_filtergraph, BACKENDS
+from asset_ingest import ingest_photo, ingest_photo_file, oriented_size
 
 # === Configuration ===
 PHOTO_PATH = r"C:\Users\hp\Video_Generation_Project\Video_Generation_Project\assets\photo.png"
@@ -13,6 +26,11 @@ VIDEO_SIZE = (1280, 720)  # HD resolution
 FONT_SIZE = 48
 FONT_COLOR = "white"
 FONT_PATH = "arial.ttf"
+PROFILE = FINAL_PROFILE  # Switched to a preview profile by --preview
+WORKERS = DEFAULT_WORKERS  # Render threads of the pipelined writer (--workers)
+SPRITES = SpriteAtlas()  # Trimmed text sprites of the current job, packed into one array
+VFR = False  # Drop repeated frames and keep their timestamps (--vfr)
+PIX_FMT = "rgb24"  # Frame format sent to ffmpeg (--yuv420p)
 
 def load_intro_text(file_path):
     """Read intro text from file and split into sentences"""
@@ -26,28 +44,27 @@ def create_animated_text_clip(text, duration, start_time, position="center", fon
     """Create animated text using PIL-generated images"""
     # Create text image using PIL
     text_img = create_text_image_pil(text, fontsize=fontsize, color='white')
-    text_array = np.array(text_img)
     
-    # Create ImageClip from numpy array
-    txt_clip = ImageClip(text_array, transparent=True)
+    # Trimmed sprite clip, placed where the full canvas would have put the text
+    txt_clip = SPRITES.clip(text_img, position, PROFILE.size(VIDEO_SIZE))
     txt_clip = txt_clip.set_start(start_time).set_duration(duration)
-    txt_clip = txt_clip.set_position(position)
     
     # Add fade effects
     fade_duration = 0.5
     txt_clip = txt_clip.fadein(fade_duration).fadeout(fade_duration)
     
-    return txt_clip
+    # Still between the fades, so those frames are rendered once
+    return mark_still(txt_clip, fade_in=fade_duration, fade_out=fade_duration)
 
 def create_text_image_pil(text, fontsize=FONT_SIZE, color='white'):
     """Create text image using PIL"""
     # Create transparent image
-    img = Image.new("RGBA", (VIDEO_SIZE[0]-100, 100), (0, 0, 0, 0))
+    img = Image.new("RGBA", PROFILE.size((VIDEO_SIZE[0]-100, 100)), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
     
     # Try to load font
     try:
-        font = ImageFont.truetype("arial.ttf", fontsize)
+        font = ImageFont.truetype("arial.ttf", PROFILE.fontsize(fontsize))
     except:
         font = ImageFont.load_default()
     
@@ -65,32 +82,14 @@ def create_text_image_pil(text, fontsize=FONT_SIZE, color='white'):
     return img
 
 def create_background_clip(duration):
-    """Create animated background with gradient effect"""
-    # Create a gradient background that changes over time
-    def make_frame(t):
-        # Create gradient from dark blue to lighter blue
-        gradient = np.zeros((VIDEO_SIZE[1], VIDEO_SIZE[0], 3), dtype=np.uint8)
-        
-        # Animate gradient based on time
-        progress = t / duration
-        blue_intensity = int(30 + progress * 50)  # 30 to 80
-        
-        for y in range(VIDEO_SIZE[1]):
-            # Create vertical gradient
-            intensity = int(blue_intensity * (1 - y / VIDEO_SIZE[1]))
-            gradient[y, :] = [intensity//3, intensity//2, intensity]
-        
-        return gradient
-    
-    return VideoClip(make_frame, duration=duration)
+    """Animated gradient background, shared through the background library"""
+    return background_clip("dynamic_gradient", PROFILE.size(VIDEO_SIZE), duration)
 
 def create_photo_animation_clip(photo_path, duration):
     """Create dynamic photo animation with zoom and pan effects"""
-    # Load photo
-    photo_clip = ImageClip(photo_path)
-    
-    # Resize to fit video while maintaining aspect ratio
-    photo_clip = photo_clip.resize(height=VIDEO_SIZE[1])
+    # Load photo, decoded straight to the video height (aspect ratio kept)
+    photo_clip = ImageClip(ingest_photo(photo_path, height=PROFILE.size(VIDEO_SIZE)[1]))
+    photo_w, photo_h = photo_clip.size
     
     # Create Ken Burns effect (zoom + pan)
     def zoom_effect(get_frame, t):
@@ -112,6 +111,9 @@ def create_photo_animation_clip(photo_path, duration):
     
     photo_clip = photo_clip.fl(zoom_effect)
     photo_clip = photo_clip.set_duration(duration)
+    # Frames repeat while the zoomed size stays on the same integer pixels
+    photo_clip = set_frame_key(photo_clip, lambda t: (int(photo_h * (1 + 0.1 * (t / duration))),
+                                                      int(photo_w * (1 + 0.1 * (t / duration)))))
     
     # Position photo (offset to one side to make room for text)
     photo_clip = photo_clip.set_position(('left', 'center'))
@@ -122,16 +124,14 @@ def create_title_clip(text, duration, start_time):
     """Create animated title with special effects using PIL"""
     # Create title image with special styling
     title_img = create_text_image_pil(text, fontsize=72, color='#FFD700')
-    title_array = np.array(title_img)
     
-    title_clip = ImageClip(title_array, transparent=True)
+    title_clip = SPRITES.clip(title_img, ('center', PROFILE.px(100)), PROFILE.size(VIDEO_SIZE))
     title_clip = title_clip.set_start(start_time).set_duration(duration)
-    title_clip = title_clip.set_position(('center', 100))
     
     # Add special effects
     title_clip = title_clip.fadein(1.0).fadeout(0.5)
     
-    return title_clip
+    return mark_still(title_clip, fade_in=1.0, fade_out=0.5)
 
 def create_bouncing_element(text, duration, start_time, bounce_position):
     """Create bouncing animated element using PIL"""
@@ -140,20 +140,89 @@ def create_bouncing_element(text, duration, start_time, bounce_position):
         bounce_cycle = 2  # seconds per bounce
         phase = (t % bounce_cycle) / bounce_cycle * 2 * np.pi
         bounce_offset = 20 * np.sin(phase)
-        return ('center', bounce_position + bounce_offset)
+        return ('center', PROFILE.px(bounce_position + bounce_offset))
     
     # Create text image using PIL
     bounce_img = create_text_image_pil(text, fontsize=36, color='#00FF00')
-    bounce_array = np.array(bounce_img)
     
-    bounce_clip = ImageClip(bounce_array, transparent=True)
+    bounce_clip = SPRITES.clip(bounce_img, bounce_position_func, PROFILE.size(VIDEO_SIZE))
     bounce_clip = bounce_clip.set_start(start_time).set_duration(duration)
-    bounce_clip = bounce_clip.set_position(bounce_position_func)
     
-    return bounce_clip
+    # Only its position moves, which the frame key already includes
+    return mark_still(bounce_clip)
 
-def main():
+def render_with_filtergraph(output_path):
+    """Render the same timeline as one ffmpeg filtergraph, with no Python per frame"""
+    audio_duration = AudioFileClip(VOICE_PATH).duration
+    sentences = load_intro_text(TEXT_PATH)
+    photo_path = ingest_photo_file(PHOTO_PATH, height=PROFILE.size(VIDEO_SIZE)[1])
+    timeline = build_timeline("dynamic", audio_duration, sentences, oriented_size(PHOTO_PATH), photo_path,
+                              trim_text=False)
+    # Sprites come from the same PIL code as the MoviePy path
+    sprites = {layer.name: create_text_image_pil(layer.text, fontsize=layer.fontsize, color=layer.color)
+               for layer in timeline.layers if layer.kind == "sprite"}
+    render_filtergraph(timeline, output_path, PROFILE.size(VIDEO_SIZE), fps=PROFILE.fps, scale=PROFILE.scale,
+                       sprites=sprites, audio_path=VOICE_PATH,
+                       preset=PROFILE.preset if PROFILE.is_preview else None)
+
+def main(argv=None):
+    global PROFILE, WORKERS, SPRITES, VFR, PIX_FMT
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Create dynamic intro video')
+    parser.add_argument('--plan', action='store_true', help='Estimate render cost from metadata and exit')
+    parser.add_argument('--preview', action='store_true', help='Fast low-resolution render of the same layout')
+    parser.add_argument('--preview-scale', type=float, default=PREVIEW_SCALE, help='Preview resolution scale')
+    parser.add_argument('--preview-fps', type=int, default=PREVIEW_FPS, help='Preview frame rate')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Render threads feeding the encoder (0 = MoviePy write_videofile)')
+    parser.add_argument('--vfr', action='store_true',
+                        help='Drop repeated frames instead of encoding them (variable frame rate)')
+    parser.add_argument('--yuv420p', action='store_true',
+                        help='Convert frames to yuv420p in the render threads instead of in ffmpeg')
+    parser.add_argument('--stream', metavar='DIR',
+                        help='Write HLS segments (or a fragmented MP4) to DIR, playable while rendering')
+    parser.add_argument('--stream-format', choices=STREAM_FORMATS, default='hls', help='Streaming output format')
+    parser.add_argument('--publish', metavar='DIR',
+                        help='Render once at 1080p and write the 1080p/720p/480p ladder, HLS, poster and GIF to DIR')
+    parser.add_argument('--backend', choices=BACKENDS, default='moviepy',
+                        help='Compositor: MoviePy in Python, or one ffmpeg filtergraph (plain output only)')
+    add_governor_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.backend == 'ffmpeg' and (args.publish or args.stream):
+        print("⚠️  The ffmpeg backend writes a single MP4; --publish/--stream render with MoviePy")
+        args.backend = 'moviepy'
+    ignored = [flag for flag, value in (('--vfr', args.vfr), ('--yuv420p', args.yuv420p)) if value]
+    if args.backend == 'ffmpeg' and ignored:
+        print(f"⚠️  The ffmpeg backend encodes every frame and converts to yuv420p itself; ignoring {'/'.join(ignored)}")
+    if (args.publish or args.stream) and ignored:
+        print(f"⚠️  --publish/--stream encode every RGB frame; ignoring {'/'.join(ignored)}")
+    
+    if args.plan:
+        print_plan(plan_render("dynamic", photo_path=PHOTO_PATH, audio_path=VOICE_PATH, text_path=TEXT_PATH))
+        return
+    
+    if args.preview:
+        PROFILE = preview_profile(args.preview_scale, args.preview_fps)
+    elif args.publish:
+        # Lay the timeline out at the top rendition; ffmpeg scales down the rest
+        PROFILE = publish_profile(RENDITIONS[0][1], VIDEO_SIZE[1])
+    else:
+        PROFILE = FINAL_PROFILE
+    WORKERS = args.workers
+    budget = govern(args.cores, args.pin, workers=WORKERS)
+    if budget is not None:
+        WORKERS = budget.workers
+    VFR = args.vfr
+    PIX_FMT = 'yuv420p' if args.yuv420p else 'rgb24'
+    SPRITES = SpriteAtlas()
+    output_path = PROFILE.output_path(OUTPUT_PATH)
+    
     print("🎬 Creating dynamic intro video...")
+    if args.backend == 'ffmpeg':
+        render_with_filtergraph(output_path)
+        print(f"📁 Output: {output_path}")
+        return
     
     # Load voice and get duration
     audio_clip = AudioFileClip(VOICE_PATH)
@@ -184,7 +253,7 @@ def main():
         # Create animated text
         text_clip = create_animated_text_clip(
             sentence, duration, start_time, 
-            position=('center', 200 + i * 80)
+            position=('center', PROFILE.px(200 + i * 80))
         )
         text_clips.append(text_clip)
     
@@ -204,36 +273,48 @@ def main():
     closing = create_animated_text_clip(
         "Thank you for watching!", 2.0, 
         audio_duration - 2.5, 
-        position=('center', 600),
+        position=('center', PROFILE.px(600)),
         fontsize=56
     )
     
+    # Pack every text sprite into one atlas array before rendering
+    SPRITES.report()
+    
     # Combine all clips
     all_clips = [background, photo_clip, title] + text_clips + skill_clips + [closing]
     
     # Create final composite
-    final_clip = CompositeVideoClip(all_clips, size=VIDEO_SIZE)
+    final_clip = CompositeVideoClip(all_clips, size=PROFILE.size(VIDEO_SIZE))
     final_clip = final_clip.set_audio(audio_clip)
-    final_clip = final_clip.set_fps(24)
+    final_clip = final_clip.set_fps(PROFILE.fps)
     
     # Ensure output folder exists
-    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-    
-    print("🎥 Rendering video...")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    
+    # Pick x264 settings from the timeline's motion; previews keep their fast preset
+    encoder = select_encoder_profile(final_clip.get_frame, final_clip.duration, PROFILE.fps,
+                                     preset=PROFILE.preset if PROFILE.is_preview else None)
+    
+    if args.publish:
+        name = os.path.splitext(os.path.basename(output_path))[0]
+        publish(final_clip, args.publish, name, PROFILE.fps, encoder, workers=max(1, WORKERS))
+        return
+    if args.stream:
+        name = os.path.splitext(os.path.basename(output_path))[0]
+        stream_render(final_clip, args.stream, name, PROFILE.fps, encoder, workers=max(1, WORKERS),
+                      fmt=args.stream_format)
+        return
+    
+    print(f"🎥 Rendering {PROFILE.name} video...")
     # Export video with high quality
-    final_clip.write_videofile(
-        OUTPUT_PATH, 
-        fps=24, 
-        codec='libx264',
-        audio_codec='aac',
-        temp_audiofile='temp-audio.m4a',
-        remove_temp=True
-    )
+    render_video(final_clip, output_path, PROFILE.fps, encoder, workers=WORKERS, vfr=VFR,
+                 pix_fmt=PIX_FMT)
     
+    width, height = PROFILE.size(VIDEO_SIZE)
     print(f"✅ Dynamic video created successfully!")
-    print(f"📁 Output: {OUTPUT_PATH}")
+    print(f"📁 Output: {output_path}")
     print(f"⏱️  Duration: {audio_duration:.2f} seconds")
-    print(f"📐 Resolution: {VIDEO_SIZE[0]}x{VIDEO_SIZE[1]}")
+    print(f"📐 Resolution: {width}x{height}")
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,19 @@
 import os
-import numpy as np
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from moviepy.editor import ImageClip, AudioFileClip, CompositeVideoClip
 from pydub import AudioSegment
-
-path = r"C:\Users\hp\Video_Generation_Project\Video_Generation_Project\assets\voice_recording.wav"
+from render_planner import plan_render, print_plan
+from encoding_profiles import select_encoder_profile
+from pipelined_writer import render_video, DEFAULT_WORKERS
+from resource_governor import govern, add_governor_arguments
+from text_layout import load_font, layout_text, draw_lines
+from sprite_atlas import SpriteAtlas
+from frame_dedup import set_frame_key, mark_still
+from multi_rendition import publish
+from streaming_output import stream_render, STREAM_FORMATS
+from render_timeline import build_timeline
+from filtergraph_backend import render_filtergraph, BACKENDS
+from asset_ingest import ingest_photo, ingest_photo_file, oriented_size
 
 
 # === Configuration ===
@@ -17,8 +26,6 @@ FONT_SIZE = 40
 FONT_COLOR = "white"
 FONT_PATH = "arial.ttf"  # default Windows font
 
-audio_clip = AudioFileClip(VOICE_PATH)
-
 # ====================== Functions ======================
 def load_intro_text(file_path):
     """Read intro text from file"""
@@ -30,63 +37,93 @@ def make_text_image(text, size=VIDEO_SIZE, fontsize=FONT_SIZE, fontcolor=FONT_CO
     img = Image.new("RGBA", size, (0, 0, 0, 0))  # transparent background
     draw = ImageDraw.Draw(img)
 
-    # Try to load the font
-    try:
-        font = ImageFont.truetype(font_path, fontsize)
-    except:
-        font = ImageFont.load_default()
-
-    # Helper function to get text size
-    def get_text_size(draw, text, font):
-        bbox = draw.textbbox((0, 0), text, font=font)
-        width = bbox[2] - bbox[0]
-        height = bbox[3] - bbox[1]
-        return width, height
-
-    lines = []
-    words = text.split()
-    line = ""
-    for word in words:
-        test_line = f"{line} {word}".strip()
-        w, h = get_text_size(draw, test_line, font)
-        if w <= size[0] - 40:  # 20px margin
-            line = test_line
-        else:
-            lines.append(line)
-            line = word
-    lines.append(line)
-
-    # Draw lines centered vertically
-    total_h = sum([get_text_size(draw, l, font)[1] for l in lines])
-    current_h = (size[1] - total_h) // 2
-    for l in lines:
-        w, h = get_text_size(draw, l, font)
-        draw.text(((size[0]-w)//2, current_h), l, font=font, fill=fontcolor)
-        current_h += h
+    # Load the font (cached, falls back to the default font)
+    font = load_font(font_path, fontsize)
+
+    # Wrap with cached word widths and centre the block (20px margin each side);
+    # lines keep their own ink heights, so the paragraph lands where it always did
+    lines = layout_text(text, font, max_width=size[0] - 40, box=size, ink=True)
+    draw_lines(draw, lines, font, fill=fontcolor)
     
     return img
 
+def render_with_filtergraph(output_path):
+    """Render the same layout as one ffmpeg filtergraph, with no Python per frame"""
+    audio_duration = AudioFileClip(VOICE_PATH).duration
+    intro_text = load_intro_text(TEXT_PATH)
+    photo_path = ingest_photo_file(PHOTO_PATH, height=VIDEO_SIZE[1])
+    timeline = build_timeline("basic", audio_duration, [intro_text], oriented_size(PHOTO_PATH), photo_path,
+                              trim_text=False)
+    # The paragraph comes from the same PIL code as the MoviePy path
+    sprites = {"paragraph": make_text_image(intro_text, size=timeline.size)}
+    render_filtergraph(timeline, output_path, fps=24, sprites=sprites, audio_path=VOICE_PATH)
+
 
 # ====================== Main ======================
-def main():
+def main(argv=None):
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Create basic intro video')
+    parser.add_argument('--plan', action='store_true', help='Estimate render cost from metadata and exit')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Render threads feeding the encoder (0 = MoviePy write_videofile)')
+    parser.add_argument('--vfr', action='store_true',
+                        help='Drop repeated frames instead of encoding them (variable frame rate)')
+    parser.add_argument('--yuv420p', action='store_true',
+                        help='Convert frames to yuv420p in the render threads instead of in ffmpeg')
+    parser.add_argument('--stream', metavar='DIR',
+                        help='Write HLS segments (or a fragmented MP4) to DIR, playable while rendering')
+    parser.add_argument('--stream-format', choices=STREAM_FORMATS, default='hls', help='Streaming output format')
+    parser.add_argument('--publish', metavar='DIR',
+                        help='Write the rendition ladder (up to the photo height), HLS, poster and GIF to DIR')
+    parser.add_argument('--backend', choices=BACKENDS, default='moviepy',
+                        help='Compositor: MoviePy in Python, or one ffmpeg filtergraph (plain output only)')
+    add_governor_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.backend == 'ffmpeg' and (args.publish or args.stream):
+        print("⚠️  The ffmpeg backend writes a single MP4; --publish/--stream render with MoviePy")
+        args.backend = 'moviepy'
+    ignored = [flag for flag, value in (('--vfr', args.vfr), ('--yuv420p', args.yuv420p)) if value]
+    if args.backend == 'ffmpeg' and ignored:
+        print(f"⚠️  The ffmpeg backend encodes every frame and converts to yuv420p itself; ignoring {'/'.join(ignored)}")
+    if (args.publish or args.stream) and ignored:
+        print(f"⚠️  --publish/--stream encode every RGB frame; ignoring {'/'.join(ignored)}")
+    
+    if args.plan:
+        print_plan(plan_render("basic", photo_path=PHOTO_PATH, audio_path=VOICE_PATH, text_path=TEXT_PATH))
+        return
+    
+    budget = govern(args.cores, args.pin, workers=args.workers)
+    if budget is not None:
+        args.workers = budget.workers
+    
+    if args.backend == 'ffmpeg':
+        render_with_filtergraph(OUTPUT_PATH)
+        print(f"✅ Video exported successfully at {OUTPUT_PATH}")
+        return
+    
     # Load voice
     audio_clip = AudioFileClip(VOICE_PATH)
     audio_duration = audio_clip.duration
 
-    # Load photo and apply slow zoom (Ken Burns effect)
-    image_clip = ImageClip(PHOTO_PATH).set_duration(audio_duration)
-    image_clip = image_clip.resize(height=VIDEO_SIZE[1])
+    # Load the photo decoded at its working size, and apply slow zoom (Ken Burns effect)
+    image_clip = ImageClip(ingest_photo(PHOTO_PATH, height=VIDEO_SIZE[1])).set_duration(audio_duration)
+    photo_w, photo_h = image_clip.size
     image_clip = image_clip.fx(lambda clip: clip.resize(lambda t: 1 + 0.05 * t / audio_duration))
+    # The zoom only changes the frame when the resized size steps to the next pixel
+    image_clip = set_frame_key(image_clip, lambda t: (int((1 + 0.05 * t / audio_duration) * photo_w),
+                                                      int((1 + 0.05 * t / audio_duration) * photo_h)))
 
     # Load intro text
     intro_text = load_intro_text(TEXT_PATH)
 
     # Create text image clip
     text_img = make_text_image(intro_text, size=image_clip.size)
-    # Convert PIL Image to numpy array for ImageClip
-    text_array = np.array(text_img)
-    text_clip = ImageClip(text_array, transparent=True)
-    text_clip = text_clip.set_duration(audio_duration).set_position("center")
+    # Keep only the paragraph's bounding box instead of a full-frame RGBA canvas
+    sprites = SpriteAtlas()
+    text_clip = sprites.clip(text_img, "center", image_clip.size)
+    text_clip = mark_still(text_clip.set_duration(audio_duration))
+    sprites.report()
 
     # Combine photo + text + audio
     final_clip = CompositeVideoClip([image_clip, text_clip])
@@ -95,8 +132,19 @@ def main():
     # Ensure output folder exists
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    # Export video
-    final_clip.write_videofile(OUTPUT_PATH, fps=24)
+    # Export video with x264 settings matched to the (mostly static) content
+    encoder = select_encoder_profile(final_clip.get_frame, final_clip.duration, 24)
+    if args.publish:
+        name = os.path.splitext(os.path.basename(OUTPUT_PATH))[0]
+        publish(final_clip, args.publish, name, 24, encoder, workers=max(1, args.workers))
+        return
+    if args.stream:
+        name = os.path.splitext(os.path.basename(OUTPUT_PATH))[0]
+        stream_render(final_clip, args.stream, name, 24, encoder, workers=max(1, args.workers),
+                      fmt=args.stream_format)
+        return
+    render_video(final_clip, OUTPUT_PATH, 24, encoder, workers=args.workers, vfr=args.vfr,
+                 pix_fmt='yuv420p' if args.yuv420p else 'rgb24')
 
     print(f"✅ Video exported successfully at {OUTPUT_PATH}")
 
@@ -0,0 +1,123 @@
+"""
+Occlusion-Culled Compositing
+============================
+
+CompositeVideoClip that skips layers hidden under an opaque full-frame clip:
+- A layer is opaque when it has no mask (MoviePy blits it as a solid rectangle)
+- Its coverage rectangle comes from its size and position at each frame time,
+  so moving or partly off-screen layers are handled exactly
+- Every playing layer below the topmost covering layer is skipped, so its
+  frame is never rendered (backgrounds under a full-frame lip-sync video)
+- Culled and rendered layer-frames are counted and reported after a render
+
+Usage:
+    final_clip = CulledCompositeVideoClip(all_clips, size=VIDEO_SIZE)
+    ...
+    final_clip.report_culling()
+"""
+
+import threading
+
+from moviepy.editor import CompositeVideoClip
+
+
+def resolve_position(pos, size, frame_size, relative=False):
+    """Top-left pixel corner of a MoviePy position, resolved exactly as VideoClip.blit_on does"""
+    frame_w, frame_h = frame_size
+    width, height = size
+
+    # Same shorthand and keyword handling as VideoClip.blit_on
+    if isinstance(pos, str):
+        pos = {'center': ['center', 'center'],
+               'left': ['left', 'center'],
+               'right': ['right', 'center'],
+               'top': ['center', 'top'],
+               'bottom': ['center', 'bottom']}[pos]
+    else:
+        pos = list(pos)
+
+    if relative:
+        for i, dim in enumerate([frame_w, frame_h]):
+            if not isinstance(pos[i], str):
+                pos[i] = dim * pos[i]
+
+    if isinstance(pos[0], str):
+        pos[0] = {'left': 0, 'center': (frame_w - width) / 2, 'right': frame_w - width}[pos[0]]
+    if isinstance(pos[1], str):
+        pos[1] = {'top': 0, 'center': (frame_h - height) / 2, 'bottom': frame_h - height}[pos[1]]
+
+    return int(pos[0]), int(pos[1])
+
+
+def clip_rect(clip, t, frame_size):
+    """(x, y, width, height) of a clip inside the frame at composite time t"""
+    x, y = resolve_position(clip.pos(t - clip.start), clip.size, frame_size, clip.relative_pos)
+    return x, y, clip.size[0], clip.size[1]
+
+
+def covers_frame(clip, t, frame_size):
+    """True if the clip is opaque and hides the whole frame at time t"""
+    if clip.mask is not None or clip.ismask:
+        return False
+    x, y, width, height = clip_rect(clip, t, frame_size)
+    return x <= 0 and y <= 0 and x + width >= frame_size[0] and y + height >= frame_size[1]
+
+
+class CullingStats:
+    """Layer-frame counters, shared by every copy of a composite clip"""
+
+    def __init__(self, layers):
+        self.culled = 0
+        self.rendered = 0
+        self.culled_per_layer = [0] * layers
+        self.lock = threading.Lock()
+
+    def add(self, culled_indices, rendered):
+        with self.lock:
+            self.culled += len(culled_indices)
+            self.rendered += rendered
+            for i in culled_indices:
+                self.culled_per_layer[i] += 1
+
+
+class CulledCompositeVideoClip(CompositeVideoClip):
+    """CompositeVideoClip that never renders layers hidden by an opaque full-frame layer"""
+
+    def __init__(self, clips, size=None, bg_color=None, use_bgclip=False, ismask=False):
+        CompositeVideoClip.__init__(self, clips, size=size, bg_color=bg_color,
+                                    use_bgclip=use_bgclip, ismask=ismask)
+        # set_audio/set_fps return shallow copies while make_frame stays bound to
+        # this instance, so the counters live in an object the copies share
+        self.culling = CullingStats(len(self.clips))
+
+    def playing_clips(self, t=0):
+        """Playing clips from the topmost full-frame opaque clip upwards"""
+        playing = [(i, c) for i, c in enumerate(self.clips) if c.is_playing(t)]
+
+        first_visible = 0
+        for position in range(len(playing) - 1, -1, -1):
+            if covers_frame(playing[position][1], t, self.size):
+                first_visible = position
+                break
+
+        self.culling.add([i for i, _ in playing[:first_visible]], len(playing) - first_visible)
+        return [c for _, c in playing[first_visible:]]
+
+    def culling_stats(self):
+        culling = self.culling
+        total = culling.culled + culling.rendered
+        return {
+            "culled_layer_frames": culling.culled,
+            "rendered_layer_frames": culling.rendered,
+            "culled_fraction": culling.culled / total if total else 0.0,
+            "culled_per_layer": {i: n for i, n in enumerate(culling.culled_per_layer) if n},
+        }
+
+    def report_culling(self):
+        """Print how many layer-frames were skipped"""
+        stats = self.culling_stats()
+        layers = ", ".join(f"layer {i}: {n}" for i, n in stats["culled_per_layer"].items())
+        print(f"🙈 Occlusion culling skipped {stats['culled_layer_frames']} of "
+              f"{stats['culled_layer_frames'] + stats['rendered_layer_frames']} layer-frames"
+              + (f" ({layers})" if layers else ""))
+        return stats
@@ -0,0 +1,153 @@
+"""
+Content-Adaptive Encoder Profiles
+=================================
+
+Picks libx264 settings to match the content of a rendered timeline:
+- Samples pairs of adjacent frames at low resolution to measure motion and change
+- Mostly static intros (still photo, slow gradient, static text) get
+  tune=stillimage, a faster preset and long keyframe intervals
+- Moving content keeps a slower preset and tighter keyframes
+- Reports the expected speed/size trade-off of the chosen profile
+
+Usage:
+    profile = select_encoder_profile(final_clip.get_frame, duration, fps=24)
+    final_clip.write_videofile(OUTPUT_PATH, fps=24, **profile.write_kwargs())
+"""
+
+import numpy as np
+import cv2
+
+from resource_governor import core_budget
+
+# === Configuration ===
+ANALYSIS_SAMPLES = 8  # Pairs of adjacent frames sampled across the timeline
+PROBE_WIDTH = 160  # Frames are compared at this width
+STATIC_THRESHOLD = 0.5  # Mean abs difference (0-255) below which a frame pair counts as static
+
+# Approximate libx264 encode speed relative to the default "medium" preset
+PRESET_SPEED = {
+    "ultrafast": 8.0, "superfast": 6.0, "veryfast": 4.0, "faster": 2.5,
+    "fast": 1.6, "medium": 1.0, "slow": 0.6, "slower": 0.3,
+}
+DEFAULT_CRF = 23
+
+# (name, max motion, preset, tune, crf, keyframe interval in seconds)
+CONTENT_CLASSES = [
+    ("static", 0.5, "veryfast", "stillimage", 23, 10),
+    ("low_motion", 3.0, "faster", "animation", 22, 5),
+    ("high_motion", float("inf"), "medium", "film", 21, 2),
+]
+
+
+class EncoderProfile:
+    """libx264 settings chosen for a timeline"""
+
+    def __init__(self, content, preset, tune, crf, keyint, threads=None, faststart=True, stats=None):
+        self.content = content
+        self.preset = preset
+        self.tune = tune
+        self.crf = crf
+        self.keyint = keyint
+        self.threads = threads or core_budget()
+        self.faststart = faststart
+        self.stats = stats or {}
+
+    def x264_args(self, faststart=None):
+        """Rate control and GOP options shared by every ffmpeg invocation"""
+        args = ["-crf", str(self.crf), "-g", str(self.keyint)]
+        if self.tune:
+            args += ["-tune", self.tune]
+        # faststart=False leaves container flags to the caller (e.g. per tee output)
+        if self.faststart if faststart is None else faststart:
+            args += ["-movflags", "+faststart"]
+        return args
+
+    def write_kwargs(self):
+        """Keyword arguments for MoviePy's write_videofile"""
+        return {
+            "codec": "libx264",
+            "preset": self.preset,
+            "threads": self.threads,
+            "ffmpeg_params": self.x264_args(),
+        }
+
+    def ffmpeg_args(self, faststart=None):
+        """Video encoder arguments for a direct ffmpeg command"""
+        return ["-c:v", "libx264", "-preset", self.preset, "-threads", str(self.threads),
+                "-pix_fmt", "yuv420p"] + self.x264_args(faststart)
+
+    def expected_speedup(self):
+        return PRESET_SPEED.get(self.preset, 1.0)
+
+    def expected_size_ratio(self):
+        # Roughly: every +6 CRF halves the bitrate
+        return 2 ** ((DEFAULT_CRF - self.crf) / 6)
+
+    def describe(self):
+        motion = self.stats.get("motion")
+        measured = f" (motion {motion:.2f})" if motion is not None else ""
+        return (f"{self.content}{measured} -> preset {self.preset}, tune {self.tune or 'none'}, "
+                f"crf {self.crf}, keyint {self.keyint}, {self.threads} threads: "
+                f"~{self.expected_speedup():.1f}x encode speed and ~{self.expected_size_ratio():.2f}x size "
+                f"vs medium/crf {DEFAULT_CRF}")
+
+
+def probe(frame, width=PROBE_WIDTH):
+    """Downscaled grayscale copy of a frame for cheap comparisons"""
+    # MoviePy composites are int64 where only the ColorClip background shows; cv2 needs uint8
+    frame = np.asarray(frame).astype(np.uint8, copy=False)
+    height = max(1, int(frame.shape[0] * width / frame.shape[1]))
+    small = cv2.resize(frame[:, :, :3], (width, height), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_RGB2GRAY).astype(np.float32)
+
+
+def analyze_motion(get_frame, duration, fps, samples=ANALYSIS_SAMPLES):
+    """Measure frame-to-frame change at evenly spaced points of the timeline"""
+    frame_step = 1.0 / fps
+    last_t = max(0.0, duration - 2 * frame_step)
+    times = np.linspace(0, last_t, samples) if samples > 1 else [0.0]
+
+    diffs = []
+    for t in times:
+        current = probe(get_frame(t))
+        following = probe(get_frame(t + frame_step))
+        diffs.append(float(np.mean(np.abs(following - current))))
+
+    diffs = np.array(diffs)
+    return {
+        "motion": float(diffs.mean()),
+        "peak_motion": float(diffs.max()),
+        "static_ratio": float(np.mean(diffs < STATIC_THRESHOLD)),
+        "samples": len(diffs),
+    }
+
+
+def choose_profile(stats, fps, threads=None):
+    """Map motion statistics to a content class and its x264 settings"""
+    motion = stats["motion"]
+    # Mostly-static timelines with a few busy moments still benefit from stillimage tuning
+    if stats.get("static_ratio", 0) >= 0.75:
+        motion = min(motion, STATIC_THRESHOLD / 2)
+
+    for content, max_motion, preset, tune, crf, keyint_seconds in CONTENT_CLASSES:
+        if motion < max_motion:
+            return EncoderProfile(content, preset, tune, crf, int(keyint_seconds * fps),
+                                  threads=threads, stats=stats)
+
+
+def select_encoder_profile(get_frame, duration, fps, samples=ANALYSIS_SAMPLES, preset=None, threads=None):
+    """Analyze a timeline and return the encoder profile for it"""
+    try:
+        stats = analyze_motion(get_frame, duration, fps, samples)
+        profile = choose_profile(stats, fps, threads)
+    except Exception as e:
+        print(f"⚠️  Motion analysis failed ({type(e).__name__}: {e}); "
+              f"falling back to preset medium, crf {DEFAULT_CRF}")
+        profile = EncoderProfile("unknown", "medium", None, DEFAULT_CRF, int(2 * fps), threads=threads)
+
+    if preset:
+        # Explicit preset (e.g. preview renders) wins over the content class
+        profile.preset = preset
+
+    print(f"🎛️  Encoder profile: {profile.describe()}")
+    return profile
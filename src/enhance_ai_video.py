@@ -20,6 +20,20 @@ import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 from moviepy.editor import *
 import cv2
+from render_planner import plan_render, print_plan
+from preview_mode import FINAL_PROFILE, preview_profile, publish_profile, cached_proxy, PREVIEW_SCALE, PREVIEW_FPS
+from encoding_profiles import select_encoder_profile
+from pipelined_writer import render_video, DEFAULT_WORKERS
+from resource_governor import govern, add_governor_arguments
+from ffmpeg_video_source import FFmpegVideoSource
+from culled_composite import CulledCompositeVideoClip
+from sprite_atlas import SpriteAtlas
+from frame_dedup import mark_still
+from background_library import background_clip
+from multi_rendition import publish, RENDITIONS
+from streaming_output import stream_render, STREAM_FORMATS
+from render_timeline import build_timeline
+from filtergraph_backend import render_filtergraph, BACKENDS
 
 # === Configuration ===
 AI_LIPSYNC_VIDEO = "output/shrikanth_lip_sync_base.mp4"  # From D-ID/HeyGen
@@ -29,6 +43,15 @@ TEXT_PATH = r"C:\Users\hp\Video_Generation_Project\Video_Generation_Project\asse
 OUTPUT_PATH = r"C:\Users\hp\Video_Generation_Project\Video_Generation_Project\output\shrikanth_professional_intro.mp4"
 VIDEO_SIZE = (1280, 720)  # HD resolution
 FONT_SIZE = 48
+PROFILE = FINAL_PROFILE  # Switched to a preview profile by --preview
+WORKERS = DEFAULT_WORKERS  # Render threads of the pipelined writer (--workers)
+SPRITES = SpriteAtlas()  # Trimmed text sprites of the current job, packed into one array
+VFR = False  # Drop repeated frames and keep their timestamps (--vfr)
+PIX_FMT = "rgb24"  # Frame format sent to ffmpeg (--yuv420p)
+PUBLISH_DIR = None  # Write the rendition ladder, HLS, poster and GIF here instead (--publish)
+STREAM_DIR = None  # Stream HLS/fMP4 here while rendering instead (--stream)
+STREAM_FORMAT = "hls"
+BACKEND = "moviepy"  # Compositor (--backend)
 
 def load_intro_text(file_path):
     """Load and parse intro text"""
@@ -39,11 +62,11 @@ def load_intro_text(file_path):
 
 def create_text_image_pil(text, fontsize=FONT_SIZE, color='white'):
     """Create text image using PIL"""
-    img = Image.new("RGBA", (600, 80), (0, 0, 0, 0))
+    img = Image.new("RGBA", PROFILE.size((600, 80)), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
     
     try:
-        font = ImageFont.truetype("arial.ttf", fontsize)
+        font = ImageFont.truetype("arial.ttf", PROFILE.fontsize(fontsize))
     except:
         font = ImageFont.load_default()
     
@@ -58,40 +81,20 @@ def create_text_image_pil(text, fontsize=FONT_SIZE, color='white'):
     return img
 
 def create_professional_background(duration):
-    """Create professional animated background"""
-    def make_frame(t):
-        # Create professional gradient background
-        frame = np.zeros((VIDEO_SIZE[1], VIDEO_SIZE[0], 3), dtype=np.uint8)
-        
-        # Professional color scheme
-        progress = t / duration
-        
-        # Dark blue to lighter blue gradient
-        for y in range(VIDEO_SIZE[1]):
-            intensity = int(20 + (1 - y / VIDEO_SIZE[1]) * 60)
-            frame[y, :] = [intensity//4, intensity//3, intensity]
-        
-        # Add subtle animation
-        wave_offset = int(10 * np.sin(t * 0.5))
-        frame = np.roll(frame, wave_offset, axis=1)
-        
-        return frame
-    
-    return VideoClip(make_frame, duration=duration)
+    """Professional animated background, shared through the background library"""
+    return background_clip("professional_wave", PROFILE.size(VIDEO_SIZE), duration)
 
 def add_title_overlay(text, duration, start_time):
     """Add professional title overlay"""
     title_img = create_text_image_pil(text, fontsize=64, color='#FFD700')
-    title_array = np.array(title_img)
     
-    title_clip = ImageClip(title_array, transparent=True)
+    title_clip = SPRITES.clip(title_img, ('center', PROFILE.px(50)), PROFILE.size(VIDEO_SIZE))
     title_clip = title_clip.set_start(start_time).set_duration(duration)
-    title_clip = title_clip.set_position(('center', 50))
     
     # Add professional effects
     title_clip = title_clip.fadein(1.5).fadeout(0.8)
     
-    return title_clip
+    return mark_still(title_clip, fade_in=1.5, fade_out=0.8)
 
 def add_text_overlays(sentences, duration, start_time):
     """Add animated text overlays"""
@@ -103,15 +106,13 @@ def add_text_overlays(sentences, duration, start_time):
         sentence_duration = time_per_sentence - 0.5
         
         text_img = create_text_image_pil(sentence, fontsize=42, color='white')
-        text_array = np.array(text_img)
         
-        text_clip = ImageClip(text_array, transparent=True)
+        text_clip = SPRITES.clip(text_img, ('center', PROFILE.px(150 + i * 60)), PROFILE.size(VIDEO_SIZE))
         text_clip = text_clip.set_start(sentence_start).set_duration(sentence_duration)
-        text_clip = text_clip.set_position(('center', 150 + i * 60))
         
         # Professional fade effects
         text_clip = text_clip.fadein(0.8).fadeout(0.8)
-        text_clips.append(text_clip)
+        text_clips.append(mark_still(text_clip, fade_in=0.8, fade_out=0.8))
     
     return text_clips
 
@@ -124,36 +125,43 @@ def add_skill_highlights(duration, start_time):
         skill_start = start_time + 8 + i * 1.2
         skill_duration = 1.0
         
-        # Create bouncing effect
-        def bounce_pos(t):
+        # Create bouncing effect (bind this skill's row, not the loop variable)
+        def bounce_pos(t, row_y=400 + i * 50):
             bounce_cycle = 1.5
             phase = (t % bounce_cycle) / bounce_cycle * 2 * np.pi
             bounce_offset = 15 * np.sin(phase)
-            return ('center', 400 + i * 50 + bounce_offset)
+            return ('center', PROFILE.px(row_y + bounce_offset))
         
         skill_img = create_text_image_pil(f"• {skill}", fontsize=36, color='#00FF99')
-        skill_array = np.array(skill_img)
         
-        skill_clip = ImageClip(skill_array, transparent=True)
+        skill_clip = SPRITES.clip(skill_img, bounce_pos, PROFILE.size(VIDEO_SIZE))
         skill_clip = skill_clip.set_start(skill_start).set_duration(skill_duration)
-        skill_clip = skill_clip.set_position(bounce_pos)
-        skill_clips.append(skill_clip)
+        skill_clips.append(mark_still(skill_clip))
     
     return skill_clips
 
 def add_closing_message(duration):
     """Add professional closing message"""
     closing_img = create_text_image_pil("Thank you for watching!", fontsize=56, color='#FFD700')
-    closing_array = np.array(closing_img)
     
-    closing_clip = ImageClip(closing_array, transparent=True)
+    closing_clip = SPRITES.clip(closing_img, ('center', PROFILE.px(600)), PROFILE.size(VIDEO_SIZE))
     closing_clip = closing_clip.set_start(duration - 3).set_duration(3)
-    closing_clip = closing_clip.set_position(('center', 600))
     
     # Professional entrance effect
     closing_clip = closing_clip.fadein(1.0).fadeout(1.0)
     
-    return closing_clip
+    return mark_still(closing_clip, fade_in=1.0, fade_out=1.0)
+
+def render_with_filtergraph(lipsync_path, duration, sentences, output_path):
+    """Render the same layout as one ffmpeg filtergraph, with no Python per frame"""
+    timeline = build_timeline("enhanced", duration, sentences, lipsync_path=lipsync_path, trim_text=False)
+    # Sprites come from the same PIL code as the MoviePy path
+    sprites = {layer.name: create_text_image_pil(layer.text, fontsize=layer.fontsize, color=layer.color)
+               for layer in timeline.layers if layer.kind == "sprite"}
+    # The source video carries the voice (a preview proxy may not)
+    render_filtergraph(timeline, output_path, PROFILE.size(VIDEO_SIZE), fps=PROFILE.fps, scale=PROFILE.scale,
+                       sprites=sprites, audio_path=AI_LIPSYNC_VIDEO,
+                       preset=PROFILE.preset if PROFILE.is_preview else None)
 
 def enhance_ai_video():
     """Main function to enhance AI-generated lip-sync video"""
@@ -168,13 +176,25 @@ def enhance_ai_video():
     
     # Load AI lip-sync video
     print("📹 Loading AI lip-sync video...")
-    lipsync_clip = VideoFileClip(AI_LIPSYNC_VIDEO)
+    frame_size = PROFILE.size(VIDEO_SIZE)
+    if PROFILE.is_preview:
+        # Low-resolution proxy, transcoded once and reused by later previews
+        lipsync_path = cached_proxy(AI_LIPSYNC_VIDEO, frame_size, PROFILE.fps)
+    else:
+        lipsync_path = AI_LIPSYNC_VIDEO
+    # ffmpeg scales to the frame size and converts to RGB while decoding
+    lipsync_source = FFmpegVideoSource(lipsync_path, size=frame_size, fps=PROFILE.fps)
+    lipsync_clip = lipsync_source.as_clip()
     duration = lipsync_clip.duration
     
     print(f"⏱️  Video duration: {duration:.2f} seconds")
     
-    # Resize to standard format
-    lipsync_clip = lipsync_clip.resize(VIDEO_SIZE)
+    if BACKEND == "ffmpeg":
+        output_path = PROFILE.output_path(OUTPUT_PATH)
+        render_with_filtergraph(lipsync_path, duration, load_intro_text(TEXT_PATH), output_path)
+        print(f"✅ Enhanced video created successfully!")
+        print(f"📁 Output: {output_path}")
+        return True
     
     # Create professional background
     print("🎨 Creating professional background...")
@@ -199,35 +219,101 @@ def enhance_ai_video():
     # Closing message
     closing = add_closing_message(duration)
     
+    # Pack every text sprite into one atlas array before rendering
+    SPRITES.report()
+    
     # Combine all elements
     print("🎭 Compositing final video...")
     all_clips = [background, lipsync_clip, title] + text_clips + skill_clips + [closing]
     
-    final_clip = CompositeVideoClip(all_clips, size=VIDEO_SIZE)
-    final_clip = final_clip.set_fps(24)
+    # The lip-sync video fills the frame, so the background under it is never rendered
+    final_clip = CulledCompositeVideoClip(all_clips, size=frame_size)
+    final_clip = final_clip.set_fps(PROFILE.fps)
     
     # Ensure output folder exists
-    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+    output_path = PROFILE.output_path(OUTPUT_PATH)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    
+    # Pick x264 settings from the timeline's motion; previews keep their fast preset
+    encoder = select_encoder_profile(final_clip.get_frame, final_clip.duration, PROFILE.fps,
+                                     preset=PROFILE.preset if PROFILE.is_preview else None)
     
     # Export enhanced video
-    print("🎥 Rendering enhanced video...")
-    final_clip.write_videofile(
-        OUTPUT_PATH,
-        fps=24,
-        codec='libx264',
-        audio_codec='aac',
-        temp_audiofile='temp-audio.m4a',
-        remove_temp=True
-    )
+    if PUBLISH_DIR:
+        name = os.path.splitext(os.path.basename(output_path))[0]
+        publish(final_clip, PUBLISH_DIR, name, PROFILE.fps, encoder, workers=max(1, WORKERS))
+    elif STREAM_DIR:
+        name = os.path.splitext(os.path.basename(output_path))[0]
+        stream_render(final_clip, STREAM_DIR, name, PROFILE.fps, encoder, workers=max(1, WORKERS),
+                      fmt=STREAM_FORMAT)
+    else:
+        print(f"🎥 Rendering enhanced {PROFILE.name} video...")
+        render_video(final_clip, output_path, PROFILE.fps, encoder, workers=WORKERS, vfr=VFR,
+                     pix_fmt=PIX_FMT)
+    final_clip.report_culling()
     
     print(f"✅ Enhanced video created successfully!")
-    print(f"📁 Output: {OUTPUT_PATH}")
+    print(f"📁 Output: {output_path}")
     print(f"🎯 Features: Lip-sync + Professional effects + Animated text")
     
     return True
 
-def main():
+def main(argv=None):
     """Main function"""
+    global PROFILE, WORKERS, SPRITES, VFR, PIX_FMT, PUBLISH_DIR, STREAM_DIR, STREAM_FORMAT, BACKEND
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Enhance an AI-generated lip-sync video')
+    parser.add_argument('--plan', action='store_true', help='Estimate render cost from metadata and exit')
+    parser.add_argument('--preview', action='store_true', help='Fast low-resolution render of the same layout')
+    parser.add_argument('--preview-scale', type=float, default=PREVIEW_SCALE, help='Preview resolution scale')
+    parser.add_argument('--preview-fps', type=int, default=PREVIEW_FPS, help='Preview frame rate')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Render threads feeding the encoder (0 = MoviePy write_videofile)')
+    parser.add_argument('--vfr', action='store_true',
+                        help='Drop repeated frames instead of encoding them (variable frame rate)')
+    parser.add_argument('--yuv420p', action='store_true',
+                        help='Convert frames to yuv420p in the render threads instead of in ffmpeg')
+    parser.add_argument('--stream', metavar='DIR',
+                        help='Write HLS segments (or a fragmented MP4) to DIR, playable while rendering')
+    parser.add_argument('--stream-format', choices=STREAM_FORMATS, default='hls', help='Streaming output format')
+    parser.add_argument('--publish', metavar='DIR',
+                        help='Render once at 1080p and write the 1080p/720p/480p ladder, HLS, poster and GIF to DIR')
+    parser.add_argument('--backend', choices=BACKENDS, default='moviepy',
+                        help='Compositor: MoviePy in Python, or one ffmpeg filtergraph (plain output only)')
+    add_governor_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    if args.plan:
+        print_plan(plan_render("enhanced", lipsync_path=AI_LIPSYNC_VIDEO, text_path=TEXT_PATH))
+        return
+    
+    if args.preview:
+        PROFILE = preview_profile(args.preview_scale, args.preview_fps)
+    elif args.publish:
+        # Lay the timeline out at the top rendition; ffmpeg scales down the rest
+        PROFILE = publish_profile(RENDITIONS[0][1], VIDEO_SIZE[1])
+    else:
+        PROFILE = FINAL_PROFILE
+    PUBLISH_DIR = args.publish
+    STREAM_DIR, STREAM_FORMAT = args.stream, args.stream_format
+    WORKERS = args.workers
+    budget = govern(args.cores, args.pin, workers=WORKERS)
+    if budget is not None:
+        WORKERS = budget.workers
+    VFR = args.vfr
+    if args.backend == 'ffmpeg' and (args.publish or args.stream):
+        print("⚠️  The ffmpeg backend writes a single MP4; --publish/--stream render with MoviePy")
+        args.backend = 'moviepy'
+    ignored = [flag for flag, value in (('--vfr', args.vfr), ('--yuv420p', args.yuv420p)) if value]
+    if args.backend == 'ffmpeg' and ignored:
+        print(f"⚠️  The ffmpeg backend encodes every frame and converts to yuv420p itself; ignoring {'/'.join(ignored)}")
+    if (args.publish or args.stream) and ignored:
+        print(f"⚠️  --publish/--stream encode every RGB frame; ignoring {'/'.join(ignored)}")
+    BACKEND = args.backend
+    PIX_FMT = 'yuv420p' if args.yuv420p else 'rgb24'
+    SPRITES = SpriteAtlas()
+    
     print("🤖 AI Video Enhancement Tool")
     print("=" * 40)
     print("This tool enhances AI-generated lip-sync videos with professional effects")
@@ -0,0 +1,26 @@
+"""
+FFmpeg Helpers
+==============
+
+Shared helpers for scripts that drive ffmpeg directly instead of through
+MoviePy's write_videofile. The binary is the one MoviePy is configured with
+(imageio-ffmpeg or the FFMPEG_BINARY setting), so every script uses the same
+ffmpeg build.
+"""
+
+import subprocess
+
+
+def ffmpeg_binary():
+    """Path of the ffmpeg executable MoviePy uses"""
+    try:
+        from moviepy.config import get_setting
+        return get_setting("FFMPEG_BINARY")
+    except Exception:
+        return "ffmpeg"
+
+
+def run_ffmpeg(args):
+    """Run ffmpeg with the given arguments, raising CalledProcessError on failure"""
+    cmd = [ffmpeg_binary(), "-y", "-hide_banner", "-loglevel", "error"] + list(args)
+    return subprocess.run(cmd, check=True, capture_output=True)
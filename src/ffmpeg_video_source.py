@@ -0,0 +1,236 @@
+"""
+FFmpeg Video Source
+===================
+
+Video input for the compositor that does the heavy lifting inside ffmpeg:
+- Scaling, frame-rate conversion and RGB conversion happen during decode
+  (no per-frame PIL resize in Python)
+- A background thread reads frames ahead into a pool of reused buffers
+- Random access is frame-accurate: a keyframe index (keyframes only, so it is
+  cheap to build) picks where to restart decoding, then frames are skipped
+  up to the requested one
+- Optional looping for backgrounds shorter than the timeline
+
+Frames returned by get_frame stay valid until the next get_frame call; the
+compositor copies them into the output frame straight away.
+
+Usage:
+    source = FFmpegVideoSource("output/shrikanth_lip_sync_base.mp4", size=(1280, 720), fps=24)
+    lipsync_clip = source.as_clip()
+"""
+
+import re
+import queue
+import threading
+import subprocess
+
+import numpy as np
+
+from ffmpeg_tools import ffmpeg_binary
+from render_trace import get_tracer
+from frame_dedup import set_frame_key
+from resource_governor import decoder_thread_args
+
+# === Configuration ===
+PREFETCH_FRAMES = 8
+MAX_FORWARD_SKIP = 48  # Frames read and dropped before a seek restarts the decoder instead
+SCALE_FLAGS = "bilinear"  # Same filter as MoviePy's cv2 resize, ~40% cheaper than bicubic
+PTS_TIME_PATTERN = re.compile(r"pts_time:\s*([0-9.]+)")
+
+
+def probe_video(path):
+    """Duration, size, fps and audio presence from the container header"""
+    from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+    infos = ffmpeg_parse_infos(path)
+    return {
+        "duration": infos["duration"],
+        "size": tuple(infos["video_size"]),
+        "fps": infos["video_fps"],
+        "audio": infos.get("audio_found", False),
+    }
+
+
+def keyframe_times(path):
+    """Timestamps of all keyframes, decoding only the keyframes"""
+    cmd = [ffmpeg_binary(), "-hide_banner", "-nostats", "-skip_frame", "nokey", "-i", path,
+           "-an", "-sn", "-vf", "showinfo", "-f", "null", "-"]
+    result = subprocess.run(cmd, capture_output=True, check=True)
+    times = [float(match) for match in PTS_TIME_PATTERN.findall(result.stderr.decode(errors="replace"))]
+    return sorted(set(times)) or [0.0]
+
+
+class DecoderThread:
+    """One ffmpeg decode process plus the thread reading its frames ahead"""
+
+    def __init__(self, source, start_frame, seek_time):
+        self.source = source
+        self.next_frame = start_frame
+        self.ready = queue.Queue()
+        self.stop_event = threading.Event()
+        self.finished = False
+
+        width, height = source.size
+        cmd = [ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-nostdin", *decoder_thread_args()]
+        if seek_time > 0:
+            cmd += ["-ss", f"{seek_time:.6f}"]
+        cmd += [
+            "-i", source.path, "-an", "-sn",
+            # format=rgb24 lets one swscale pass do both the resize and the colour conversion
+            "-vf", f"fps={source.fps},scale={width}:{height}:flags={SCALE_FLAGS},format=rgb24",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-",
+        ]
+        self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        bufsize=source.frame_bytes)
+        self.thread = threading.Thread(target=self.read_loop, daemon=True, name="video-prefetch")
+        self.thread.start()
+
+    def read_loop(self):
+        stdout = self.process.stdout
+        index = self.next_frame
+        while not self.stop_event.is_set():
+            buffer = self.source.take_buffer(self.stop_event)
+            if buffer is None:
+                break
+            view = memoryview(buffer).cast("B")
+            filled = 0
+            while filled < len(view):
+                count = stdout.readinto(view[filled:])
+                if not count:
+                    break
+                filled += count
+            if filled < len(view):
+                self.source.return_buffer(buffer)
+                break
+            self.ready.put((index, buffer))
+            index += 1
+        self.ready.put((None, None))
+
+    def read(self):
+        """Next decoded (frame index, buffer), or (None, None) at end of stream"""
+        if self.finished:
+            return None, None
+        index, buffer = self.ready.get()
+        self.finished = index is None
+        return index, buffer
+
+    def stop(self):
+        self.stop_event.set()
+        self.process.kill()
+        self.thread.join()
+        self.process.stdout.close()
+        self.process.wait()
+        # Hand frames that were read ahead back to the pool
+        while True:
+            try:
+                _, buffer = self.ready.get_nowait()
+            except queue.Empty:
+                break
+            if buffer is not None:
+                self.source.return_buffer(buffer)
+
+
+class FFmpegVideoSource:
+    """Scaled, prefetched, randomly accessible RGB frames of a video file"""
+
+    def __init__(self, path, size=None, fps=None, loop=False, prefetch=PREFETCH_FRAMES):
+        self.path = path
+        self.info = probe_video(path)
+        self.size = tuple(int(v) for v in (size or self.info["size"]))
+        self.fps = fps or self.info["fps"]
+        self.duration = self.info["duration"]
+        self.loop = loop
+        self.frame_count = max(1, int(self.duration * self.fps))
+        self.frame_bytes = self.size[0] * self.size[1] * 3
+
+        # prefetch frames in flight plus the one handed out to the caller
+        self.free = queue.Queue()
+        for _ in range(prefetch + 1):
+            self.free.put(np.empty((self.size[1], self.size[0], 3), dtype=np.uint8))
+
+        self.lock = threading.Lock()
+        self.keyframes = None
+        self.decoder = None
+        self.current_index = None
+        self.current = None
+        self.seeks = 0
+
+    def take_buffer(self, stop_event):
+        while not stop_event.is_set():
+            try:
+                return self.free.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def return_buffer(self, buffer):
+        self.free.put(buffer)
+
+    def keyframe_before(self, index):
+        """Latest keyframe at or before a frame, as (frame index, timestamp)"""
+        if self.keyframes is None:
+            self.keyframes = keyframe_times(self.path)
+        t = index / self.fps
+        keyframe = max((k for k in self.keyframes if k <= t + 1e-6), default=0.0)
+        return int(round(keyframe * self.fps)), keyframe
+
+    def restart(self, index):
+        """Restart decoding at the keyframe preceding a frame"""
+        if self.decoder is not None:
+            self.decoder.stop()
+        start_frame, seek_time = self.keyframe_before(index) if index > 0 else (0, 0.0)
+        self.decoder = DecoderThread(self, start_frame, seek_time)
+        self.seeks += 1
+
+    def frame_index(self, t):
+        index = int(self.fps * t + 0.00001)
+        if self.loop:
+            return index % self.frame_count
+        return min(index, self.frame_count - 1)
+
+    def get_frame(self, t):
+        """RGB frame at time t (valid until the next call)"""
+        index = self.frame_index(t)
+        with self.lock:
+            if index == self.current_index:
+                return self.current
+
+            sequential = (self.decoder is not None and self.current_index is not None and
+                          self.current_index < index <= self.current_index + MAX_FORWARD_SKIP)
+            get_tracer().cache("video_source.sequential", sequential)
+            if not sequential:
+                self.restart(index)
+
+            while True:
+                frame_index, buffer = self.decoder.read()
+                if frame_index is None:
+                    # Stream ended early (duration rounding): keep the last frame
+                    if self.current is None:
+                        raise IOError(f"Could not decode frame {index} of {self.path}")
+                    self.current_index = index
+                    return self.current
+                if self.current is not None:
+                    self.return_buffer(self.current)
+                self.current_index, self.current = frame_index, buffer
+                if frame_index >= index:
+                    return buffer
+
+    def as_clip(self, with_audio=True):
+        """MoviePy clip backed by this source"""
+        from moviepy.editor import VideoClip, AudioFileClip
+
+        clip = VideoClip(self.get_frame, duration=self.duration)
+        clip.fps = self.fps
+        # A decoded frame only changes with the frame index (frame_dedup)
+        set_frame_key(clip, self.frame_index)
+        # Decoding is stateful: pipelined_writer renders clips with a reader one at a time
+        clip.reader = self
+        if with_audio and self.info["audio"]:
+            clip = clip.set_audio(AudioFileClip(self.path))
+        return clip
+
+    def close(self):
+        with self.lock:
+            if self.decoder is not None:
+                self.decoder.stop()
+                self.decoder = None
@@ -0,0 +1,278 @@
+"""
+FFmpeg Filtergraph Backend
+==========================
+
+Alternate render backend that compiles a template timeline (render_timeline.py)
+into a single ffmpeg filter_complex graph, so no Python runs per frame:
+- Background: the style's shared library clip (background_library.py),
+  stretched over the intro with setpts and held with tpad
+- Photo: scaled once, Ken Burns zoom with zoompan (centre or top-left anchor)
+- Video: scaled and resampled to the frame rate while decoding
+- Text sprites: rendered once by the script's own PIL code, trimmed to their
+  ink (sprite_atlas.py) and written as PNGs; each is looped in the graph,
+  faded with fade (colour to black, like MoviePy's fadein/fadeout on a
+  masked clip) and placed by overlay with expression-driven positions for
+  the bouncing skills
+- Layers under a full-frame opaque layer that stays for the whole intro are
+  left out of the graph
+- Audio: the cached AAC track (audio_track_cache.py), stream-copied
+
+Usage:
+    python src/create_dynamic_video.py --backend ffmpeg
+    render_filtergraph(timeline, "output/intro.mp4", frame_size, sprites=sprites, audio_path=VOICE_PATH)
+"""
+
+import os
+import time
+import shutil
+import tempfile
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from ffmpeg_tools import run_ffmpeg
+from sprite_atlas import trim_sprite, offset_position
+from culled_composite import resolve_position
+from text_layout import load_font, layout_text, draw_lines
+from background_library import BackgroundLibrary, get_style, BACKGROUND_DIR
+from audio_track_cache import encode_audio_file
+from encoding_profiles import EncoderProfile, CONTENT_CLASSES
+from resource_governor import ffmpeg_global_args
+
+# === Configuration ===
+BACKENDS = ("moviepy", "ffmpeg")
+TIMELINE_CONTENT = "low_motion"  # x264 class for text over a slow background (no frames to sample)
+SCALE_FLAGS = "bilinear"  # Same filter as MoviePy's cv2 resize
+FONT_PATH = "arial.ttf"
+
+
+def timeline_encoder(fps, preset=None, content=TIMELINE_CONTENT):
+    """x264 profile of a content class, chosen without rendering frames to sample"""
+    for name, _, class_preset, tune, crf, keyint_seconds in CONTENT_CLASSES:
+        if name == content:
+            return EncoderProfile(name, preset or class_preset, tune, crf, int(keyint_seconds * fps))
+    raise ValueError(f"Unknown content class: {content}")
+
+
+def px(value, scale):
+    """Same rounding as RenderProfile.px"""
+    if scale == 1.0:
+        return value
+    return int(round(value * scale))
+
+
+def scaled_position(position, scale):
+    """Scale the numeric parts of a MoviePy-style position"""
+    return tuple(value if isinstance(value, str) else px(value, scale) for value in position)
+
+
+def covers_timeline(layer, timeline):
+    """Opaque, full-frame and visible for the whole intro: nothing under it is ever seen"""
+    return layer.covers_frame(timeline.size) and layer.start <= 0 and layer.end >= timeline.duration
+
+
+def default_sprite(layer, scale):
+    """Text sprite for layers the script did not render itself: centred text on the canvas"""
+    width, height = px(layer.size[0], scale), px(layer.size[1], scale)
+    image = Image.new("RGBA", (max(1, width), max(1, height)), (0, 0, 0, 0))
+    font = load_font(FONT_PATH, max(6, px(layer.fontsize or 40, scale)))
+    lines = layout_text(layer.text or "", font, max_width=max(1, width - 40), box=image.size)
+    draw_lines(ImageDraw.Draw(image), lines, font, fill=layer.color or "white")
+    return image
+
+
+class FilterGraph:
+    """Inputs and filter chains of one ffmpeg command"""
+
+    def __init__(self):
+        self.inputs = []
+        self.chains = []
+
+    def add_input(self, args):
+        """Register an input; returns its index"""
+        self.inputs.append(list(args))
+        return len(self.inputs) - 1
+
+    def add_chain(self, chain):
+        self.chains.append(chain)
+
+    def args(self):
+        args = []
+        for input_args in self.inputs:
+            args += input_args
+        return args + ["-filter_complex", ";\n".join(self.chains)]
+
+
+class TimelineCompiler:
+    """Turns the layers of a timeline into filter chains, bottom to top"""
+
+    def __init__(self, timeline, frame_size, fps, scale=1.0, sprites=None, work_dir=None,
+                 background_dir=BACKGROUND_DIR):
+        self.timeline = timeline
+        self.frame_size = tuple(frame_size)
+        self.fps = fps
+        self.scale = scale
+        self.sprites = sprites or {}
+        self.work_dir = work_dir
+        self.library = BackgroundLibrary(background_dir)
+        self.graph = FilterGraph()
+        self.duration = timeline.duration
+
+    def visible_layers(self):
+        """Layers from the topmost one that hides everything below it for the whole intro"""
+        # Layers squeezed to nothing by a short voice never show in MoviePy either
+        layers = [layer for layer in self.timeline.layers if layer.duration > 0]
+        for position in range(len(layers) - 1, -1, -1):
+            if covers_timeline(layers[position], self.timeline):
+                return layers[position:]
+        return layers
+
+    def timed(self, layer):
+        """Filters that place a layer's frames on the intro's clock (setpts drops the frame rate,
+        so chains that can be the base layer set fps after it: overlay runs at the base's rate)"""
+        return f"setpts=PTS-STARTPTS+{layer.start:.6f}/TB"
+
+    def background(self, index, layer):
+        width, height = self.frame_size
+        style = get_style(layer.source)
+        path = self.library.video_entry(layer.source, self.frame_size)
+        source = self.graph.add_input(["-i", path])
+        # Frame N of the library clip shows from pts_expr(N) on; tpad holds the last
+        # frame, and fps with round=up repeats each frame from its start time
+        self.graph.add_chain(
+            f"[{source}:v]setpts='({style.pts_expr(layer.duration)}+{layer.start:.6f})/TB',"
+            f"tpad=stop_mode=clone:stop_duration={layer.duration:.6f},"
+            f"fps={self.fps}:round=up,trim=duration={layer.duration:.6f},"
+            f"scale={width}:{height}[l{index}]")
+        return (0, 0)
+
+    def photo(self, index, layer):
+        height = px(layer.size[1], self.scale)
+        width = int(layer.size[0] * height / layer.size[1])
+        source = self.graph.add_input(["-i", layer.source])
+        chain = f"[{source}:v]scale={width}:{height}:flags={SCALE_FLAGS}"
+        if layer.motion is not None and layer.motion[0] == "zoom":
+            _, start_zoom, end_zoom = layer.motion
+            frames = int(layer.duration * self.fps) + 1
+            # zoompan crops iw/zoom x ih/zoom and scales it back up: the same as
+            # resizing by the zoom and cropping back to the photo size
+            zoom = f"{start_zoom}+{end_zoom - start_zoom}*on/{self.fps}/{layer.duration:.6f}"
+            if layer.anchor == "top_left":
+                x, y = "0", "0"
+            else:
+                x, y = "iw/2-iw/zoom/2", "ih/2-ih/zoom/2"
+            chain += (f",zoompan=z='{zoom}':x='{x}':y='{y}':d={frames}:"
+                      f"s={width}x{height}:fps={self.fps}")
+        else:
+            chain += f",loop=loop={int(layer.duration * self.fps)}:size=1:start=0,setpts=N/({self.fps}*TB)"
+        self.graph.add_chain(f"{chain},trim=duration={layer.duration:.6f},{self.timed(layer)},"
+                             f"fps={self.fps}[l{index}]")
+        return resolve_position(scaled_position(layer.position, self.scale), (width, height), self.frame_size)
+
+    def video(self, index, layer):
+        width, height = px(layer.size[0], self.scale), px(layer.size[1], self.scale)
+        if (width, height) == (px(self.timeline.size[0], self.scale), px(self.timeline.size[1], self.scale)):
+            width, height = self.frame_size
+        source = self.graph.add_input(["-i", layer.source])
+        self.graph.add_chain(
+            f"[{source}:v]{self.timed(layer)},scale={width}:{height}:flags={SCALE_FLAGS},"
+            f"fps={self.fps},trim=duration={layer.duration:.6f}[l{index}]")
+        return resolve_position(scaled_position(layer.position, self.scale), (width, height), self.frame_size)
+
+    def sprite(self, index, layer):
+        image = self.sprites.get(layer.name)
+        if image is None:
+            if not layer.text:
+                raise ValueError(f"No sprite image for layer {layer.name}")
+            image = default_sprite(layer, self.scale)
+        rgba = np.asarray(image.convert("RGBA"))
+        trimmed, offset = trim_sprite(rgba)
+        canvas_size = (rgba.shape[1], rgba.shape[0])
+        path = os.path.join(self.work_dir, f"{index:02d}_{layer.name}.png")
+        Image.fromarray(np.ascontiguousarray(trimmed)).save(path)
+
+        source = self.graph.add_input(["-i", path])
+        frames = int(layer.duration * self.fps) + 1
+        # The PNG is decoded once; loop repeats the frame inside the graph
+        chain = (f"[{source}:v]format=rgba,loop=loop={frames - 1}:size=1:start=0,"
+                 f"setpts=N/({self.fps}*TB)+{layer.start:.6f}/TB")
+        if layer.fade_in:
+            chain += f",fade=t=in:st={layer.start:.6f}:d={layer.fade_in}"
+        if layer.fade_out:
+            chain += f",fade=t=out:st={layer.end - layer.fade_out:.6f}:d={layer.fade_out}"
+        self.graph.add_chain(f"{chain}[l{index}]")
+
+        position = scaled_position(layer.position, self.scale)
+        if layer.motion is not None and layer.motion[0] == "bounce":
+            _, amplitude, cycle = layer.motion
+            x, _ = offset_position((position[0], 0), canvas_size, offset, self.frame_size)
+            # y = px(row_y + amplitude * sin(phase)) with the clip's own time, plus the trim offset;
+            # unscaled positions stay floats that MoviePy's blit truncates
+            rounding = "trunc" if self.scale == 1.0 else "round"
+            y = (f"{rounding}(({layer.position[1]}+{amplitude}*sin(mod(t-{layer.start:.6f},{cycle})/{cycle}*2*PI))"
+                 f"*{self.scale})+{offset[1]}")
+            return (x, y)
+        return offset_position(position, canvas_size, offset, self.frame_size)
+
+    def compile(self):
+        """Build the graph; returns (graph, output label)"""
+        layers = self.visible_layers()
+        width, height = self.frame_size
+        builders = {"background": self.background, "photo": self.photo,
+                    "video": self.video, "sprite": self.sprite}
+
+        placed = []
+        for index, layer in enumerate(layers):
+            if layer.kind not in builders:
+                raise ValueError(f"Layer {layer.name}: unsupported kind {layer.kind}")
+            placed.append((index, layer, builders[layer.kind](index, layer)))
+
+        first_index, first_layer, _ = placed[0]
+        if covers_timeline(first_layer, self.timeline):
+            current = f"l{first_index}"
+            placed = placed[1:]
+        else:
+            self.graph.add_chain(f"color=c=black:s={width}x{height}:r={self.fps}:"
+                                 f"d={self.duration:.6f}[base]")
+            current = "base"
+
+        for index, layer, (x, y) in placed:
+            enable = f"gte(t,{layer.start:.6f})*lt(t,{layer.end:.6f})"
+            self.graph.add_chain(f"[{current}][l{index}]overlay=x='{x}':y='{y}':eof_action=pass:"
+                                 f"enable='{enable}'[o{index}]")
+            current = f"o{index}"
+
+        self.graph.add_chain(f"[{current}]format=yuv420p[vout]")
+        return self.graph, "vout"
+
+
+def render_filtergraph(timeline, output_path, frame_size=None, fps=None, scale=1.0, sprites=None,
+                       audio_path=None, encoder=None, preset=None, background_dir=BACKGROUND_DIR):
+    """Render a timeline with one ffmpeg process; sprites maps layer names to PIL canvases"""
+    frame_size = frame_size or timeline.size
+    fps = fps or timeline.fps
+    encoder = encoder or timeline_encoder(fps, preset)
+    if output_path and os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    work_dir = tempfile.mkdtemp(prefix="filtergraph_")
+    try:
+        compiler = TimelineCompiler(timeline, frame_size, fps, scale, sprites, work_dir, background_dir)
+        graph, label = compiler.compile()
+        if audio_path:
+            audio_input = graph.add_input(["-i", encode_audio_file(audio_path)])
+        args = [*ffmpeg_global_args(), *graph.args(), "-map", f"[{label}]"]
+        if audio_path:
+            args += ["-map", f"{audio_input}:a:0", "-c:a", "copy"]
+        args += encoder.ffmpeg_args() + ["-t", f"{timeline.duration:.6f}", output_path]
+
+        frames = int(timeline.duration * fps)
+        print(f"🧩 Filtergraph backend: {len(graph.inputs)} inputs, {len(graph.chains)} filter chains "
+              f"({len(timeline.layers) - len(compiler.visible_layers())} hidden layers left out)")
+        start = time.perf_counter()
+        run_ffmpeg(args)
+        elapsed = time.perf_counter() - start
+        print(f"✅ Rendered {frames} frames in {elapsed:.2f}s ({frames / elapsed:.1f} fps) inside ffmpeg")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return output_path
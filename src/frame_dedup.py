@@ -0,0 +1,183 @@
+"""
+Duplicate-Frame Detection
+=========================
+
+Renders each run of identical frames once:
+- Layers carry a frame key: a cheap value that changes whenever their pixels
+  can change (a sprite outside its fades, the step of a gradient, the integer
+  size of a zoom, the frame index of a video)
+- A composite frame's key is the keys and pixel positions of its playing
+  layers, minus layers hidden under an opaque full-frame layer
+- Keys for every frame are computed up front from metadata, without rendering;
+  a layer without a key makes its frames render normally
+- The writer repeats the rendered buffer for the rest of the run (constant
+  frame rate), or drops the repeats and gives ffmpeg the original timestamps
+  through a setpts script (variable frame rate, nothing re-encoded)
+
+Usage:
+    clip = mark_still(sprite_clip, fade_in=0.5, fade_out=0.5)
+    plan = plan_duplicates(final_clip, fps=24, vfr=True)
+    cmd = build_ffmpeg_command(..., video_args=plan.video_args(temp_dir))
+"""
+
+import os
+
+from moviepy.editor import CompositeVideoClip
+
+from culled_composite import resolve_position, covers_frame
+
+# === Configuration ===
+STILL = "still"
+
+
+def set_frame_key(clip, key):
+    """Attach a frame key (clip time -> hashable) to a clip's current frame function"""
+    clip.frame_key = key
+    # Keys describe this exact frame function: any later fl()/fx() invalidates them
+    clip.frame_key_owner = (clip.make_frame, clip.mask.make_frame if clip.mask is not None else None)
+    return clip
+
+
+def still_key(clip, fade_in=0.0, fade_out=0.0):
+    """Key of a still layer whose pixels only change during fadein/fadeout"""
+    duration = clip.duration
+
+    def key(t):
+        # Mirrors the fade conditions of moviepy.video.fx.fadein/fadeout
+        if t < fade_in or (duration is not None and duration - t < fade_out):
+            return ("fade", t)
+        return STILL
+    return key
+
+
+def mark_still(clip, fade_in=0.0, fade_out=0.0):
+    """Declare a clip still apart from its fades (call after the fades are applied)"""
+    return set_frame_key(clip, still_key(clip, fade_in, fade_out))
+
+
+def is_composite(clip):
+    # set_audio/set_fps copies keep CompositeVideoClip's own frame function;
+    # an fl() on top of it would not, and then its layers no longer tell the frame
+    return (isinstance(clip, CompositeVideoClip) and
+            getattr(clip.make_frame, "__qualname__", "").startswith("CompositeVideoClip."))
+
+
+def own_key(clip, t):
+    """Declared key of a clip at clip time t, or None if it has none (or it is stale)"""
+    key = getattr(clip, "frame_key", None)
+    if key is None:
+        return None
+    mask_frame = clip.mask.make_frame if clip.mask is not None else None
+    owner_frame, owner_mask = clip.frame_key_owner
+    if owner_frame is not clip.make_frame or owner_mask is not mask_frame:
+        return None
+    return key(t)
+
+
+def layer_key(clip, t, frame_size):
+    """Key of a layer at composite time t, including where it lands"""
+    local_t = t - clip.start
+    key = own_key(clip, local_t)
+    if key is None and is_composite(clip):
+        key = composite_key(clip, local_t)
+    if key is None:
+        return None
+    position = resolve_position(clip.pos(local_t), clip.size, frame_size, clip.relative_pos)
+    return key, position
+
+
+def composite_key(clip, t):
+    """Key of a composite frame, or None if any visible layer is unknown"""
+    playing = [(i, layer) for i, layer in enumerate(clip.clips) if layer.is_playing(t)]
+    # Layers under an opaque full-frame layer cannot change the frame
+    for position in range(len(playing) - 1, -1, -1):
+        if covers_frame(playing[position][1], t, clip.size):
+            playing = playing[position:]
+            break
+
+    keys = []
+    for i, layer in playing:
+        key = layer_key(layer, t, clip.size)
+        if key is None:
+            return None
+        keys.append((i, key))
+    return tuple(keys)
+
+
+def frame_key(clip, t):
+    key = own_key(clip, t)
+    if key is None and is_composite(clip):
+        key = composite_key(clip, t)
+    return key
+
+
+def frame_keys(clip, fps, frame_count=None):
+    """Keys of every output frame (None where the frame must be rendered)"""
+    if frame_count is None:
+        frame_count = int(clip.duration * fps)
+    return [frame_key(clip, index / fps) for index in range(frame_count)]
+
+
+def setpts_expression(timestamps):
+    """setpts expression giving the n-th written frame its original frame index as PTS"""
+    def build(lo, hi):
+        # Consecutive frames collapse into a plain offset
+        if timestamps[hi - 1] - timestamps[lo] == hi - 1 - lo:
+            offset = timestamps[lo] - lo
+            return f"N+{offset}" if offset else "N"
+        mid = (lo + hi) // 2
+        return f"if(lt(N,{mid}),{build(lo, mid)},{build(mid, hi)})"
+    return build(0, len(timestamps))
+
+
+class DedupPlan:
+    """Which frames to render, and how often each rendered frame is written"""
+
+    def __init__(self, keys, vfr=False):
+        self.frame_count = len(keys)
+        self.vfr = vfr
+        self.rendered = [i for i, key in enumerate(keys)
+                         if key is None or i == 0 or key != keys[i - 1]]
+        ends = self.rendered[1:] + [self.frame_count]
+        if vfr:
+            self.copies = [1] * len(self.rendered)
+            if self.rendered and ends[-1] - self.rendered[-1] > 1:
+                # Repeat the last frame at the final timestamp so the duration is kept
+                self.copies[-1] = 2
+        else:
+            self.copies = [end - start for start, end in zip(self.rendered, ends)]
+
+    @property
+    def duplicates(self):
+        return self.frame_count - len(self.rendered)
+
+    @property
+    def written(self):
+        return sum(self.copies)
+
+    def timestamps(self):
+        """Original frame index of every frame written to ffmpeg"""
+        timestamps = list(self.rendered)
+        if self.vfr and self.copies and self.copies[-1] == 2:
+            timestamps.append(self.frame_count - 1)
+        return timestamps
+
+    def video_args(self, temp_dir):
+        """ffmpeg output options restoring the original timestamps (VFR only)"""
+        if not self.vfr or not self.duplicates:
+            return []
+        script_path = os.path.join(temp_dir, "setpts.txt")
+        with open(script_path, "w") as f:
+            # Quoted: the expression's commas would otherwise split the filtergraph
+            f.write(f"setpts='{setpts_expression(self.timestamps())}'")
+        return ["-filter_script:v", script_path, "-fps_mode", "vfr"]
+
+    def describe(self):
+        mode = "dropped, timestamps kept (VFR)" if self.vfr else "re-sent to the encoder"
+        return (f"♻️  Duplicate frames: {self.duplicates} of {self.frame_count} repeat the previous "
+                f"frame; rendering {len(self.rendered)}, repeats {mode}")
+
+
+def plan_duplicates(clip, fps, vfr=False, frame_count=None):
+    """Dedup plan of a clip from its layers' frame keys"""
+    return DedupPlan(frame_keys(clip, fps, frame_count), vfr=vfr)
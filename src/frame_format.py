@@ -0,0 +1,89 @@
+"""
+Frame Format Contract
+=====================
+
+One frame format from the compositor to the encoder:
+- A frame is a C-contiguous uint8 RGB array (height x width x 3), the layout
+  ffmpeg reads as rgb24; frames already in that layout pass through untouched
+- Frames are written straight to ffmpeg's stdin (no BGR swap, no PIL round trip)
+- Optionally frames are converted to planar yuv420p (I420) once, into a reused
+  buffer, so ffmpeg's swscale conversion to the encoder's format disappears
+- yuv420p needs an even width and height; odd sizes stay rgb24
+
+Usage:
+    converter = FrameConverter((1280, 720), "yuv420p")
+    stdin.write(converter.convert(frame).data)
+"""
+
+import cv2
+import numpy as np
+
+# === Configuration ===
+PIXEL_FORMATS = ("rgb24", "yuv420p")
+DEFAULT_PIX_FMT = "rgb24"
+
+
+def supports_yuv420p(size):
+    width, height = size
+    return width % 2 == 0 and height % 2 == 0
+
+
+def resolve_pix_fmt(size, pix_fmt=DEFAULT_PIX_FMT):
+    """Pixel format frames of this size can be sent in"""
+    if pix_fmt not in PIXEL_FORMATS:
+        raise ValueError(f"Unknown pixel format: {pix_fmt} (expected one of {', '.join(PIXEL_FORMATS)})")
+    if pix_fmt == "yuv420p" and not supports_yuv420p(size):
+        print(f"⚠️  {size[0]}x{size[1]} is not even, sending rgb24 frames instead of yuv420p")
+        return "rgb24"
+    return pix_fmt
+
+
+def frame_shape(size, pix_fmt=DEFAULT_PIX_FMT):
+    """Array shape of one frame: HxWx3 for rgb24, the I420 planes stacked for yuv420p"""
+    width, height = size
+    if pix_fmt == "yuv420p":
+        return (height * 3 // 2, width)
+    return (height, width, 3)
+
+
+def is_rgb_frame(frame):
+    return (isinstance(frame, np.ndarray) and frame.dtype == np.uint8 and frame.ndim == 3
+            and frame.shape[2] == 3 and frame.flags.c_contiguous)
+
+
+def as_rgb_frame(frame, out=None):
+    """A frame (array or PIL image) as contiguous uint8 RGB, copying only when it is not already"""
+    if is_rgb_frame(frame):
+        return frame
+    array = np.asarray(frame)
+    if array.ndim == 2:
+        array = array[:, :, None].repeat(3, axis=2)
+    if out is None or out.shape != array.shape[:2] + (3,):
+        out = np.empty(array.shape[:2] + (3,), dtype=np.uint8)
+    np.copyto(out, array[:, :, :3], casting="unsafe")
+    return out
+
+
+def rgb_to_yuv420p(rgb, out=None):
+    """Planar I420 (Y, then quarter-size U and V) of an RGB frame, BT.601 limited range like swscale"""
+    return cv2.cvtColor(rgb, cv2.COLOR_RGB2YUV_I420, dst=out)
+
+
+class FrameConverter:
+    """Turns frames into the wire format, reusing one buffer between frames"""
+
+    def __init__(self, size, pix_fmt=DEFAULT_PIX_FMT):
+        self.size = size
+        self.pix_fmt = resolve_pix_fmt(size, pix_fmt)
+        self.rgb = np.empty(frame_shape(size), dtype=np.uint8)
+        self.yuv = np.empty(frame_shape(size, "yuv420p"), dtype=np.uint8) if self.pix_fmt == "yuv420p" else None
+
+    def convert(self, frame, out=None):
+        """Frame in the wire format; rgb24 frames in the right layout come back as they are"""
+        rgb = as_rgb_frame(frame, self.rgb)
+        if self.pix_fmt == "rgb24":
+            if out is None:
+                return rgb
+            np.copyto(out, rgb)
+            return out
+        return rgb_to_yuv420p(rgb, self.yuv if out is None else out)
@@ -0,0 +1,151 @@
+"""
+Spill-to-Disk Frame Store
+=========================
+
+List-like container for generated frames with a bounded memory footprint:
+- The first frames are kept in RAM up to a configurable budget (MB)
+- Later frames are copied into disk-backed np.memmap chunks in a scratch
+  directory, so RAM use stays flat however long the recording is
+- append/extend/len/iteration/indexing behave like a list of RGB arrays;
+  indexing returns a view, so in-place edits (captions, overlays) persist
+- Frames are stored as contiguous uint8 RGB (frame_format.py), ready for
+  the ffmpeg pipe; frames kept in RAM are the arrays that were appended
+- close() (or the with block) deletes the spilled chunks
+
+Usage:
+    with FrameStore(memory_budget_mb=256, scratch_dir=job_dir) as frames:
+        for i in range(frame_count):
+            frames.append(render(i))
+        write_frames(frames, "output/video.mp4", fps=30)
+"""
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from frame_format import as_rgb_frame
+
+# === Configuration ===
+MEMORY_BUDGET_MB = 512
+CHUNK_FRAMES = 32  # Frames per memmap file
+MEGABYTE = 1024 * 1024
+
+
+class FrameStore:
+    """Frames in RAM up to a budget, the rest in memmap chunks on disk"""
+
+    def __init__(self, memory_budget_mb=MEMORY_BUDGET_MB, scratch_dir=None, chunk_frames=CHUNK_FRAMES):
+        self.memory_budget = int(memory_budget_mb * MEGABYTE)
+        self.scratch_dir = scratch_dir
+        self.chunk_frames = chunk_frames
+        self.shape = None
+        self.memory = []
+        self.memory_limit = None  # Frames that fit in the budget, known once the first frame arrives
+        self.chunks = []
+        self.spilled = 0
+        self.spill_dir = None
+
+    @classmethod
+    def collect(cls, frames, memory_budget_mb=MEMORY_BUDGET_MB, scratch_dir=None):
+        """Store of an iterable of frames (a FrameStore is returned as it is)"""
+        if isinstance(frames, cls):
+            return frames
+        store = cls(memory_budget_mb, scratch_dir)
+        store.extend(frames)
+        return store
+
+    @property
+    def size(self):
+        """(width, height) of the frames"""
+        return (self.shape[1], self.shape[0]) if self.shape else None
+
+    @property
+    def frame_bytes(self):
+        return int(np.prod(self.shape)) if self.shape else 0
+
+    def new_chunk(self):
+        if self.spill_dir is None:
+            if self.scratch_dir:
+                os.makedirs(self.scratch_dir, exist_ok=True)
+            self.spill_dir = tempfile.mkdtemp(prefix="frames_", dir=self.scratch_dir)
+            print(f"💾 Frame store over {self.memory_budget / MEGABYTE:.0f} MB, "
+                  f"spilling frames to {self.spill_dir}")
+        path = os.path.join(self.spill_dir, f"chunk_{len(self.chunks):05d}.raw")
+        chunk = np.memmap(path, dtype=np.uint8, mode="w+", shape=(self.chunk_frames,) + self.shape)
+        self.chunks.append(chunk)
+        return chunk
+
+    def append(self, frame):
+        frame = as_rgb_frame(frame)
+        if self.shape is None:
+            self.shape = frame.shape
+            self.memory_limit = self.memory_budget // self.frame_bytes
+        elif frame.shape != self.shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match the store's {self.shape}")
+
+        if len(self.memory) < self.memory_limit and not self.spilled:
+            # Like a list, the store keeps the array it was given
+            self.memory.append(frame)
+            return
+
+        slot = self.spilled % self.chunk_frames
+        chunk = self.chunks[-1] if slot else self.new_chunk()
+        chunk[slot] = frame
+        self.spilled += 1
+
+    def extend(self, frames):
+        for frame in frames:
+            self.append(frame)
+
+    def __len__(self):
+        return len(self.memory) + self.spilled
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("frame index out of range")
+        if index < len(self.memory):
+            return self.memory[index]
+        index -= len(self.memory)
+        return self.chunks[index // self.chunk_frames][index % self.chunk_frames]
+
+    def __setitem__(self, index, frame):
+        self[index][...] = as_rgb_frame(frame)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def stats(self):
+        return {
+            "frames": len(self),
+            "in_memory": len(self.memory),
+            "spilled": self.spilled,
+            "memory_mb": len(self.memory) * self.frame_bytes / MEGABYTE,
+            "disk_mb": len(self.chunks) * self.chunk_frames * self.frame_bytes / MEGABYTE,
+        }
+
+    def close(self):
+        """Drop the frames and delete the spilled chunks"""
+        # Views still held elsewhere keep their mapping; the files go away with the last one
+        self.chunks = []
+        self.memory = []
+        self.spilled = 0
+        if self.spill_dir is not None:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,183 @@
+"""
+Single-Pass Multi-Rendition Publishing
+======================================
+
+Renders the composite once and lets one ffmpeg process produce everything
+that gets published:
+- A split/scale filtergraph feeds one x264 encode per rendition (1080p, 720p,
+  480p ladder, CRF capped by a per-rendition maxrate)
+- The tee muxer writes each encode to a progressive MP4 and to HLS segments
+  (optionally one DASH manifest over all renditions) without encoding twice
+- Keyframes are forced at segment boundaries so players can switch renditions
+- A poster JPEG (one frame selected at a chosen time) and a palette GIF
+  preview come from further branches of the same filtergraph
+
+Renditions taller than the rendered composite are skipped rather than upscaled.
+
+Usage:
+    outputs = publish(final_clip, "output/publish", "shrikanth_intro", fps=24, encoder=profile)
+"""
+
+import os
+import shutil
+import tempfile
+
+from pipelined_writer import write_pipelined, write_audio_track, DEFAULT_WORKERS
+
+# === Configuration ===
+RENDITIONS = [  # name, height, maxrate (kbit/s)
+    ("1080p", 1080, 5000),
+    ("720p", 720, 2800),
+    ("480p", 480, 1400),
+]
+SEGMENT_SECONDS = 4
+POSTER_TIME = 2.0
+GIF_SECONDS = 4.0
+GIF_FPS = 10
+GIF_WIDTH = 480
+AUDIO_KBPS = 192
+SCALE_FLAGS = "lanczos"  # Downscaling happens once per rendition, so quality wins here
+
+
+def tee_escape(value, levels=1):
+    """Escape a path or option value for the tee muxer's slave syntax"""
+    for _ in range(levels):
+        for char in "\\:|[]',=":
+            value = value.replace(char, "\\" + char)
+    return value
+
+
+def segment_keyframe_args(seconds=SEGMENT_SECONDS):
+    """Force a keyframe at every segment boundary so segments start decodable"""
+    return ["-force_key_frames", f"expr:gte(t,n_forced*{seconds})"]
+
+
+def rendition_size(source_size, height):
+    """Even (width, height) of a rendition, keeping the source aspect ratio"""
+    width = int(round(source_size[0] * height / source_size[1] / 2)) * 2
+    return width, height
+
+
+def select_renditions(source_size, renditions=RENDITIONS):
+    """Renditions that do not need upscaling"""
+    selected = [r for r in renditions if r[1] <= source_size[1]]
+    skipped = [r[0] for r in renditions if r[1] > source_size[1]]
+    if skipped:
+        print(f"⚠️  Skipping {', '.join(skipped)}: taller than the {source_size[1]}p render")
+    return selected or [(f"{source_size[1]}p", source_size[1], renditions[-1][2])]
+
+
+def build_publish_args(source_size, fps, output_dir, name, encoder=None, renditions=RENDITIONS,
+                       hls=True, dash=False, poster_time=POSTER_TIME, gif_seconds=GIF_SECONDS,
+                       has_audio=True, segment_seconds=SEGMENT_SECONDS):
+    """Output side of the ffmpeg command plus the paths it writes"""
+    renditions = select_renditions(source_size, renditions)
+    branches = len(renditions) + (1 if poster_time is not None else 0) + (1 if gif_seconds else 0)
+
+    labels = [f"s{i}" for i in range(branches)]
+    graph = [f"[0:v]split={branches}" + "".join(f"[{label}]" for label in labels)]
+    for i, (rendition_name, height, _) in enumerate(renditions):
+        width, height = rendition_size(source_size, height)
+        graph.append(f"[s{i}]scale={width}:{height}:flags={SCALE_FLAGS}[v{i}]")
+    branch = len(renditions)
+    if poster_time is not None:
+        graph.append(f"[s{branch}]select='eq(n\\,{int(round(poster_time * fps))})'[poster]")
+        branch += 1
+    if gif_seconds:
+        graph.append(f"[s{branch}]trim=duration={gif_seconds},fps={GIF_FPS},"
+                     f"scale={GIF_WIDTH}:-2:flags={SCALE_FLAGS},split[g0][g1];"
+                     f"[g0]palettegen=stats_mode=diff[palette];"
+                     f"[g1][palette]paletteuse=dither=bayer[gif]")
+
+    args = ["-filter_complex", ";".join(graph)]
+    for i in range(len(renditions)):
+        args += ["-map", f"[v{i}]"]
+    if has_audio:
+        args += ["-map", "1:a", "-c:a", "copy"]
+
+    if encoder is not None:
+        args += encoder.ffmpeg_args(faststart=False)
+    else:
+        args += ["-c:v", "libx264", "-preset", "medium", "-pix_fmt", "yuv420p", "-crf", "21"]
+    for i, (_, _, maxrate) in enumerate(renditions):
+        args += [f"-maxrate:v:{i}", f"{maxrate}k", f"-bufsize:v:{i}", f"{2 * maxrate}k"]
+    args += segment_keyframe_args(segment_seconds)
+    # The tee muxer cannot tell the encoder that MP4 needs global headers
+    args += ["-flags", "+global_header"]
+
+    outputs = {"mp4": {}, "hls": {}, "dash": None, "poster": None, "gif": None}
+    slaves = []
+    streams = "a" if has_audio else ""
+    for i, (rendition_name, _, _) in enumerate(renditions):
+        select = tee_escape(f"v:{i}" + (f",{streams}" if streams else ""), levels=2)
+        mp4_path = os.path.join(output_dir, f"{name}_{rendition_name}.mp4")
+        slaves.append(f"[select={select}:f=mp4:movflags=+faststart]{tee_escape(mp4_path)}")
+        outputs["mp4"][rendition_name] = mp4_path
+        if hls:
+            playlist = os.path.join(output_dir, "hls", f"{rendition_name}.m3u8")
+            segments = os.path.join(output_dir, "hls", f"{rendition_name}_%03d.ts")
+            slaves.append(f"[select={select}:f=hls:hls_time={segment_seconds}:hls_playlist_type=vod:"
+                          f"hls_segment_filename={tee_escape(segments, levels=2)}]{tee_escape(playlist)}")
+            outputs["hls"][rendition_name] = playlist
+    if dash:
+        manifest = os.path.join(output_dir, "dash", f"{name}.mpd")
+        slaves.append(f"[f=dash:seg_duration={segment_seconds}]{tee_escape(manifest)}")
+        outputs["dash"] = manifest
+    args += ["-f", "tee", "|".join(slaves)]
+
+    if poster_time is not None:
+        outputs["poster"] = os.path.join(output_dir, f"{name}_poster.jpg")
+        args += ["-map", "[poster]", "-frames:v", "1", "-update", "1", "-q:v", "2", outputs["poster"]]
+    if gif_seconds:
+        outputs["gif"] = os.path.join(output_dir, f"{name}_preview.gif")
+        args += ["-map", "[gif]", "-loop", "0", outputs["gif"]]
+
+    outputs["renditions"] = [(r[0], rendition_size(source_size, r[1]), r[2]) for r in renditions]
+    return args, outputs
+
+
+def write_master_playlist(outputs, output_dir, audio_kbps=AUDIO_KBPS):
+    """HLS multivariant playlist pointing at each rendition's media playlist"""
+    path = os.path.join(output_dir, "hls", "master.m3u8")
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3"]
+    for rendition_name, (width, height), maxrate in outputs["renditions"]:
+        bandwidth = (maxrate + audio_kbps) * 1000
+        lines.append(f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={width}x{height}")
+        lines.append(os.path.basename(outputs["hls"][rendition_name]))
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def publish(clip, output_dir, name, fps, encoder=None, workers=DEFAULT_WORKERS, renditions=RENDITIONS,
+            hls=True, dash=False, poster_time=POSTER_TIME, gif_seconds=GIF_SECONDS):
+    """Render a clip once and write every rendition, segments, poster and GIF"""
+    for subdir in ["hls"] * hls + ["dash"] * dash:
+        os.makedirs(os.path.join(output_dir, subdir), exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+
+    if poster_time is not None and poster_time >= clip.duration:
+        poster_time = clip.duration / 2
+    gif_seconds = min(gif_seconds, clip.duration) if gif_seconds else gif_seconds
+
+    temp_dir = tempfile.mkdtemp(prefix="publish_")
+    try:
+        # Encoded once, then stream-copied into every output
+        audio_path = write_audio_track(clip, temp_dir)
+        size = (int(clip.size[0]), int(clip.size[1]))
+        output_args, outputs = build_publish_args(
+            size, fps, output_dir, name, encoder, renditions, hls=hls, dash=dash,
+            poster_time=poster_time, gif_seconds=gif_seconds, has_audio=audio_path is not None)
+
+        ladder = ", ".join(f"{r[0]} ({r[1][0]}x{r[1][1]})" for r in outputs["renditions"])
+        print(f"📦 Publishing {ladder} in one pass"
+              + (" + HLS" if hls else "") + (" + DASH" if dash else "")
+              + (" + poster" if outputs["poster"] else "") + (" + GIF" if outputs["gif"] else ""))
+        write_pipelined(clip, None, fps, workers=workers, audio_path=audio_path, output_args=output_args)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    if hls:
+        outputs["hls"]["master"] = write_master_playlist(outputs, output_dir)
+    print(f"✅ Published to {output_dir}")
+    return outputs
@@ -0,0 +1,345 @@
+"""
+ONNX Runtime Face Animation Engine
+==================================
+
+This script exports the face animation / lip-sync network used by
+FaceAnimationModel to ONNX and runs it through ONNX Runtime on CPU-only nodes:
+- Export of the PyTorch network to ONNX with a dynamic audio axis
+- Dynamic int8 quantization of the exported graph
+- Tuned ONNX Runtime session threading
+- Side-by-side benchmark (frames per second + output deviation) against PyTorch
+
+Supported models: a torch.nn.Module called as forward(image, audio), with
+image (1, 3, H, W) in [0, 1] and audio (1, T) per-frame lip-sync energies
+(AudioProcessor.compute_audio_features), returning T frames in [0, 1] as
+(T, 3, H, W) or (T, H, W, 3), optionally with a batch axis. The model may be
+loaded directly or wrapped by a ModelScope pipeline (its .model attribute).
+The default damo/cv_3d-human-face-generation pipeline is called as
+infer({'image': ..., 'audio': ...}); when it wraps no such network, export
+stops with an explanation and the generator keeps using --engine torch.
+
+Usage:
+    python src/onnx_face_engine.py export
+    python src/onnx_face_engine.py benchmark --model models/face_animation.int8.onnx
+    python src/ai_video_generator.py --engine onnx
+"""
+
+import os
+import sys
+import time
+import inspect
+import numpy as np
+from PIL import Image
+
+from resource_governor import core_budget
+
+# === Configuration ===
+ONNX_MODEL_DIR = "models"
+ONNX_MODEL_PATH = os.path.join(ONNX_MODEL_DIR, "face_animation.onnx")
+ONNX_INT8_MODEL_PATH = os.path.join(ONNX_MODEL_DIR, "face_animation.int8.onnx")
+EXPORT_IMAGE_SIZE = (256, 256)  # (width, height) fed to the network
+EXPORT_AUDIO_FRAMES = 30  # Matches AudioProcessor.compute_audio_features
+ONNX_OPSET = 17
+
+
+def to_model_inputs(face_image, audio_features, image_size=EXPORT_IMAGE_SIZE):
+    """Convert a PIL face image and audio features into network input arrays"""
+    image = face_image.convert('RGB').resize(image_size)
+    image_array = np.asarray(image, dtype=np.float32) / 255.0
+    # HWC -> NCHW
+    image_array = np.ascontiguousarray(image_array.transpose(2, 0, 1)[None])
+    audio_array = np.asarray(audio_features, dtype=np.float32).reshape(1, -1)
+    return image_array, audio_array
+
+
+def frames_array(output):
+    """Network output as (T, H, W, 3) frames; raises ValueError for any other layout"""
+    output = np.asarray(output)
+    if output.ndim == 5 and output.shape[0] == 1:
+        # Drop the batch axis
+        output = output[0]
+    if output.ndim == 4 and output.shape[1] == 3:
+        return output.transpose(0, 2, 3, 1)
+    if output.ndim == 4 and output.shape[-1] == 3:
+        return output
+    raise ValueError(f"expected frames shaped (T, 3, H, W) or (T, H, W, 3), got {output.shape}")
+
+
+def to_frames(output):
+    """Convert network output frames in [0, 1] into PIL frames"""
+    frames = np.clip(frames_array(output) * 255.0, 0, 255).astype(np.uint8)
+    return [Image.fromarray(frame) for frame in frames]
+
+
+def takes_image_and_audio(module):
+    """Whether a module's forward can be called as forward(image, audio)"""
+    try:
+        parameters = list(inspect.signature(module.forward).parameters.values())
+    except (TypeError, ValueError):
+        return False
+    positional = [p for p in parameters if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)]
+    required = [p for p in positional if p.default is p.empty]
+    variadic = any(p.kind == p.VAR_POSITIONAL for p in parameters)
+    return (variadic or len(positional) >= 2) and len(required) <= 2
+
+
+def face_network(model):
+    """The exportable network: the model itself, or the torch module a ModelScope pipeline wraps"""
+    import torch
+
+    if model is None:
+        raise RuntimeError("The face animation model did not load, so there is no network to export")
+    for candidate in (model, getattr(model, "model", None)):
+        if isinstance(candidate, torch.nn.Module) and takes_image_and_audio(candidate):
+            return candidate
+    raise RuntimeError(
+        f"The face animation model ({type(model).__name__}) is not exportable: ONNX export needs a "
+        "torch.nn.Module called as forward(image, audio), but this model is run as "
+        "infer({'image': ..., 'audio': ...}) and wraps no such module. Keep --engine torch for it."
+    )
+
+
+def session_image_size(session, default=EXPORT_IMAGE_SIZE):
+    """(width, height) of a session's image input, or the default when it is dynamic"""
+    shape = session.get_inputs()[0].shape  # (N, 3, H, W); dynamic axes are names, not ints
+    if len(shape) == 4 and all(isinstance(dim, int) for dim in shape[2:]):
+        return shape[3], shape[2]
+    return default
+
+
+def create_session(model_path, intra_op_threads=None, inter_op_threads=1):
+    """Create an ONNX Runtime CPU session with tuned threading"""
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    # The network is a single chain of ops, so parallelism belongs inside ops
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.intra_op_num_threads = intra_op_threads or core_budget()
+    options.inter_op_num_threads = inter_op_threads
+
+    return ort.InferenceSession(
+        model_path,
+        sess_options=options,
+        providers=["CPUExecutionProvider"]
+    )
+
+
+def check_network(network, dummy_image, dummy_audio):
+    """Run the network once and make sure it returns frames, before tracing it"""
+    import torch
+
+    name = type(network).__name__
+    with torch.inference_mode():
+        try:
+            output = network(dummy_image, dummy_audio)
+        except Exception as e:
+            raise RuntimeError(f"{name}(image, audio) failed on export inputs "
+                               f"{tuple(dummy_image.shape)}, {tuple(dummy_audio.shape)}: {e}") from e
+    if not isinstance(output, torch.Tensor):
+        raise RuntimeError(f"{name}(image, audio) returns {type(output).__name__}, not a frame tensor")
+    try:
+        frames_array(output.cpu().numpy())
+    except ValueError as e:
+        raise RuntimeError(f"{name}(image, audio) output is not exportable as frames: {e}") from e
+
+
+def export_face_model(network, output_path=ONNX_MODEL_PATH, quantize=True, image_size=EXPORT_IMAGE_SIZE):
+    """Export the face animation network to ONNX and optionally quantize it to int8"""
+    import torch
+
+    network = face_network(network).eval()
+
+    class ExportWrapper(torch.nn.Module):
+        """Pins the (image, audio) call signature used by FaceAnimationModel"""
+
+        def __init__(self, network):
+            super().__init__()
+            self.network = network
+
+        def forward(self, image, audio):
+            return self.network(image, audio)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    dummy_image = torch.rand(1, 3, image_size[1], image_size[0])
+    dummy_audio = torch.rand(1, EXPORT_AUDIO_FRAMES)
+    check_network(network, dummy_image, dummy_audio)
+
+    print(f"📦 Exporting face animation network to {output_path}...")
+    wrapper = ExportWrapper(network).eval()
+    with torch.inference_mode():
+        torch.onnx.export(
+            wrapper,
+            (dummy_image, dummy_audio),
+            output_path,
+            input_names=["image", "audio"],
+            output_names=["frames"],
+            dynamic_axes={"audio": {1: "audio_frames"}},
+            opset_version=ONNX_OPSET,
+            do_constant_folding=True
+        )
+    print("✅ ONNX export completed")
+
+    if not quantize:
+        return output_path
+
+    return quantize_face_model(output_path)
+
+
+def quantize_face_model(model_path, output_path=None):
+    """Apply dynamic int8 quantization to an exported ONNX model"""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    if output_path is None:
+        root, ext = os.path.splitext(model_path)
+        output_path = f"{root}.int8{ext}"
+
+    print(f"🔢 Quantizing {model_path} to int8...")
+    quantize_dynamic(model_path, output_path, weight_type=QuantType.QInt8)
+
+    fp32_size = os.path.getsize(model_path) / (1024 * 1024)
+    int8_size = os.path.getsize(output_path) / (1024 * 1024)
+    print(f"✅ Quantized model saved: {output_path} ({fp32_size:.1f} MB -> {int8_size:.1f} MB)")
+
+    return output_path
+
+
+class OnnxFaceEngine:
+    """Runs the exported face animation network through ONNX Runtime"""
+
+    def __init__(self, model_path=ONNX_INT8_MODEL_PATH, intra_op_threads=None):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"ONNX face model not found: {model_path} "
+                "(run: python src/onnx_face_engine.py export)"
+            )
+        self.model_path = model_path
+        self.session = create_session(model_path, intra_op_threads=intra_op_threads)
+        inputs = self.session.get_inputs()
+        if len(inputs) != 2:
+            raise RuntimeError(f"{model_path} takes {len(inputs)} inputs; expected (image, audio) "
+                               "as written by onnx_face_engine.py export")
+        self.image_input = inputs[0].name
+        self.audio_input = inputs[1].name
+        self.image_size = session_image_size(self.session)
+
+    def run(self, image_array, audio_array):
+        """Run the network on prepared input arrays"""
+        return self.session.run(None, {
+            self.image_input: image_array,
+            self.audio_input: audio_array
+        })[0]
+
+    def infer(self, face_image, audio_features):
+        """Generate face animation frames from image and audio features"""
+        image_array, audio_array = to_model_inputs(face_image, audio_features, self.image_size)
+        return to_frames(self.run(image_array, audio_array))
+
+
+def compare_engines(network, engine, face_image, audio_features, runs=3):
+    """Benchmark PyTorch eager vs ONNX Runtime and measure output deviation"""
+    import torch
+
+    image_array, audio_array = to_model_inputs(face_image, audio_features, engine.image_size)
+    frame_count = audio_array.shape[1]
+
+    def time_runs(fn):
+        # Warm-up run is excluded from timing
+        output = fn()
+        start = time.perf_counter()
+        for _ in range(runs):
+            output = fn()
+        elapsed = (time.perf_counter() - start) / runs
+        return np.asarray(output, dtype=np.float32), elapsed
+
+    network = face_network(network).eval()
+    image_tensor = torch.from_numpy(image_array)
+    audio_tensor = torch.from_numpy(audio_array)
+
+    def torch_run():
+        with torch.inference_mode():
+            return network(image_tensor, audio_tensor).numpy()
+
+    torch_output, torch_time = time_runs(torch_run)
+    onnx_output, onnx_time = time_runs(lambda: engine.run(image_array, audio_array))
+
+    deviation = np.abs(torch_output - onnx_output)
+    report = {
+        "frames": frame_count,
+        "torch_fps": frame_count / torch_time,
+        "onnx_fps": frame_count / onnx_time,
+        "speedup": torch_time / onnx_time,
+        "max_abs_deviation": float(deviation.max()),
+        "mean_abs_deviation": float(deviation.mean()),
+    }
+
+    print(f"⏱️  PyTorch eager: {report['torch_fps']:.1f} fps")
+    print(f"⏱️  ONNX Runtime:  {report['onnx_fps']:.1f} fps ({report['speedup']:.2f}x)")
+    print(f"📏 Output deviation: max {report['max_abs_deviation']:.4f}, "
+          f"mean {report['mean_abs_deviation']:.5f}")
+
+    return report
+
+
+def load_face_network():
+    """Load the face animation model the same way the generator does (None if it fails to load)"""
+    from ai_video_generator import FaceAnimationModel
+
+    face_model = FaceAnimationModel()
+    face_model.setup()
+    return face_model.model
+
+
+def main():
+    """Main function"""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Export and benchmark the ONNX face animation engine')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='Export the face network to ONNX')
+    export_parser.add_argument('--output', default=ONNX_MODEL_PATH, help='ONNX output path')
+    export_parser.add_argument('--no-quantize', action='store_true', help='Skip int8 quantization')
+    export_parser.add_argument('--image-size', type=int, nargs=2, default=list(EXPORT_IMAGE_SIZE),
+                               metavar=('WIDTH', 'HEIGHT'), help='Image input size of the exported network')
+
+    bench_parser = subparsers.add_parser('benchmark', help='Compare ONNX Runtime against PyTorch')
+    bench_parser.add_argument('--model', default=ONNX_INT8_MODEL_PATH, help='ONNX model to benchmark')
+    bench_parser.add_argument('--photo', required=True, help='Face photo used as input')
+    bench_parser.add_argument('--audio', required=True, help='Voice recording used as input')
+    bench_parser.add_argument('--threads', type=int, default=None, help='ONNX Runtime intra-op threads')
+    bench_parser.add_argument('--runs', type=int, default=3, help='Timed runs per engine')
+    bench_parser.add_argument('--json', help='Write the report to this JSON file')
+
+    args = parser.parse_args()
+
+    try:
+        network = face_network(load_face_network())
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    if args.command == 'export':
+        export_face_model(network, args.output, quantize=not args.no_quantize,
+                          image_size=tuple(args.image_size))
+        return
+
+    from ai_video_generator import AudioProcessor
+
+    face_image = Image.open(args.photo).convert('RGB')
+    audio_features = AudioProcessor().extract_audio_features(args.audio)
+    engine = OnnxFaceEngine(args.model, intra_op_threads=args.threads)
+
+    report = compare_engines(network, engine, face_image, audio_features, runs=args.runs)
+    report["model"] = args.model
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📁 Report: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""
+Pipelined Render/Encode Writer
+==============================
+
+Drop-in replacement for MoviePy's write_videofile that overlaps frame
+rendering and encoding:
+- Several render threads call clip.get_frame (NumPy/OpenCV/PIL release the GIL)
+- Frames land in a fixed pool of preallocated buffers, which bounds memory
+  and applies backpressure when the encoder falls behind
+- The calling thread feeds frames to ffmpeg's stdin strictly in order
+- Stall counters show which side is the bottleneck
+- Runs of identical frames (frame_dedup.py) are rendered once and repeated,
+  or dropped from the stream with their timestamps kept (--vfr)
+- Frames go to ffmpeg as rgb24, or as yuv420p converted in the render threads
+  (--yuv420p) so ffmpeg skips its own colour conversion (frame_format.py)
+
+Clip trees that read video files (VideoFileClip readers are stateful) are
+rendered one frame at a time, still overlapping with encoding.
+
+Usage:
+    stats = write_pipelined(final_clip, "output/video.mp4", fps=24, encoder=profile)
+    write_frames(frames, "output/video.mp4", fps=30)   # frames already in memory
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+from collections import deque
+from itertools import chain
+
+import numpy as np
+
+from ffmpeg_tools import ffmpeg_binary
+from resource_governor import ffmpeg_global_args
+from audio_track_cache import audio_track, AUDIO_FPS, AUDIO_BITRATE
+from render_trace import get_tracer
+from frame_dedup import plan_duplicates
+from frame_format import (FrameConverter, frame_shape, resolve_pix_fmt, as_rgb_frame, rgb_to_yuv420p,
+                          DEFAULT_PIX_FMT)
+
+# === Configuration ===
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_BUFFERS = 8  # Frames in flight between the render threads and the encoder
+
+
+class FrameBufferPool:
+    """Fixed set of preallocated frame buffers handed out and returned"""
+
+    def __init__(self, count, shape, dtype=np.uint8):
+        self.free = deque(np.empty(shape, dtype=dtype) for _ in range(count))
+        self.condition = threading.Condition()
+        self.waits = 0
+        self.wait_s = 0.0
+
+    def acquire(self, stop_event):
+        """Take a free buffer, blocking (backpressure) while all are in flight"""
+        with self.condition:
+            if not self.free:
+                self.waits += 1
+                start = time.perf_counter()
+                while not self.free and not stop_event.is_set():
+                    self.condition.wait(0.1)
+                self.wait_s += time.perf_counter() - start
+            return self.free.popleft() if self.free else None
+
+    def release(self, buffer):
+        with self.condition:
+            self.free.append(buffer)
+            self.condition.notify()
+
+
+def reads_files(clip, seen=None):
+    """True if any clip in the tree holds a (stateful) ffmpeg reader"""
+    seen = seen if seen is not None else set()
+    if clip is None or id(clip) in seen:
+        return False
+    seen.add(id(clip))
+    if getattr(clip, "reader", None) is not None:
+        return True
+    children = list(getattr(clip, "clips", None) or [])
+    children.append(getattr(clip, "mask", None))
+    return any(reads_files(child, seen) for child in children)
+
+
+def clip_frame_size(clip):
+    width, height = clip.size
+    return int(width), int(height)
+
+
+def write_audio_track(clip, temp_dir, fps=AUDIO_FPS, bitrate=AUDIO_BITRATE):
+    """Encode a clip's audio to AAC once (or reuse the cached track) so the video pass can stream-copy it"""
+    return audio_track(clip, temp_dir, fps, bitrate)
+
+
+def build_ffmpeg_command(size, fps, output_path, encoder=None, audio_path=None, output_args=None,
+                         audio_codec="copy", video_args=None, pix_fmt=DEFAULT_PIX_FMT):
+    """ffmpeg command reading raw frames (rgb24 or yuv420p) from stdin"""
+    width, height = size
+    cmd = [
+        ffmpeg_binary(), "-y", "-hide_banner", "-loglevel", "error", *ffmpeg_global_args(),
+        "-f", "rawvideo", "-vcodec", "rawvideo",
+        "-s", f"{width}x{height}", "-pix_fmt", pix_fmt, "-r", f"{fps:.05f}",
+        "-i", "-",
+    ]
+    if audio_path:
+        cmd += ["-i", audio_path]
+    if video_args:
+        # Options for the (first) output's video stream, e.g. the VFR timestamp filter
+        cmd += list(video_args)
+
+    if output_args is not None:
+        # Caller provides the whole output side, stream maps included
+        # (filtergraphs, several outputs, ...); audio is input 1
+        return cmd + list(output_args)
+
+    if audio_path:
+        cmd += ["-map", "0:v", "-map", "1:a", "-c:a", audio_codec]
+
+    if encoder is not None:
+        cmd += encoder.ffmpeg_args()
+    else:
+        cmd += ["-c:v", "libx264", "-preset", "medium", "-pix_fmt", "yuv420p"]
+    return cmd + [output_path]
+
+
+class PipelinedWriter:
+    """Renders a clip on worker threads and streams the frames to ffmpeg in order"""
+
+    def __init__(self, clip, fps, workers=DEFAULT_WORKERS, buffers=DEFAULT_BUFFERS, plan=None,
+                 pix_fmt=DEFAULT_PIX_FMT):
+        self.clip = clip
+        self.fps = fps
+        self.size = clip_frame_size(clip)
+        self.pix_fmt = resolve_pix_fmt(self.size, pix_fmt)
+        self.frame_count = int(clip.duration * fps)
+        # Frames to render and how many times each is written (all once without a plan)
+        self.rendered = plan.rendered if plan is not None else list(range(self.frame_count))
+        self.copies = plan.copies if plan is not None else [1] * self.frame_count
+        self.written = 0
+        self.workers = max(1, workers)
+        # A worker must hold a buffer before it claims a frame, so the frame the
+        # encoder waits for is always being rendered: at least one buffer per worker
+        self.buffer_count = max(buffers, self.workers + 1)
+        self.pool = FrameBufferPool(self.buffer_count, frame_shape(self.size, self.pix_fmt))
+        self.serialize = reads_files(clip)
+        self.render_lock = threading.Lock()
+
+        self.next_position = 0
+        self.index_lock = threading.Lock()
+        self.ready = {}
+        self.ready_condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.error = None
+
+        self.writer_stalls = 0
+        self.writer_stall_s = 0.0
+        self.render_s = 0.0
+        self.encode_s = 0.0
+
+    def claim_index(self):
+        with self.index_lock:
+            if self.next_position >= len(self.rendered):
+                return None
+            index = self.rendered[self.next_position]
+            self.next_position += 1
+            return index
+
+    def render_frame(self, index, buffer):
+        frame = self.clip.get_frame(index / self.fps)
+        if self.pix_fmt == "yuv420p":
+            rgb_to_yuv420p(as_rgb_frame(frame), out=buffer)
+        else:
+            np.copyto(buffer, frame[:, :, :3], casting="unsafe")
+
+    def claim_and_render(self, buffer):
+        """Claim the next frame and render it; returns (index, seconds) or (None, 0)"""
+        if self.serialize:
+            # Claim inside the lock so file readers always see frames in order
+            # (a backwards step makes them restart decoding from a keyframe)
+            with self.render_lock:
+                index = self.claim_index()
+                if index is None:
+                    return None, 0.0
+                start = time.perf_counter()
+                self.render_frame(index, buffer)
+                return index, time.perf_counter() - start
+
+        index = self.claim_index()
+        if index is None:
+            return None, 0.0
+        start = time.perf_counter()
+        self.render_frame(index, buffer)
+        return index, time.perf_counter() - start
+
+    def render_loop(self):
+        """Worker thread: acquire a buffer, claim the next frame, render into it"""
+        tracer = get_tracer()
+        try:
+            while not self.stop_event.is_set():
+                buffer = self.pool.acquire(self.stop_event)
+                if buffer is None:
+                    return
+                index, elapsed = self.claim_and_render(buffer)
+                if index is None:
+                    self.pool.release(buffer)
+                    return
+                tracer.observe("frame.render", elapsed)
+
+                with self.ready_condition:
+                    self.render_s += elapsed
+                    self.ready[index] = buffer
+                    self.ready_condition.notify_all()
+        except Exception as e:
+            self.error = e
+            self.stop_event.set()
+            with self.ready_condition:
+                self.ready_condition.notify_all()
+
+    def next_frame(self, index):
+        """Wait until frame `index` has been rendered"""
+        with self.ready_condition:
+            if index not in self.ready:
+                self.writer_stalls += 1
+                start = time.perf_counter()
+                while index not in self.ready and not self.stop_event.is_set():
+                    self.ready_condition.wait(0.1)
+                self.writer_stall_s += time.perf_counter() - start
+            return self.ready.pop(index, None)
+
+    def run(self, stdin):
+        """Render all frames and write them to an ffmpeg stdin pipe"""
+        tracer = get_tracer()
+        threads = [threading.Thread(target=self.render_loop, daemon=True, name=f"render-{i}")
+                   for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for index, copies in zip(self.rendered, self.copies):
+                buffer = self.next_frame(index)
+                if buffer is None:
+                    break
+                start = time.perf_counter()
+                for _ in range(copies):
+                    stdin.write(buffer.data)
+                self.written += copies
+                elapsed = time.perf_counter() - start
+                self.encode_s += elapsed
+                tracer.observe("frame.encode", elapsed)
+                self.pool.release(buffer)
+        finally:
+            self.stop_event.set()
+            for thread in threads:
+                thread.join()
+
+        if self.error is not None:
+            raise self.error
+
+    def stats(self, wall_s):
+        return {
+            "frames": self.frame_count,
+            "rendered_frames": len(self.rendered),
+            "written_frames": self.written,
+            "workers": self.workers,
+            "buffers": self.buffer_count,
+            "pix_fmt": self.pix_fmt,
+            "serialized_render": self.serialize,
+            "wall_s": round(wall_s, 3),
+            "fps": round(self.frame_count / wall_s, 2) if wall_s else None,
+            "render_s": round(self.render_s, 3),
+            "encode_write_s": round(self.encode_s, 3),
+            "writer_stalls": self.writer_stalls,
+            "writer_stall_s": round(self.writer_stall_s, 3),
+            "backpressure_waits": self.pool.waits,
+            "backpressure_s": round(self.pool.wait_s, 3),
+        }
+
+
+def write_pipelined(clip, output_path, fps, encoder=None, workers=DEFAULT_WORKERS,
+                    buffers=DEFAULT_BUFFERS, audio_path=None, output_args=None, dedup=True, vfr=False,
+                    pix_fmt=DEFAULT_PIX_FMT):
+    """Render and encode a clip with overlapping render/encode threads"""
+    if output_path and os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    temp_dir = tempfile.mkdtemp(prefix="pipelined_")
+    try:
+        if audio_path is None:
+            audio_path = write_audio_track(clip, temp_dir)
+
+        plan = None
+        if dedup:
+            plan = plan_duplicates(clip, fps, vfr=vfr)
+            print(plan.describe())
+
+        writer = PipelinedWriter(clip, fps, workers=workers, buffers=buffers, plan=plan, pix_fmt=pix_fmt)
+        video_args = plan.video_args(temp_dir) if plan is not None else None
+        cmd = build_ffmpeg_command(writer.size, fps, output_path, encoder, audio_path, output_args,
+                                   video_args=video_args, pix_fmt=writer.pix_fmt)
+        mode = "serialized render" if writer.serialize else f"{writer.workers} render threads"
+        print(f"⚙️  Pipelined encode: {writer.frame_count} frames, {mode}, "
+              f"{writer.buffer_count} {writer.pix_fmt} frame buffers")
+
+        start = time.perf_counter()
+        run_ffmpeg_pipe(cmd, writer.run)
+
+        stats = writer.stats(time.perf_counter() - start)
+        print(f"✅ Encoded {stats['frames']} frames ({stats['rendered_frames']} rendered) in "
+              f"{stats['wall_s']:.2f}s ({stats['fps']} fps) | "
+              f"encoder waited {stats['writer_stalls']}x ({stats['writer_stall_s']:.2f}s), "
+              f"renderers blocked {stats['backpressure_waits']}x ({stats['backpressure_s']:.2f}s)")
+        return stats
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def run_ffmpeg_pipe(cmd, write):
+    """Start ffmpeg, let write(stdin) feed it, and raise with its stderr on failure"""
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=stderr)
+        try:
+            write(process.stdin)
+        except BrokenPipeError:
+            pass
+        finally:
+            process.stdin.close()
+            returncode = process.wait()
+        if returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"ffmpeg failed ({returncode}): {stderr.read().decode(errors='replace')}")
+
+
+def write_frames(frames, output_path, fps, encoder=None, audio_path=None, output_args=None,
+                 audio_codec="copy", pix_fmt=DEFAULT_PIX_FMT):
+    """Encode a sequence of frames (RGB arrays or PIL images) through one ffmpeg pipe"""
+    if output_path and os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        return 0
+    first = as_rgb_frame(first)
+    size = (first.shape[1], first.shape[0])
+    # One reused buffer; frames already contiguous uint8 RGB are written as they are
+    converter = FrameConverter(size, pix_fmt)
+    cmd = build_ffmpeg_command(size, fps, output_path, encoder, audio_path, output_args,
+                               audio_codec, pix_fmt=converter.pix_fmt)
+    tracer = get_tracer()
+    written = 0
+
+    def write(stdin):
+        nonlocal written
+        for frame in chain([first], frames):
+            with tracer.measure("frame.encode"):
+                stdin.write(converter.convert(frame).data)
+            written += 1
+
+    run_ffmpeg_pipe(cmd, write)
+    return written
+
+
+def render_video(clip, output_path, fps, encoder, workers=DEFAULT_WORKERS, vfr=False, pix_fmt=DEFAULT_PIX_FMT):
+    """Encode with the pipelined writer, or MoviePy's write_videofile when workers is 0"""
+    if workers > 0:
+        return write_pipelined(clip, output_path, fps, encoder=encoder, workers=workers, vfr=vfr,
+                               pix_fmt=pix_fmt)
+
+    ignored = ["vfr"] * vfr + [f"pix_fmt={pix_fmt}"] * (pix_fmt != DEFAULT_PIX_FMT)
+    if ignored:
+        print(f"⚠️  MoviePy's writer (0 workers) encodes every RGB frame; ignoring {', '.join(ignored)}")
+    temp_dir = tempfile.mkdtemp(prefix="render_")
+    try:
+        # MoviePy muxes an audio file given here with -acodec copy
+        audio_path = write_audio_track(clip, temp_dir)
+        clip.write_videofile(
+            output_path,
+            fps=fps,
+            audio=audio_path or False,
+            **encoder.write_kwargs()
+        )
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return None
@@ -0,0 +1,123 @@
+"""
+Poster Frame Selection
+======================
+
+Picks the thumbnail of a finished video with OpenCLIP:
+- Candidates are a fixed budget of frames spread evenly over the video (one
+  per stratum, away from the fade-in/fade-out edges), so the cost does not
+  grow with the video length
+- Candidates are decoded at CLIP resolution inside ffmpeg
+  (FFmpegVideoSource), never at full size
+- The image tower encodes them in batches under torch.inference_mode
+- Each frame is scored against a poster prompt and the intro-text
+  embedding; the best one is extracted at full resolution as a JPEG
+
+Usage:
+    selector = PosterSelector(clip_model, preprocess, device="cpu")
+    poster_path, t, score = selector.write_poster("output/intro.mp4", intro_text)
+"""
+
+import os
+
+from PIL import Image
+
+from ffmpeg_tools import run_ffmpeg
+from ffmpeg_video_source import FFmpegVideoSource, probe_video
+
+# === Configuration ===
+FRAME_BUDGET = 24  # Candidate frames scored per video, whatever its length
+BATCH_SIZE = 8
+CANDIDATE_HEIGHT = 224  # CLIP's input size; frames are decoded at this height
+EDGE_MARGIN_S = 1.0  # Skip fades at the very start and end
+PROMPT_WEIGHT = 0.5  # Prompt vs intro-text similarity in the score
+POSTER_PROMPT = "a sharp, well lit portrait of a smiling person introducing themselves, with a clear title"
+POSTER_QUALITY = 2  # ffmpeg -q:v for the JPEG (2 = best)
+
+
+def candidate_times(duration, budget=FRAME_BUDGET, margin=EDGE_MARGIN_S):
+    """Midpoints of `budget` equal strata of the video, inside the edge margins"""
+    start, end = margin, duration - margin
+    if end <= start:
+        start, end = 0.0, duration
+    step = (end - start) / budget
+    return [start + (i + 0.5) * step for i in range(budget)]
+
+
+def candidate_size(size, height=CANDIDATE_HEIGHT):
+    """Even (width, height) at CLIP resolution, keeping the aspect ratio"""
+    width = int(round(size[0] * height / size[1] / 2)) * 2
+    return width, height
+
+
+def batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class PosterSelector:
+    """Scores low-resolution candidate frames with a loaded OpenCLIP model"""
+
+    def __init__(self, clip_model, preprocess, device="cpu", tokenizer=None, budget=FRAME_BUDGET,
+                 batch_size=BATCH_SIZE, prompt=POSTER_PROMPT, prompt_weight=PROMPT_WEIGHT):
+        import open_clip
+
+        self.model = clip_model.eval()
+        self.preprocess = preprocess
+        self.device = device
+        self.tokenizer = tokenizer or open_clip.tokenize
+        self.budget = budget
+        self.batch_size = batch_size
+        self.prompt = prompt
+        self.prompt_weight = prompt_weight
+
+    def encode_texts(self, texts):
+        """Normalized text embeddings (long texts are truncated by the tokenizer)"""
+        import torch
+
+        with torch.inference_mode():
+            features = self.model.encode_text(self.tokenizer(texts).to(self.device))
+        return features / features.norm(dim=-1, keepdim=True)
+
+    def encode_images(self, images):
+        """Normalized image embeddings, one batch at a time"""
+        import torch
+
+        embeddings = []
+        with torch.inference_mode():
+            for batch in batches(images, self.batch_size):
+                pixels = torch.stack([self.preprocess(image) for image in batch]).to(self.device)
+                features = self.model.encode_image(pixels)
+                embeddings.append(features / features.norm(dim=-1, keepdim=True))
+        return torch.cat(embeddings)
+
+    def load_candidates(self, video_path):
+        """Candidate times and their frames, decoded at CLIP resolution"""
+        source = FFmpegVideoSource(video_path, size=candidate_size(probe_video(video_path)["size"]))
+        try:
+            times = candidate_times(source.duration, self.budget)
+            # Times increase, so the source decodes forward and only seeks across long gaps
+            frames = [Image.fromarray(source.get_frame(t)) for t in times]
+        finally:
+            source.close()
+        return times, frames
+
+    def select(self, video_path, intro_text):
+        """(time, score) of the best poster frame, plus every candidate's score"""
+        times, frames = self.load_candidates(video_path)
+        image_features = self.encode_images(frames)
+        text_features = self.encode_texts([self.prompt, intro_text])
+
+        similarity = image_features @ text_features.T
+        scores = (self.prompt_weight * similarity[:, 0] + (1 - self.prompt_weight) * similarity[:, 1]).tolist()
+        best = max(range(len(times)), key=scores.__getitem__)
+        return times[best], scores[best], list(zip(times, scores))
+
+    def write_poster(self, video_path, intro_text, poster_path=None):
+        """Pick the best frame and save it at full resolution next to the video"""
+        poster_path = poster_path or os.path.splitext(video_path)[0] + "_poster.jpg"
+        t, score, candidates = self.select(video_path, intro_text)
+        run_ffmpeg(["-ss", f"{t:.3f}", "-i", video_path, "-frames:v", "1", "-update", "1",
+                    "-q:v", str(POSTER_QUALITY), poster_path])
+        print(f"🖼️  Poster frame at {t:.2f}s (score {score:.3f}, best of {len(candidates)} "
+              f"candidates): {poster_path}")
+        return poster_path, t, score
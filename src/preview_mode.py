@@ -0,0 +1,100 @@
+"""
+Low-Resolution Preview Mode
+===========================
+
+Render profiles that let a generator build its production timeline at a
+fraction of the resolution and frame rate:
+- Positions, font sizes and sprite canvases are scaled through the profile
+- Encoding uses libx264's ultrafast preset
+- Heavy inputs (AI lip-sync videos) are replaced by cached low-resolution proxies
+
+Usage:
+    python src/create_dynamic_video.py --preview
+    python src/enhance_ai_video.py --preview --preview-scale 0.5
+"""
+
+import os
+import hashlib
+
+from ffmpeg_tools import run_ffmpeg
+from render_trace import get_tracer
+
+# === Configuration ===
+PREVIEW_SCALE = 0.25
+PREVIEW_FPS = 8
+PREVIEW_PRESET = "ultrafast"
+PROXY_CACHE_DIR = os.path.join("output", ".cache", "proxies")
+
+
+class RenderProfile:
+    """Resolution, frame rate and encoder settings a timeline is rendered with"""
+
+    def __init__(self, scale=1.0, fps=24, preset="medium", name="final"):
+        self.scale = scale
+        self.fps = fps
+        self.preset = preset
+        self.name = name
+
+    @property
+    def is_preview(self):
+        return self.name == "preview"
+
+    def px(self, value):
+        """Scale a layout value in pixels (position, offset, canvas size)"""
+        if self.scale == 1.0:
+            # Unscaled values pass through, so MoviePy truncates float positions as it always has
+            return value
+        return int(round(value * self.scale))
+
+    def size(self, size):
+        """Scale a (width, height) size, keeping dimensions even for yuv420p"""
+        return (max(2, int(self.px(size[0])) // 2 * 2), max(2, int(self.px(size[1])) // 2 * 2))
+
+    def fontsize(self, fontsize):
+        return max(6, self.px(fontsize))
+
+    def output_path(self, path):
+        """Preview renders never overwrite the final output"""
+        if not self.is_preview:
+            return path
+        root, ext = os.path.splitext(path)
+        return f"{root}_preview{ext}"
+
+
+FINAL_PROFILE = RenderProfile()
+
+
+def preview_profile(scale=PREVIEW_SCALE, fps=PREVIEW_FPS):
+    """Profile for fast layout previews"""
+    return RenderProfile(scale=scale, fps=fps, preset=PREVIEW_PRESET, name="preview")
+
+
+def publish_profile(height, base_height=720, fps=24):
+    """Final-quality profile laying the timeline out at a larger size (top of a publish ladder)"""
+    return RenderProfile(scale=height / base_height, fps=fps, name="publish")
+
+
+def cached_proxy(video_path, size, fps, cache_dir=PROXY_CACHE_DIR):
+    """Low-resolution proxy of a heavy input video, transcoded once and cached"""
+    stat = os.stat(video_path)
+    key = f"{os.path.abspath(video_path)}:{stat.st_size}:{stat.st_mtime_ns}:{size}:{fps}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    proxy_path = os.path.join(cache_dir, f"{digest}_{size[0]}x{size[1]}.mp4")
+
+    hit = os.path.exists(proxy_path)
+    get_tracer().cache("preview_proxy", hit)
+    if hit:
+        return proxy_path
+
+    print(f"🪶 Creating {size[0]}x{size[1]} proxy of {video_path}...")
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_path = f"{proxy_path}.{os.getpid()}.tmp.mp4"
+    run_ffmpeg([
+        "-i", video_path,
+        "-vf", f"scale={size[0]}:{size[1]}", "-r", str(fps),
+        "-c:v", "libx264", "-preset", PREVIEW_PRESET, "-crf", "30",
+        "-c:a", "aac", "-b:a", "96k",
+        temp_path
+    ])
+    os.replace(temp_path, proxy_path)
+    return proxy_path
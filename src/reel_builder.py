@@ -0,0 +1,366 @@
+"""
+Stream-Copy Reel Builder
+========================
+
+Joins rendered intros into one team reel without re-rendering them:
+- Probes every input's stream parameters from ffmpeg's own header dump
+  (codec, profile, pixel format, size, frame rate, time base, audio layout)
+- The reel takes the most common parameters, so most inputs are joined with
+  the concat demuxer as pure stream copy
+- Only inputs that differ are conformed to the reel: video and audio are
+  checked separately, so an input whose video already matches keeps it and
+  only has its audio re-encoded
+- Conformed inputs and title cards are cached in output/.cache/reel by
+  content hash, so rebuilding a reel re-encodes nothing
+- Optional title cards (the intro's name on a plain background) are encoded
+  once in the reel's parameters and inserted before each intro
+
+Usage:
+    python src/reel_builder.py output/*.mp4 --output output/team_reel.mp4 --titles
+    build_reel(["output/a.mp4", "output/b.mp4"], "output/team_reel.mp4")
+"""
+
+import os
+import re
+import glob
+import time
+import hashlib
+import tempfile
+import subprocess
+from collections import Counter
+
+from PIL import Image, ImageDraw
+
+from ffmpeg_tools import ffmpeg_binary, run_ffmpeg
+from render_cache import file_digest
+from text_layout import load_font, layout_text, draw_lines
+from audio_track_cache import AUDIO_BITRATE
+from resource_governor import core_budget, ffmpeg_global_args
+
+# === Configuration ===
+REEL_INPUTS = os.path.join("output", "*.mp4")
+REEL_OUTPUT = os.path.join("output", "team_reel.mp4")
+REEL_CACHE_DIR = os.path.join("output", ".cache", "reel")
+CONFORM_PRESET = "veryfast"
+CONFORM_CRF = 20
+TITLE_CARD_SECONDS = 2.0
+TITLE_FONT_PATH = "arial.ttf"
+TITLE_FONT_SIZE = 64
+TITLE_BACKGROUND = (20, 24, 40)
+TITLE_COLOR = "white"
+
+# ffmpeg's profile names (as printed in the header dump) -> libx264 -profile:v
+X264_PROFILES = {"Constrained Baseline": "baseline", "Baseline": "baseline", "Main": "main",
+                 "High": "high", "High 10": "high10", "High 4:2:2": "high422",
+                 "High 4:4:4 Predictive": "high444"}
+DURATION_PATTERN = re.compile(r"Duration: (\d+):(\d+):([0-9.]+)")
+STREAM_PATTERN = re.compile(r"Stream #\d+:\d+\S*: (Video|Audio): (.*)")
+
+
+def split_fields(text):
+    """Split a stream description on the commas outside parentheses and brackets"""
+    fields, depth, start = [], 0, 0
+    for i, char in enumerate(text):
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            fields.append(text[start:i].strip())
+            start = i + 1
+    fields.append(text[start:].strip())
+    return fields
+
+
+def parse_codec(field):
+    """'h264 (High) (avc1 / 0x31637661)' -> ('h264', 'High')"""
+    codec = field.split()[0]
+    profiles = [group for group in re.findall(r"\(([^)]*)\)", field) if "/" not in group]
+    return codec, profiles[0] if profiles else None
+
+
+def parse_video_stream(description):
+    fields = split_fields(description)
+    codec, profile = parse_codec(fields[0])
+    info = {"codec": codec, "profile": profile, "pix_fmt": None, "size": None, "fps": None, "tbn": None}
+    for field in fields[1:]:
+        size = re.match(r"(\d+)x(\d+)", field)
+        if size and info["size"] is None:
+            info["size"] = (int(size.group(1)), int(size.group(2)))
+        elif field.endswith(" fps"):
+            info["fps"] = field[:-4]
+        elif field.endswith(" tbn"):
+            info["tbn"] = field[:-4]
+        elif info["pix_fmt"] is None and info["size"] is None:
+            info["pix_fmt"] = field.split("(")[0]
+    return info
+
+
+def parse_audio_stream(description):
+    fields = split_fields(description)
+    codec, profile = parse_codec(fields[0])
+    info = {"codec": codec, "profile": profile, "rate": None, "layout": None}
+    for field in fields[1:]:
+        if field.endswith(" Hz"):
+            info["rate"] = int(field[:-3])
+        elif info["rate"] is not None and info["layout"] is None:
+            info["layout"] = field
+    return info
+
+
+def probe_clip(path):
+    """Stream parameters of the first video and audio stream, parsed from `ffmpeg -i`"""
+    result = subprocess.run([ffmpeg_binary(), "-hide_banner", "-i", path],
+                            capture_output=True)
+    header = result.stderr.decode(errors="replace")
+
+    video = audio = duration = None
+    match = DURATION_PATTERN.search(header)
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    for kind, description in STREAM_PATTERN.findall(header):
+        if kind == "Video" and video is None:
+            video = parse_video_stream(description)
+        elif kind == "Audio" and audio is None:
+            audio = parse_audio_stream(description)
+
+    if video is None or video["size"] is None or not duration:
+        raise RuntimeError(f"No video stream or duration in {path}")
+    return {"path": path, "duration": duration, "video": video, "audio": audio}
+
+
+def video_signature(info):
+    video = info["video"]
+    return (video["codec"], video["profile"], video["pix_fmt"], video["size"], video["fps"], video["tbn"])
+
+
+def audio_signature(info):
+    audio = info["audio"]
+    if audio is None:
+        return None
+    return (audio["codec"], audio["profile"], audio["rate"], audio["layout"])
+
+
+class ReelProfile:
+    """Stream parameters every part of the reel must share to be stream-copied"""
+
+    def __init__(self, video, audio):
+        self.video = video
+        self.audio = audio
+
+    @classmethod
+    def from_clips(cls, infos):
+        """The most common parameters among the inputs, so the fewest need re-encoding"""
+        counts = Counter((video_signature(info), audio_signature(info)) for info in infos)
+        video, audio = counts.most_common(1)[0][0]
+        if video[0] != "h264":
+            raise RuntimeError(f"Reels are H.264; most inputs are {video[0]}")
+        return cls(video, audio)
+
+    @property
+    def size(self):
+        return self.video[3]
+
+    @property
+    def fps(self):
+        return self.video[4]
+
+    def key(self):
+        return repr((self.video, self.audio))
+
+    def video_args(self):
+        """libx264 settings that reproduce the reel's video parameters"""
+        codec, profile, pix_fmt, (width, height), fps, tbn = self.video
+        vf = (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+              f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={fps},format={pix_fmt}")
+        args = ["-vf", vf, "-c:v", "libx264", "-preset", CONFORM_PRESET, "-crf", str(CONFORM_CRF),
+                "-pix_fmt", pix_fmt, "-threads", str(core_budget())]
+        if profile in X264_PROFILES:
+            args += ["-profile:v", X264_PROFILES[profile]]
+        return args + self.timescale_args()
+
+    def timescale_args(self):
+        """Keep the reel's track time base, so copied and re-encoded parts share it"""
+        tbn = self.video[5]
+        if not tbn:
+            return []
+        # ffmpeg abbreviates round time bases, e.g. '90k'
+        timescale = int(float(tbn[:-1]) * 1000) if tbn.endswith("k") else int(float(tbn))
+        return ["-video_track_timescale", str(timescale)]
+
+    def audio_args(self, duration):
+        """AAC settings that reproduce the reel's audio parameters, padded with silence to duration"""
+        if self.audio is None:
+            return ["-an"]
+        codec, profile, rate, layout = self.audio
+        # A fixed pad length (not apad + -shortest, which never ends when video is copied)
+        return ["-af", f"aresample={rate},aformat=channel_layouts={layout},apad=whole_dur={duration:.6f}",
+                "-c:a", "aac", "-b:a", AUDIO_BITRATE]
+
+    def describe(self):
+        codec, profile, pix_fmt, (width, height), fps, tbn = self.video
+        audio = f"{self.audio[0]} {self.audio[2]} Hz {self.audio[3]}" if self.audio else "no audio"
+        return f"{codec} ({profile}) {pix_fmt} {width}x{height} @ {fps} fps, {audio}"
+
+
+def cache_path(cache_dir, kind, key):
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{kind}_{digest}.mp4")
+
+
+def encode_cached(path, args):
+    """Run an encode into path via a temporary name, unless path is already cached"""
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp.mp4"
+    try:
+        run_ffmpeg([*ffmpeg_global_args(), *args, "-movflags", "+faststart", temp_path])
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return path
+
+
+def conform_clip(info, profile, cache_dir=REEL_CACHE_DIR):
+    """Re-encode the parts of a clip that differ from the reel profile; matching video is copied"""
+    copy_video = video_signature(info) == profile.video
+    key = f"{file_digest(info['path'])}:{profile.key()}"
+    path = cache_path(cache_dir, "conformed", key)
+    if os.path.exists(path):
+        print(f"🔁 Reusing conformed {info['path']}")
+        return path
+    print(f"🔧 Conforming {info['path']} to the reel profile" + (" (audio only)" if copy_video else ""))
+
+    args = ["-i", info["path"]]
+    if profile.audio is not None and info["audio"] is None:
+        # Silent track so the reel's audio stays continuous across this clip
+        codec, _, rate, layout = profile.audio
+        args += ["-f", "lavfi", "-i", f"anullsrc=r={rate}:cl={layout}"]
+        args += ["-map", "0:v:0", "-map", "1:a:0"]
+    else:
+        args += ["-map", "0:v:0"] + (["-map", "0:a:0"] if profile.audio is not None else [])
+    args += ["-c:v", "copy"] if copy_video else profile.video_args()
+    # The padded or generated audio ends with the video
+    args += profile.audio_args(info["duration"]) + ["-t", f"{info['duration']:.6f}"]
+    if copy_video:
+        args += profile.timescale_args()
+    return encode_cached(path, args)
+
+
+def title_card(text, profile, seconds=TITLE_CARD_SECONDS, cache_dir=REEL_CACHE_DIR):
+    """Title card video in the reel's parameters, encoded once per text and profile"""
+    path = cache_path(cache_dir, "title", f"{text}:{seconds}:{profile.key()}")
+    if os.path.exists(path):
+        return path
+
+    width, height = profile.size
+    image = Image.new("RGB", (width, height), TITLE_BACKGROUND)
+    font = load_font(TITLE_FONT_PATH, TITLE_FONT_SIZE)
+    lines = layout_text(text, font, max_width=int(width * 0.8), box=(width, height))
+    draw_lines(ImageDraw.Draw(image), lines, font, fill=TITLE_COLOR)
+
+    with tempfile.TemporaryDirectory(prefix="title_card_") as temp_dir:
+        image_path = os.path.join(temp_dir, "card.png")
+        image.save(image_path)
+        args = ["-loop", "1", "-framerate", profile.fps, "-i", image_path]
+        if profile.audio is not None:
+            codec, _, rate, layout = profile.audio
+            args += ["-f", "lavfi", "-i", f"anullsrc=r={rate}:cl={layout}"]
+        args += ["-t", f"{seconds:.3f}"] + profile.video_args() + profile.audio_args(seconds)
+        return encode_cached(path, args)
+
+
+def title_text(path):
+    """'output/shrikanth_intro.mp4' -> 'Shrikanth Intro'"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name.replace("_", " ").replace("-", " ").title()
+
+
+def concat_escape(path):
+    return "'" + os.path.abspath(path).replace("'", "'\\''") + "'"
+
+
+def concat_parts(parts, output_path):
+    """Join parts that share stream parameters with the concat demuxer, copying every stream"""
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", suffix=".ffconcat", delete=False, encoding="utf-8") as f:
+        f.write("ffconcat version 1.0\n")
+        for part in parts:
+            f.write(f"file {concat_escape(part)}\n")
+        list_path = f.name
+    try:
+        run_ffmpeg(["-f", "concat", "-safe", "0", "-i", list_path,
+                    "-map", "0", "-c", "copy", "-movflags", "+faststart", output_path])
+    finally:
+        os.remove(list_path)
+
+
+def build_reel(inputs, output_path=REEL_OUTPUT, titles=False, title_seconds=TITLE_CARD_SECONDS,
+               cache_dir=REEL_CACHE_DIR):
+    """Concatenate rendered intros into one reel, re-encoding only the inputs that do not match"""
+    start = time.perf_counter()
+    infos = [probe_clip(path) for path in inputs]
+    if not infos:
+        raise RuntimeError("No input videos for the reel")
+
+    profile = ReelProfile.from_clips(infos)
+    print(f"🎞️  Reel profile: {profile.describe()}")
+
+    parts = []
+    copied = conformed = cards = 0
+    for info in infos:
+        if titles:
+            parts.append(title_card(title_text(info["path"]), profile, title_seconds, cache_dir))
+            cards += 1
+        if video_signature(info) == profile.video and audio_signature(info) == profile.audio:
+            parts.append(info["path"])
+            copied += 1
+        else:
+            parts.append(conform_clip(info, profile, cache_dir))
+            conformed += 1
+
+    concat_parts(parts, output_path)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Reel saved: {output_path} ({len(infos)} intros: {copied} stream-copied, "
+          f"{conformed} conformed, {cards} title cards) in {elapsed:.1f}s")
+    return output_path
+
+
+def main(argv=None):
+    """Main function"""
+    import argparse
+    from resource_governor import govern, add_governor_arguments
+
+    parser = argparse.ArgumentParser(description='Join rendered intros into a reel without re-rendering')
+    parser.add_argument('inputs', nargs='*', help=f'Intro videos in reel order (default: {REEL_INPUTS})')
+    parser.add_argument('--output', default=REEL_OUTPUT, help='Reel output path')
+    parser.add_argument('--titles', action='store_true', help='Insert a title card before each intro')
+    parser.add_argument('--title-seconds', type=float, default=TITLE_CARD_SECONDS,
+                        help='Title card duration in seconds')
+    parser.add_argument('--cache-dir', default=REEL_CACHE_DIR,
+                        help='Where conformed intros and title cards are kept')
+    add_governor_arguments(parser)
+    args = parser.parse_args(argv)
+
+    govern(args.cores, args.pin)
+
+    inputs = args.inputs or sorted(glob.glob(REEL_INPUTS))
+    output = os.path.abspath(args.output)
+    # Skip the reel itself and renders still in progress
+    inputs = [path for path in inputs
+              if os.path.abspath(path) != output and not path.endswith((".partial.mp4", ".tmp.mp4"))]
+
+    try:
+        build_reel(inputs, args.output, titles=args.titles, title_seconds=args.title_seconds,
+                   cache_dir=args.cache_dir)
+    except Exception as e:
+        print(f"❌ Reel failed: {e}")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Render Result Cache
+===================
+
+Whole-output cache for repeated intro requests:
+- The key is a SHA-256 over a canonical JSON of everything that shapes the
+  video: input file contents (not paths or timestamps), template parameters,
+  model names, library versions and the source of every script in src/
+- A hit copies the cached MP4 to the requested output path without
+  rendering anything; never a hard link, since a later render to that path
+  would rewrite the shared file (and the cache entry with it)
+- Concurrent identical requests coalesce: the first takes a lock file and
+  renders, the others wait on the lock and then take the cached result
+- Renders go to a partial file that is renamed into place, so a crash
+  never leaves a truncated MP4 in the cache or at the output path
+- The cache is bounded in size; least recently used outputs are evicted
+
+Usage:
+    cache = RenderCache(default_cache_dir(OUTPUT_PATH))
+    key = render_key([PHOTO_PATH, VOICE_PATH, TEXT_PATH], {"size": VIDEO_SIZE, "fps": 24})
+    cache.fetch_or_render(key, render, OUTPUT_PATH)   # render(path) writes the MP4
+    render_atomically(render, OUTPUT_PATH)            # no cache: still never a truncated output
+"""
+
+import os
+import glob
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+from ffmpeg_tools import ffmpeg_binary
+from render_trace import get_tracer
+
+# === Configuration ===
+CACHE_DIR_NAME = ".render_cache"
+MAX_CACHE_MB = 2048
+LOCK_POLL_S = 0.5
+LOCK_HEARTBEAT_S = 5.0
+LOCK_STALE_S = 60.0  # A lock not refreshed for this long belongs to a crashed render
+HASH_CHUNK = 1024 * 1024
+MEGABYTE = 1024 * 1024
+LIBRARIES = ("moviepy", "numpy", "cv2", "PIL")
+
+
+def default_cache_dir(output_path):
+    """Cache directory next to the output folder"""
+    return os.path.join(os.path.dirname(os.path.abspath(output_path)), CACHE_DIR_NAME)
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def canonical(value):
+    """JSON text that is identical for equal parameters (sorted keys, tuples as lists)"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def code_version(source_dir=None):
+    """Digest of every script in src/, so any code change misses the cache"""
+    source_dir = source_dir or os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(source_dir, "*.py"))):
+        digest.update(os.path.basename(path).encode())
+        digest.update(file_digest(path).encode())
+    return digest.hexdigest()
+
+
+def library_versions(names=LIBRARIES):
+    versions = {}
+    for name in names:
+        try:
+            module = __import__(name)
+            versions[name] = getattr(module, "__version__", "unknown")
+        except ImportError:
+            versions[name] = None
+    versions["ffmpeg"] = os.path.basename(ffmpeg_binary())
+    return versions
+
+
+def render_key(files, params, code=None):
+    """Canonical hash of the input files' contents, template parameters and code/library versions"""
+    description = {
+        "files": [file_digest(path) if path and os.path.exists(path) else None for path in files],
+        "params": params,
+        "code": code or code_version(),
+        "libraries": library_versions(),
+    }
+    return hashlib.sha256(canonical(description).encode()).hexdigest()
+
+
+def partial_path(path):
+    """Per-process partial file next to path, keeping the extension for ffmpeg's muxer"""
+    root, extension = os.path.splitext(path)
+    return f"{root}.{os.getpid()}.partial{extension}"
+
+
+def render_atomically(render, output_path):
+    """render(path) into a partial file, renamed to output_path only once it succeeds"""
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    temp_path = partial_path(output_path)
+    try:
+        result = render(temp_path)
+        if result is not False and os.path.exists(temp_path):
+            os.replace(temp_path, output_path)
+        return result
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+class RenderLock:
+    """Exclusive lock file, refreshed by a heartbeat thread while the render runs"""
+
+    def __init__(self, path):
+        self.path = path
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.waited_s = 0.0
+
+    def try_acquire(self):
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            f.write(f"{os.getpid()} {time.time():.0f}\n")
+        return True
+
+    def is_stale(self):
+        try:
+            return time.time() - os.path.getmtime(self.path) > LOCK_STALE_S
+        except OSError:
+            return False  # Released in the meantime
+
+    def acquire(self):
+        """Block until the lock is ours; returns True if another render held it meanwhile"""
+        start = time.perf_counter()
+        waited = False
+        while not self.try_acquire():
+            if not waited:
+                print("⏳ Identical render in progress, waiting for its result...")
+                waited = True
+            if self.is_stale():
+                print(f"⚠️  Removing stale render lock: {self.path}")
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+                continue
+            time.sleep(LOCK_POLL_S)
+        self.waited_s = time.perf_counter() - start
+        self.thread = threading.Thread(target=self.heartbeat, daemon=True, name="render-lock")
+        self.thread.start()
+        return waited
+
+    def heartbeat(self):
+        while not self.stop_event.wait(LOCK_HEARTBEAT_S):
+            try:
+                os.utime(self.path)
+            except OSError:
+                pass
+
+    def release(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class RenderCache:
+    """Finished MP4s keyed by render_key, with lock-file coalescing and LRU eviction"""
+
+    def __init__(self, cache_dir, max_mb=MAX_CACHE_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * MEGABYTE)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.mp4")
+
+    def lookup(self, key):
+        """Cached MP4 of a key (marked as recently used), or None"""
+        path = self.entry_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def publish(self, path, output_path):
+        """Copy a cached MP4 to the output path, replacing it atomically"""
+        if os.path.dirname(output_path):
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        temp_path = f"{output_path}.{os.getpid()}.tmp"
+        try:
+            # A copy, not a hard link: the output must not share the entry's data
+            shutil.copy2(path, temp_path)
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def fetch(self, key, output_path):
+        """Publish a cached result if there is one; True on a hit"""
+        path = self.lookup(key)
+        get_tracer().cache("render", path is not None)
+        if path is None:
+            return False
+        self.publish(path, output_path)
+        print(f"⚡ Render cache hit ({key[:12]}): {output_path}")
+        return True
+
+    def fetch_or_render(self, key, render, output_path):
+        """Cached result, or render(path) once for all concurrent identical requests"""
+        if self.fetch(key, output_path):
+            return True
+        return self.render_once(key, render, output_path)
+
+    def render_once(self, key, render, output_path):
+        """After a missed fetch: render(path) once for all concurrent identical requests"""
+        lock = RenderLock(self.entry_path(key) + ".lock")
+        waited = lock.acquire()
+        try:
+            # Whoever held the lock may have rendered exactly this
+            path = self.lookup(key)
+            if path is not None:
+                self.publish(path, output_path)
+                print(f"⚡ Joined an identical render ({key[:12]}, waited {lock.waited_s:.1f}s): {output_path}")
+                return True
+            if waited:
+                print("⚠️  The other render did not finish; rendering here")
+
+            result = render_atomically(render, self.entry_path(key))
+            if result is False or not os.path.exists(self.entry_path(key)):
+                return result
+        finally:
+            lock.release()
+
+        self.publish(self.entry_path(key), output_path)
+        self.evict(keep=key)
+        return result
+
+    def entries(self):
+        """(path, size, last use) of every cached MP4, oldest first"""
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, "*.mp4")):
+            if path.endswith(".partial.mp4"):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self, keep=None):
+        """Delete least recently used outputs until the cache fits its size bound"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if keep and os.path.basename(path) == f"{keep}.mp4":
+                continue
+            if os.path.exists(path + ".lock"):
+                continue  # Being re-rendered right now
+            try:
+                os.remove(path)  # Published outputs are copies
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        if evicted:
+            print(f"🧹 Render cache: evicted {evicted} old output(s), {total / MEGABYTE:.0f} MB kept")
+        return evicted
@@ -0,0 +1,300 @@
+"""
+Render Cost Planner
+===================
+
+Dry-run estimator for the video generators. Loads only metadata (audio
+duration, photo size, sentence count, template layers), builds the timeline
+without rendering and estimates:
+- Number of frames
+- Layer area blended per frame
+- Peak memory
+- Wall time, from calibrated per-operation costs
+
+Usage:
+    python src/create_dynamic_video.py --plan
+    python src/render_planner.py --template dynamic --photo assets/photo.png \\
+        --audio assets/voice_recording.wav --text assets/intro_text.txt --memory-budget 2048
+    python src/render_planner.py --calibrate benchmarks/results.json
+"""
+
+import os
+import sys
+import json
+import wave
+
+from render_timeline import build_timeline, TEMPLATES
+
+# === Configuration ===
+CALIBRATION_PATH = os.path.join("benchmarks", "calibration.json")
+MEGAPIXEL = 1_000_000
+MEGABYTE = 1024 * 1024
+# Frame buffers of the intro generator, mirrored so planning imports no render module
+FRAME_MEMORY_MB = 512  # frame_store.MEMORY_BUDGET_MB: RAM for frames before they spill to disk
+RING_SLOTS = 8  # shm_frame_ring.DEFAULT_SLOTS: shared-memory slots with --workers
+AI_ANIMATION_FRAMES = 30  # Photo frames the AI fallback animation keeps
+
+# Seconds per megapixel (or per item) on a reference CPU core.
+# Overridden by a calibration file derived from benchmark_pipeline.py results.
+DEFAULT_COSTS = {
+    "background.dynamic_gradient": 0.0002,  # frame bank lookup (background_library.py)
+    "background.professional_wave": 0.0002,
+    "background.neural": 0.04,  # lossless RGB decode of the library clip
+    "photo.zoom": 0.004,  # cv2/PIL resize of the working-size photo
+    "video.decode": 0.006,  # ffmpeg decode + scale to frame size
+    "blend.opaque": 0.002,  # opaque blit
+    "blend.masked": 0.020,  # float mask blend of a transparent sprite
+    "encode.libx264": 0.045,  # default preset
+    "sprite.render": 0.004,  # per sprite, one-off PIL text rendering
+    "photo.decode": 0.030,  # per source megapixel, one-off
+    "model.load": 25.0,  # seconds, one-off for the AI template
+}
+
+# Resident memory of an idle process per template, in MB
+BASE_MEMORY_MB = {
+    "basic": 250,
+    "dynamic": 250,
+    "enhanced": 300,
+    "ai": 2500,  # torch + OpenCLIP + ModelScope
+    "intro": 600,  # MediaPipe + librosa
+}
+
+
+# ====================== Metadata ======================
+def audio_duration(audio_path):
+    """Audio duration from the file header (no decoding for WAV)"""
+    if audio_path.lower().endswith(".wav"):
+        with wave.open(audio_path, "rb") as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    return video_metadata(audio_path)["duration"]
+
+
+def video_metadata(path):
+    """Duration, size and fps of a media file via `ffmpeg -i` (no decoding)"""
+    from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+    infos = ffmpeg_parse_infos(path)
+    return {
+        "duration": infos["duration"],
+        "size": tuple(infos.get("video_size") or ()),
+        "fps": infos.get("video_fps"),
+    }
+
+
+def photo_size(photo_path):
+    """Photo size from the image header, after EXIF orientation"""
+    from asset_ingest import oriented_size
+
+    return oriented_size(photo_path)
+
+
+def load_sentences(text_path):
+    """Sentences the generators will show (same split as their load_intro_text)"""
+    with open(text_path, "r", encoding="utf-8") as f:
+        text = f.read().strip()
+    return [s.strip() for s in text.replace('\n', ' ').split('.') if s.strip()]
+
+
+def load_costs(calibration_path=CALIBRATION_PATH):
+    """Default per-operation costs, overridden by a calibration file if present"""
+    costs = dict(DEFAULT_COSTS)
+    if calibration_path and os.path.exists(calibration_path):
+        with open(calibration_path, "r", encoding="utf-8") as f:
+            costs.update(json.load(f).get("costs", {}))
+    return costs
+
+
+# ====================== Estimation ======================
+def layer_frame_cost(layer, frame_size, costs):
+    """Seconds to produce and blend one frame of a layer"""
+    megapixels = layer.visible_area(frame_size) / MEGAPIXEL
+    cost = 0.0
+
+    if layer.kind == "background":
+        cost += costs.get(f"background.{layer.source}", costs["background.dynamic_gradient"]) * megapixels
+    elif layer.kind == "photo" and layer.motion is not None:
+        cost += costs["photo.zoom"] * layer.area / MEGAPIXEL
+    elif layer.kind == "video":
+        cost += costs["video.decode"] * layer.area / MEGAPIXEL
+
+    blend = "blend.opaque" if layer.opaque else "blend.masked"
+    cost += costs[blend] * megapixels
+    return cost
+
+
+def estimate_memory_mb(timeline, source_photo_size, frames_in_memory):
+    """Peak memory: process baseline + sprites + working frames + in-memory frame lists"""
+    width, height = timeline.size
+    frame_mb = width * height * 3 / MEGAPIXEL
+
+    # Trimmed RGB sprite in the atlas plus its float64 alpha mask
+    sprite_mb = sum(layer.area * (3 + 8) for layer in timeline.layers if layer.kind == "sprite") / MEGAPIXEL
+    # Decoded source photo plus its working-size copy
+    photo_mb = 0.0
+    if source_photo_size:
+        photo_mb = source_photo_size[0] * source_photo_size[1] * 3 / MEGAPIXEL + frame_mb
+    # Compositing keeps a few full frames alive (background, blend temporaries, output)
+    working_mb = 6 * frame_mb
+    # Frame lists held in memory before encoding
+    frames_mb = frames_in_memory * frame_mb
+
+    return BASE_MEMORY_MB.get(timeline.template, 250) + sprite_mb + photo_mb + working_mb + frames_mb
+
+
+def buffered_frames(timeline, workers=0, frame_memory_mb=FRAME_MEMORY_MB):
+    """Rendered frames a generator holds in memory at once"""
+    if timeline.template == "ai":
+        return AI_ANIMATION_FRAMES
+    if timeline.template != "intro":
+        return 0
+    if workers > 0:
+        # Worker processes render into a fixed ring of shared-memory slots
+        return max(RING_SLOTS, workers + 1)
+    # The frame store keeps frames in RAM up to its budget and spills the rest to disk
+    frame_bytes = timeline.size[0] * timeline.size[1] * 3
+    return min(timeline.frame_count, int(frame_memory_mb * MEGABYTE / frame_bytes))
+
+
+def plan_timeline(timeline, costs=None, source_photo_size=None, workers=0, frame_memory_mb=FRAME_MEMORY_MB):
+    """Estimate frames, blend area, memory and wall time of a timeline"""
+    costs = costs or load_costs()
+    frame_size = timeline.size
+    frame_mp = frame_size[0] * frame_size[1] / MEGAPIXEL
+
+    render_s = 0.0
+    blend_areas = []
+    culled = 0
+    for t in timeline.frame_times():
+        # CulledCompositeVideoClip never renders layers under a full-frame opaque layer
+        visible = timeline.rendered_layers(t)
+        culled += len(timeline.visible_layers(t)) - len(visible)
+        blend_areas.append(sum(layer.visible_area(frame_size) for layer in visible))
+        render_s += sum(layer_frame_cost(layer, frame_size, costs) for layer in visible)
+
+    frames = timeline.frame_count
+    encode_s = costs["encode.libx264"] * frame_mp * frames
+    sprites = [layer for layer in timeline.layers if layer.kind == "sprite"]
+    setup_s = costs["sprite.render"] * len(sprites)
+    if source_photo_size:
+        setup_s += costs["photo.decode"] * source_photo_size[0] * source_photo_size[1] / MEGAPIXEL
+    if timeline.template == "ai":
+        setup_s += costs["model.load"]
+
+    return {
+        "template": timeline.template,
+        "size": list(frame_size),
+        "fps": timeline.fps,
+        "duration_s": round(timeline.duration, 3),
+        "frames": frames,
+        "layers": len(timeline.layers),
+        "culled_layer_frames": culled,
+        "blend_mpx_per_frame": {
+            "mean": round(sum(blend_areas) / max(1, frames) / MEGAPIXEL, 3),
+            "max": round(max(blend_areas, default=0) / MEGAPIXEL, 3),
+        },
+        "peak_memory_mb": round(estimate_memory_mb(timeline, source_photo_size,
+                                                   buffered_frames(timeline, workers, frame_memory_mb))),
+        "wall_time_s": {
+            "setup": round(setup_s, 2),
+            "render": round(render_s, 2),
+            "encode": round(encode_s, 2),
+            "total": round(setup_s + render_s + encode_s, 2),
+        },
+    }
+
+
+def plan_render(template, photo_path=None, audio_path=None, text_path=None,
+                lipsync_path=None, calibration_path=CALIBRATION_PATH, workers=0, frame_memory_mb=FRAME_MEMORY_MB):
+    """Plan a render from the job's input files (metadata only)"""
+    if template == "enhanced":
+        duration = video_metadata(lipsync_path)["duration"]
+    else:
+        duration = audio_duration(audio_path)
+
+    sentences = load_sentences(text_path) if text_path else []
+    source_size = photo_size(photo_path) if photo_path and template != "enhanced" else None
+
+    timeline = build_timeline(template, duration, sentences=sentences, photo_size=source_size,
+                              photo_path=photo_path, lipsync_path=lipsync_path)
+    plan = plan_timeline(timeline, load_costs(calibration_path), source_size, workers, frame_memory_mb)
+    plan["sentences"] = len(sentences)
+    return plan
+
+
+def print_plan(plan, memory_budget_mb=None):
+    """Print a plan as JSON and check it against a memory budget"""
+    fits = memory_budget_mb is None or plan["peak_memory_mb"] <= memory_budget_mb
+    plan = dict(plan, memory_budget_mb=memory_budget_mb, fits_budget=fits)
+    print(json.dumps(plan, indent=2))
+    if not fits:
+        print(f"❌ Estimated peak memory {plan['peak_memory_mb']} MB exceeds budget "
+              f"{memory_budget_mb} MB", file=sys.stderr)
+    return fits
+
+
+# ====================== Calibration ======================
+def calibrate(results_path, output_path=CALIBRATION_PATH):
+    """Derive per-operation costs from benchmark_pipeline.py results at 720p"""
+    with open(results_path, "r", encoding="utf-8") as f:
+        results = json.load(f)["results"]
+
+    frame_mp = 1280 * 720 / MEGAPIXEL
+    mapping = {
+        "background.dynamic_gradient": ("dynamic.background.make_frame@720p", frame_mp),
+        "background.professional_wave": ("enhance.background.make_frame@720p", frame_mp),
+        "background.neural": ("ai.background.make_frame@720p", frame_mp),
+        "photo.zoom": ("dynamic.zoom_effect@720p", frame_mp),
+        # benchmark_pipeline.encode_clip writes 48 frames
+        "encode.libx264": ("write_videofile.libx264@720p", 48 * frame_mp),
+        "sprite.render": ("dynamic.create_text_image_pil@720p", 1),
+    }
+
+    costs = {}
+    for key, (benchmark, units) in mapping.items():
+        if benchmark in results:
+            costs[key] = results[benchmark]["median_s"] / units
+
+    # compositing@720p blends six 1180x100 masked sprites over opaque layers
+    if "compositing@720p" in results:
+        sprite_mp = 6 * 1180 * 100 / MEGAPIXEL
+        costs["blend.masked"] = results["compositing@720p"]["median_s"] / sprite_mp
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({"source": results_path, "costs": costs}, f, indent=2)
+    print(f"✅ Calibrated {len(costs)} costs: {output_path}")
+    return costs
+
+
+def main():
+    """Main function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Estimate the cost of a render without rendering')
+    parser.add_argument('--template', choices=TEMPLATES, default='dynamic', help='Template to plan')
+    parser.add_argument('--photo', help='Photo path')
+    parser.add_argument('--audio', help='Voice recording path')
+    parser.add_argument('--text', help='Intro text path')
+    parser.add_argument('--lipsync', help='Lip-sync base video (enhanced template)')
+    parser.add_argument('--memory-budget', type=float, default=None, help='Reject plans above this many MB')
+    parser.add_argument('--calibration', default=CALIBRATION_PATH, help='Calibration JSON')
+    parser.add_argument('--workers', type=int, default=0, help='Render processes (intro template)')
+    parser.add_argument('--frame-memory', type=float, default=FRAME_MEMORY_MB, metavar='MB',
+                        help='Frame store RAM budget (intro template with --workers 0)')
+    parser.add_argument('--calibrate', metavar='RESULTS_JSON',
+                        help='Derive a calibration file from benchmark results and exit')
+    args = parser.parse_args()
+
+    if args.calibrate:
+        calibrate(args.calibrate, args.calibration)
+        return
+
+    plan = plan_render(args.template, photo_path=args.photo, audio_path=args.audio,
+                       text_path=args.text, lipsync_path=args.lipsync,
+                       calibration_path=args.calibration, workers=args.workers,
+                       frame_memory_mb=args.frame_memory)
+    if not print_plan(plan, args.memory_budget):
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Render Timeline Descriptions
+============================
+
+Declarative description of each template's layers, built from metadata only
+(audio duration, photo size, intro sentences) without rendering anything.
+
+Each Layer mirrors one MoviePy clip of a generator script: its size, position,
+start/end times, fades, motion and whether it is opaque. Tools that need to
+reason about a render before (or instead of) running MoviePy use this module:
+- render_planner.py: cost and memory estimates
+- occlusion culling, preview scaling and alternate render backends
+
+Templates:
+- basic:    create_video.py
+- dynamic:  create_dynamic_video.py
+- enhanced: enhance_ai_video.py
+- ai:       ai_video_generator.py (AIVideoGenerator)
+- intro:    ai_intro_video.py (AIIntroVideoGenerator)
+
+Text sprites are sized to their estimated ink box, since sprite_atlas.py trims
+the rendered sprites to their ink before compositing.
+"""
+
+from text_layout import load_font, layout_text, font_metrics
+
+# === Configuration ===
+VIDEO_SIZE = (1280, 720)  # HD resolution
+FPS = 24
+TEMPLATES = ("basic", "dynamic", "enhanced", "ai", "intro")
+SKILLS = ["Python Developer", "Data Analysis", "Machine Learning", "Cloud Technologies"]
+TITLE_TEXT = "Hello! I'm Shrikanth"
+CLOSING_TEXT = "Thank you for watching!"
+FONT_PATH = "arial.ttf"
+
+
+class Layer:
+    """One element of a template timeline"""
+
+    def __init__(self, name, kind, start, duration, size, position=(0, 0),
+                 opaque=False, animated=False, fade_in=0.0, fade_out=0.0,
+                 motion=None, text=None, fontsize=None, color=None, source=None, wrap=False,
+                 anchor="center"):
+        self.name = name
+        self.kind = kind  # background | photo | video | sprite
+        self.start = start
+        self.duration = duration
+        self.size = size  # (width, height)
+        self.position = position  # (x, y); either may be 'center'/'left'
+        self.opaque = opaque
+        self.animated = animated  # content changes from frame to frame
+        self.fade_in = fade_in
+        self.fade_out = fade_out
+        self.motion = motion  # None, ('zoom', start, end) or ('bounce', amplitude, cycle)
+        self.text = text
+        self.fontsize = fontsize
+        self.color = color
+        self.source = source
+        self.wrap = wrap  # text is wrapped into a paragraph rather than drawn on one line
+        self.anchor = anchor  # point a zoom stays fixed on: 'center' or 'top_left'
+
+    @property
+    def end(self):
+        return self.start + self.duration
+
+    @property
+    def area(self):
+        return self.size[0] * self.size[1]
+
+    def is_visible(self, t):
+        return self.start <= t < self.end
+
+    def resolve_position(self, frame_size):
+        """Top-left corner in pixels, resolving MoviePy-style keywords"""
+        x, y = self.position
+        if x == 'center':
+            x = (frame_size[0] - self.size[0]) // 2
+        elif x == 'left':
+            x = 0
+        if y == 'center':
+            y = (frame_size[1] - self.size[1]) // 2
+        elif y == 'top':
+            y = 0
+        return int(x), int(y)
+
+    def covers_frame(self, frame_size):
+        """True if this layer hides everything below it while visible"""
+        if not self.opaque or self.motion is not None:
+            return False
+        x, y = self.resolve_position(frame_size)
+        return (x <= 0 and y <= 0 and
+                x + self.size[0] >= frame_size[0] and
+                y + self.size[1] >= frame_size[1])
+
+    def visible_area(self, frame_size):
+        """Pixels of this layer that land inside the frame"""
+        x, y = self.resolve_position(frame_size)
+        width = max(0, min(frame_size[0], x + self.size[0]) - max(0, x))
+        height = max(0, min(frame_size[1], y + self.size[1]) - max(0, y))
+        return width * height
+
+    def to_dict(self):
+        return {key: value for key, value in vars(self).items() if value is not None}
+
+
+class Timeline:
+    """Layers of one render plus its output format"""
+
+    def __init__(self, template, size, fps, duration, layers, audio=None):
+        self.template = template
+        self.size = size
+        self.fps = fps
+        # Like CompositeVideoClip, the render runs until its last layer ends, even past the voice
+        self.duration = max([duration] + [layer.end for layer in layers if layer.duration > 0])
+        self.layers = layers
+        self.audio = audio
+
+    @property
+    def frame_count(self):
+        return int(self.duration * self.fps)
+
+    def visible_layers(self, t):
+        return [layer for layer in self.layers if layer.is_visible(t)]
+
+    def rendered_layers(self, t):
+        """Visible layers minus those hidden under the topmost full-frame opaque layer"""
+        visible = self.visible_layers(t)
+        for position in range(len(visible) - 1, -1, -1):
+            if visible[position].covers_frame(self.size):
+                return visible[position:]
+        return visible
+
+    def frame_times(self):
+        return [i / self.fps for i in range(self.frame_count)]
+
+    def to_dict(self):
+        return {
+            "template": self.template,
+            "size": list(self.size),
+            "fps": self.fps,
+            "duration": self.duration,
+            "frames": self.frame_count,
+            "layers": [layer.to_dict() for layer in self.layers],
+        }
+
+
+def fit_height(size, height):
+    """Scale a (width, height) size to the given height, keeping the aspect ratio"""
+    return (int(round(size[0] * height / size[1])), height)
+
+
+def trim_text_layer(layer):
+    """Shrink a text sprite from its canvas to its estimated ink box"""
+    font = load_font(FONT_PATH, layer.fontsize)
+    canvas_w, canvas_h = layer.size
+    if layer.wrap:
+        lines = layout_text(layer.text, font, max_width=canvas_w - 40)
+        width = max(line.width for line in lines) if lines else 1
+        height = len(lines) * font_metrics(font).line_height
+    else:
+        x0, y0, x1, y1 = font.getbbox(layer.text)
+        width, height = x1 - x0, y1 - y0
+    width = max(1, min(canvas_w, int(width)))
+    height = max(1, min(canvas_h, int(height)))
+
+    # The scripts centre text in its canvas, so the ink stays centred on the same point
+    x, y = layer.position
+    if not isinstance(x, str):
+        x += (canvas_w - width) // 2
+    if not isinstance(y, str):
+        y += (canvas_h - height) // 2
+    layer.size = (width, height)
+    layer.position = (x, y)
+    return layer
+
+
+def sentence_layers(sentences, first_start, time_per_sentence, canvas, y0, dy, fontsize, fade):
+    """Sequential sentence sprites shown one below the other"""
+    layers = []
+    for i, sentence in enumerate(sentences):
+        layers.append(Layer(
+            f"sentence_{i}", "sprite",
+            start=first_start + i * time_per_sentence,
+            duration=time_per_sentence - 0.5,
+            size=canvas, position=('center', y0 + i * dy),
+            fade_in=fade, fade_out=fade,
+            text=sentence, fontsize=fontsize, color='white'
+        ))
+    return layers
+
+
+def skill_layers(first_start, spacing, canvas, y0, dy, amplitude, cycle, fontsize, color):
+    """Bouncing skill highlight sprites"""
+    layers = []
+    for i, skill in enumerate(SKILLS):
+        layers.append(Layer(
+            f"skill_{i}", "sprite",
+            start=first_start + i * spacing, duration=1.0,
+            size=canvas, position=('center', y0 + i * dy),
+            motion=('bounce', amplitude, cycle),
+            text=f"• {skill}", fontsize=fontsize, color=color
+        ))
+    return layers
+
+
+def basic_timeline(duration, sentences, photo_size, photo_path=None):
+    """create_video.py: zooming photo with a centred paragraph"""
+    photo = fit_height(photo_size, VIDEO_SIZE[1])
+    layers = [
+        Layer("photo", "photo", 0, duration, photo, opaque=True, animated=True,
+              motion=('zoom', 1.0, 1.05), source=photo_path, anchor='top_left'),
+        Layer("paragraph", "sprite", 0, duration, photo, position=('center', 'center'),
+              text=". ".join(sentences), fontsize=40, color='white', wrap=True),
+    ]
+    # CompositeVideoClip takes its size from the photo clip
+    return Timeline("basic", photo, FPS, duration, layers)
+
+
+def dynamic_timeline(duration, sentences, photo_size, photo_path=None):
+    """create_dynamic_video.py: gradient background, Ken Burns photo, animated text"""
+    canvas = (VIDEO_SIZE[0] - 100, 100)
+    time_per_sentence = (duration - 4) / len(sentences)
+
+    layers = [
+        Layer("background", "background", 0, duration, VIDEO_SIZE, opaque=True, animated=True,
+              source="dynamic_gradient"),
+        Layer("photo", "photo", 0, duration, fit_height(photo_size, VIDEO_SIZE[1]),
+              position=('left', 'center'), opaque=True, animated=True,
+              motion=('zoom', 1.0, 1.1), source=photo_path),
+        Layer("title", "sprite", 0, 3.0, canvas, position=('center', 100),
+              fade_in=1.0, fade_out=0.5, text=TITLE_TEXT, fontsize=72, color='#FFD700'),
+    ]
+    layers += sentence_layers(sentences, 3.5, time_per_sentence, canvas, 200, 80, 48, 0.5)
+    layers += skill_layers(8, 1.5, canvas, 500, 40, 20, 2, 36, '#00FF00')
+    layers.append(Layer("closing", "sprite", duration - 2.5, 2.0, canvas, position=('center', 600),
+                        fade_in=0.5, fade_out=0.5, text=CLOSING_TEXT, fontsize=56, color='white'))
+    return Timeline("dynamic", VIDEO_SIZE, FPS, duration, layers)
+
+
+def enhanced_timeline(duration, sentences, lipsync_path=None):
+    """enhance_ai_video.py: full-frame lip-sync video under professional overlays"""
+    canvas = (600, 80)
+    start_time = 4.0
+    time_per_sentence = (duration - start_time - 3) / len(sentences)
+
+    layers = [
+        Layer("background", "background", 0, duration, VIDEO_SIZE, opaque=True, animated=True,
+              source="professional_wave"),
+        Layer("lipsync", "video", 0, duration, VIDEO_SIZE, opaque=True, animated=True,
+              source=lipsync_path),
+        Layer("title", "sprite", 0, 4.0, canvas, position=('center', 50),
+              fade_in=1.5, fade_out=0.8, text=TITLE_TEXT, fontsize=64, color='#FFD700'),
+    ]
+    layers += sentence_layers(sentences, start_time + 3, time_per_sentence, canvas, 150, 60, 42, 0.8)
+    layers += skill_layers(start_time + 8, 1.2, canvas, 400, 50, 15, 1.5, 36, '#00FF99')
+    layers.append(Layer("closing", "sprite", duration - 3, 3.0, canvas, position=('center', 600),
+                        fade_in=1.0, fade_out=1.0, text=CLOSING_TEXT, fontsize=56, color='#FFD700'))
+    return Timeline("enhanced", VIDEO_SIZE, FPS, duration, layers)
+
+
+def ai_timeline(duration, sentences, photo_path=None):
+    """ai_video_generator.py: neural background, full-frame face animation, glowing text"""
+    canvas = (800, 100)
+    time_per_sentence = (duration - 4) / len(sentences)
+
+    layers = [
+        Layer("background", "background", 0, duration, VIDEO_SIZE, opaque=True, animated=True,
+              source="neural"),
+        Layer("face", "video", 0, duration, VIDEO_SIZE, opaque=True, animated=True,
+              source=photo_path),
+        Layer("title", "sprite", 0, 3.5, canvas, position=('center', 100),
+              fade_in=1.5, fade_out=0.8, text=TITLE_TEXT, fontsize=64, color='#FFD700'),
+    ]
+    layers += sentence_layers(sentences, 3.5, time_per_sentence, canvas, 200, 80, 42, 0.8)
+    layers.append(Layer("closing", "sprite", duration - 3, 3.0, canvas, position=('center', 600),
+                        fade_in=1.0, fade_out=1.0, text=CLOSING_TEXT, fontsize=56, color='#FFD700'))
+    return Timeline("ai", VIDEO_SIZE, FPS, duration, layers)
+
+
+def intro_timeline(duration, photo_path=None):
+    """ai_intro_video.py: zooming photo with an OpenCV caption bar, rendered in memory"""
+    layers = [
+        Layer("photo", "photo", 0, duration, VIDEO_SIZE, opaque=True, animated=True,
+              motion=('zoom', 0.9, 1.1), source=photo_path),
+        Layer("caption", "sprite", 0, duration, (VIDEO_SIZE[0], 40), position=(0, VIDEO_SIZE[1] - 80),
+              opaque=True),
+    ]
+    return Timeline("intro", VIDEO_SIZE, 24, duration, layers)
+
+
+def build_timeline(template, duration, sentences=None, photo_size=None,
+                   photo_path=None, lipsync_path=None, trim_text=True):
+    """Build the timeline of a template from metadata (trim_text=False keeps the full text canvases)"""
+    if template == "basic":
+        timeline = basic_timeline(duration, sentences, photo_size, photo_path)
+    elif template == "dynamic":
+        timeline = dynamic_timeline(duration, sentences, photo_size, photo_path)
+    elif template == "enhanced":
+        timeline = enhanced_timeline(duration, sentences, lipsync_path)
+    elif template == "ai":
+        timeline = ai_timeline(duration, sentences, photo_path)
+    elif template == "intro":
+        timeline = intro_timeline(duration, photo_path)
+    else:
+        raise ValueError(f"Unknown template: {template} (expected one of {', '.join(TEMPLATES)})")
+
+    if not trim_text:
+        return timeline
+    for layer in timeline.layers:
+        if layer.kind == "sprite" and layer.text:
+            trim_text_layer(layer)
+    return timeline
@@ -0,0 +1,275 @@
+"""
+Render Tracing and Resource Instrumentation
+===========================================
+
+Lightweight instrumentation for the video generators:
+- Nested timing spans around each stage (model loading, animation, compositing, encoding)
+- Per-frame render/encode histograms
+- Peak RSS and CPU time per stage
+- Cache hit rates
+- Export as Chrome trace-event JSON (chrome://tracing, Perfetto) plus a one-line summary
+
+Tracing is off by default; the disabled tracer only hands out a shared no-op
+context manager, so instrumented code costs close to nothing.
+
+Usage:
+    python src/ai_video_generator.py --trace output/trace.json
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# === Configuration ===
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000]
+_NULL_CONTEXT = nullcontext()
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None if unavailable)"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS reports bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except Exception:
+        return None
+
+
+class Histogram:
+    """Collects durations and reports percentiles and bucket counts"""
+
+    def __init__(self):
+        self.samples = []
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    def percentile(self, fraction):
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+        return ordered[index]
+
+    def to_dict(self):
+        """Summarize the histogram in milliseconds"""
+        samples_ms = [s * 1000 for s in self.samples]
+        buckets = {}
+        for limit in HISTOGRAM_BUCKETS_MS:
+            buckets[f"<={limit}ms"] = sum(1 for s in samples_ms if s <= limit)
+        buckets[f">{HISTOGRAM_BUCKETS_MS[-1]}ms"] = sum(1 for s in samples_ms if s > HISTOGRAM_BUCKETS_MS[-1])
+        return {
+            "count": len(samples_ms),
+            "total_ms": sum(samples_ms),
+            "min_ms": min(samples_ms),
+            "p50_ms": self.percentile(0.5) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "max_ms": max(samples_ms),
+            "buckets": buckets,
+        }
+
+
+class Tracer:
+    """Records spans, histograms and cache counters for one render"""
+
+    enabled = True
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.events = []
+        self.stages = {}
+        self.histograms = {}
+        self.caches = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def now_us(self):
+        return (time.perf_counter() - self.origin) * 1e6
+
+    @contextmanager
+    def span(self, name, **args):
+        """Time a (possibly nested) stage with CPU time and peak RSS"""
+        depth = getattr(self.local, "depth", 0)
+        self.local.depth = depth + 1
+        start_us = self.now_us()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self.local.depth = depth
+            duration_us = self.now_us() - start_us
+            cpu_ms = (time.process_time() - start_cpu) * 1000
+            rss = peak_rss_mb()
+            event = {
+                "name": name, "cat": "stage", "ph": "X",
+                "ts": start_us, "dur": duration_us,
+                "pid": os.getpid(), "tid": threading.get_ident(),
+                "args": dict(args, cpu_ms=round(cpu_ms, 3), peak_rss_mb=rss),
+            }
+            with self.lock:
+                self.events.append(event)
+                if depth == 0:
+                    stage = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "peak_rss_mb": None})
+                    stage["wall_s"] += duration_us / 1e6
+                    stage["cpu_s"] += cpu_ms / 1000
+                    stage["peak_rss_mb"] = rss
+
+    @contextmanager
+    def measure(self, name):
+        """Time one sample of a repeated operation (e.g. one frame) into a histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        """Add a duration sample to a histogram"""
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    def cache(self, name, hit):
+        """Count a cache lookup"""
+        with self.lock:
+            counter = self.caches.setdefault(name, {"hits": 0, "misses": 0})
+            counter["hits" if hit else "misses"] += 1
+
+    def instrument_clip(self, clip, name="frame.render"):
+        """Time every frame MoviePy's writer pulls from a clip (through iter_frames)
+
+        make_frame is left alone, so frame_dedup still recognizes composites
+        and frame keys. The pipelined writer calls get_frame itself and times
+        its renders as frame.render.
+        """
+        iter_frames = clip.iter_frames
+        tracer = self
+
+        def timed_iter_frames(*args, **kwargs):
+            frames = iter_frames(*args, **kwargs)
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(frames)
+                except StopIteration:
+                    return
+                tracer.observe(name, time.perf_counter() - start)
+                yield item
+
+        clip.iter_frames = timed_iter_frames
+        return clip
+
+    @contextmanager
+    def instrument_encoder(self, name="frame.encode"):
+        """Time every frame MoviePy writes to the ffmpeg pipe"""
+        from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+
+        write_frame = FFMPEG_VideoWriter.write_frame
+        tracer = self
+
+        def timed_write_frame(writer, img_array):
+            with tracer.measure(name):
+                return write_frame(writer, img_array)
+
+        FFMPEG_VideoWriter.write_frame = timed_write_frame
+        try:
+            yield
+        finally:
+            FFMPEG_VideoWriter.write_frame = write_frame
+
+    def to_chrome_trace(self):
+        """Build a Chrome trace-event document"""
+        events = list(self.events)
+        pid = os.getpid()
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "video render"}})
+        for name, counter in self.caches.items():
+            events.append({
+                "name": f"cache.{name}", "ph": "C", "ts": self.now_us(), "pid": pid,
+                "args": dict(counter),
+            })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "stages": self.stages,
+                "histograms": {name: h.to_dict() for name, h in self.histograms.items()},
+                "caches": self.caches,
+                "summary": self.summary(),
+            },
+        }
+
+    def export(self, path):
+        """Write the Chrome trace JSON and return the one-line summary"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        return self.summary()
+
+    def summary(self):
+        """One-line summary of stages, frame timings, memory and caches"""
+        total = sum(stage["wall_s"] for stage in self.stages.values())
+        parts = [f"total {total:.2f}s"]
+        parts.append(", ".join(f"{name} {stage['wall_s']:.2f}s" for name, stage in self.stages.items()))
+        for name, histogram in self.histograms.items():
+            if histogram.samples:
+                parts.append(f"{name} p50 {histogram.percentile(0.5) * 1000:.1f}ms "
+                             f"p95 {histogram.percentile(0.95) * 1000:.1f}ms n={len(histogram.samples)}")
+        rss = peak_rss_mb()
+        if rss is not None:
+            parts.append(f"peak RSS {rss:.0f}MB")
+        for name, counter in self.caches.items():
+            lookups = counter["hits"] + counter["misses"]
+            parts.append(f"{name} cache {counter['hits']}/{lookups} hits")
+        return " | ".join(part for part in parts if part)
+
+
+class NullTracer:
+    """Disabled tracer: every hook is a no-op"""
+
+    enabled = False
+
+    def span(self, name, **args):
+        return _NULL_CONTEXT
+
+    def measure(self, name):
+        return _NULL_CONTEXT
+
+    def observe(self, name, seconds):
+        pass
+
+    def cache(self, name, hit):
+        pass
+
+    def instrument_clip(self, clip, name="frame.render"):
+        return clip
+
+    def instrument_encoder(self, name="frame.encode"):
+        return _NULL_CONTEXT
+
+
+_tracer = NullTracer()
+
+
+def get_tracer():
+    """Return the active tracer (a NullTracer unless tracing was enabled)"""
+    return _tracer
+
+
+def enable_tracing():
+    """Switch on tracing for this process and return the tracer"""
+    global _tracer
+    if not _tracer.enabled:
+        _tracer = Tracer()
+    return _tracer
@@ -0,0 +1,195 @@
+"""
+CPU Resource Governor
+=====================
+
+One core budget per job, applied to every thread pool the pipeline uses, so
+jobs packed onto one node do not oversubscribe it:
+- BLAS/OpenMP pools (NumPy, librosa) through the usual environment variables
+  (inherited by child processes) and threadpoolctl for pools already loaded
+- torch intra-op threads (torch.set_num_threads), one inter-op thread
+- OpenCV's internal pool (cv2.resize, warpAffine, cvtColor)
+- ffmpeg: encoder -threads, decoder -threads and filter threads
+- ONNX Runtime intra-op threads
+- Render threads of the pipelined writer (capped at the budget)
+- Optional CPU affinity pinning (Linux), so packed jobs keep to their own cores
+
+Library pools run inside the render threads, so each of the W render threads
+gets cores // W library threads; the encoder (a separate ffmpeg process that
+overlaps with rendering) gets the whole budget.
+
+The budget can also come from the environment (VIDEO_JOB_CORES,
+VIDEO_JOB_CPUS), so a scheduler can set it without changing command lines.
+
+Usage:
+    python src/create_dynamic_video.py --cores 4 --pin 0-3
+    budget = govern(cores=4, cpus="0-3", workers=WORKERS)
+"""
+
+import os
+import sys
+
+# === Configuration ===
+CORES_ENV = "VIDEO_JOB_CORES"
+CPUS_ENV = "VIDEO_JOB_CPUS"
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                   "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+_budget = None
+_blas_limits = None  # threadpoolctl limits stay in force while referenced
+
+
+class CoreBudget:
+    """Cores (and optionally which CPUs) one job may use"""
+
+    def __init__(self, cores, cpus=None, workers=1):
+        self.cores = cores
+        self.cpus = cpus
+        # 0 render threads means MoviePy's own writer; otherwise at most one per core
+        self.workers = min(workers, cores) if workers > 0 else 0
+
+    @property
+    def library_threads(self):
+        """Threads for each render thread's NumPy/OpenCV/torch calls"""
+        return max(1, self.cores // max(1, self.workers))
+
+    @property
+    def ffmpeg_threads(self):
+        return self.cores
+
+    def describe(self):
+        pinned = f", pinned to CPUs {format_cpu_list(self.cpus)}" if self.cpus else ""
+        return (f"🧮 Core budget: {self.cores} cores{pinned} | {self.workers} render threads x "
+                f"{self.library_threads} library threads, ffmpeg {self.ffmpeg_threads} threads")
+
+
+def available_cpus():
+    """CPUs this process may run on (its affinity mask where supported)"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def parse_cpu_list(text):
+    """'0-3,8' -> [0, 1, 2, 3, 8]"""
+    cpus = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def format_cpu_list(cpus):
+    return ",".join(str(cpu) for cpu in cpus)
+
+
+def current_budget():
+    return _budget
+
+
+def core_budget():
+    """Cores this job may use: the governed budget, else every CPU it can run on"""
+    return _budget.cores if _budget is not None else len(available_cpus())
+
+
+def ffmpeg_global_args():
+    """Global ffmpeg options capping filter threads to the budget ([] when ungoverned)"""
+    if _budget is None:
+        return []
+    threads = str(_budget.ffmpeg_threads)
+    return ["-filter_threads", threads, "-filter_complex_threads", threads]
+
+
+def decoder_thread_args():
+    """Input options for an ffmpeg decoder running next to the render threads"""
+    if _budget is None:
+        return []
+    return ["-threads", str(_budget.library_threads)]
+
+
+def set_thread_env(threads):
+    """Thread limits for BLAS/OpenMP pools created from now on (and in child processes)"""
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+
+
+def limit_blas(threads):
+    global _blas_limits
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        print("⚠️  threadpoolctl not installed: BLAS pools loaded before the budget keep their size")
+        return False
+    _blas_limits = threadpool_limits(limits=threads)
+    return True
+
+
+def limit_torch(threads):
+    # Only when the script uses torch: importing it here would cost seconds
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return False
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Only settable before torch's first parallel work
+    return True
+
+
+def limit_opencv(threads):
+    import cv2
+    cv2.setNumThreads(threads)
+
+
+def pin_cpus(cpus):
+    if not hasattr(os, "sched_setaffinity"):
+        print("⚠️  CPU pinning is not supported on this platform")
+        return False
+    os.sched_setaffinity(0, cpus)
+    return True
+
+
+def govern(cores=None, cpus=None, workers=1):
+    """Apply a core budget to every thread pool of this process and its ffmpeg children"""
+    global _budget
+    cores = cores or int(os.environ.get(CORES_ENV) or 0) or None
+    cpus = cpus or os.environ.get(CPUS_ENV) or None
+    if cores is None and cpus is None:
+        return None
+
+    available = available_cpus()
+    if isinstance(cpus, str):
+        cpus = parse_cpu_list(cpus)
+    if cpus:
+        outside = [cpu for cpu in cpus if cpu not in available]
+        if outside:
+            raise ValueError(f"CPUs {format_cpu_list(outside)} are not available "
+                             f"(this process may use {format_cpu_list(available)})")
+        cores = min(cores or len(cpus), len(cpus))
+    cores = max(1, min(cores, len(available)))
+
+    budget = CoreBudget(cores, cpus, workers)
+    if cpus:
+        pin_cpus(cpus)
+    threads = budget.library_threads
+    set_thread_env(threads)
+    limit_blas(threads)
+    limit_torch(threads)
+    limit_opencv(threads)
+    _budget = budget
+    print(budget.describe())
+    return budget
+
+
+def add_governor_arguments(parser):
+    """--cores/--pin options shared by the generator scripts"""
+    parser.add_argument('--cores', type=int, default=None,
+                        help=f'Core budget of this job for every thread pool (default: ${CORES_ENV} or all)')
+    parser.add_argument('--pin', default=None, metavar='CPUS',
+                        help=f'Pin the job to these CPUs, e.g. 0-3 (default: ${CPUS_ENV})')
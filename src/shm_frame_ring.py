@@ -0,0 +1,234 @@
+"""
+Shared-Memory Frame Ring
+========================
+
+Multi-process rendering without pickling frames:
+- A ring of fixed-size RGB frame slots in multiprocessing.shared_memory
+- A small header with the encoder position plus a sequence number and
+  ready flag per slot
+- Worker processes render frame k directly into slot k % n, and only once
+  the encoder has consumed frame k - n
+- The parent process streams ready slots to ffmpeg's stdin in frame order
+
+Frames are never serialized or copied between processes; the only copy is
+the write into the ffmpeg pipe.
+
+Usage:
+    def render_frame(index, out):   # fills `out` (height x width x 3, uint8) in place
+        ...
+    write_frames_multiprocess(render_frame, frame_count, (1280, 720), 24, "output/video.mp4")
+"""
+
+import os
+import time
+import tempfile
+import traceback
+import subprocess
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from pipelined_writer import build_ffmpeg_command
+from render_trace import get_tracer
+
+# === Configuration ===
+DEFAULT_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))  # Leave a core for ffmpeg
+DEFAULT_SLOTS = 8
+POLL_MIN_S = 0.0005
+POLL_MAX_S = 0.005
+
+FREE = 0
+READY = 1
+
+
+class SharedFrameRing:
+    """Fixed frame slots plus a header in one shared memory block"""
+
+    def __init__(self, slots, shape, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.frame_bytes = int(np.prod(self.shape))
+        # Header: [consumer position, (sequence, state) per slot] as int64
+        self.header_bytes = 8 * (1 + 2 * slots)
+
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.header_bytes + slots * self.frame_bytes)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.map_views()
+
+        if self.owner:
+            self.position[0] = 0
+            self.sequence[:] = -1
+            self.state[:] = FREE
+
+    def map_views(self):
+        header = np.ndarray((1 + 2 * self.slots,), dtype=np.int64, buffer=self.shm.buf)
+        self.position = header[:1]
+        self.sequence = header[1:1 + self.slots]
+        self.state = header[1 + self.slots:]
+        self.frames = np.ndarray((self.slots,) + self.shape, dtype=np.uint8,
+                                 buffer=self.shm.buf, offset=self.header_bytes)
+
+    def __reduce__(self):
+        # Spawned workers re-attach by name instead of pickling the frames
+        return (SharedFrameRing, (self.slots, self.shape, self.shm.name))
+
+    def slot(self, index):
+        return index % self.slots
+
+    def can_write(self, index):
+        """Frame `index` may use its slot once the encoder consumed index - slots"""
+        return index < int(self.position[0]) + self.slots
+
+    def is_ready(self, index):
+        slot = self.slot(index)
+        return self.state[slot] == READY and self.sequence[slot] == index
+
+    def publish(self, index, lock):
+        slot = self.slot(index)
+        with lock:  # The lock also orders the frame writes before the flag
+            self.sequence[slot] = index
+            self.state[slot] = READY
+
+    def consume(self, index, lock):
+        with lock:
+            self.state[self.slot(index)] = FREE
+            self.position[0] = index + 1
+
+    def close(self):
+        # Drop the numpy views before releasing the mapping
+        self.position = self.sequence = self.state = self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def wait_until(condition, abort):
+    """Poll with a short backoff; returns seconds waited, or None if aborted"""
+    start = time.perf_counter()
+    delay = POLL_MIN_S
+    while not condition():
+        if abort():
+            return None
+        time.sleep(delay)
+        delay = min(POLL_MAX_S, delay * 2)
+    return time.perf_counter() - start
+
+
+def render_worker(ring, render_frame, frame_count, next_index, header_lock, failed, waits):
+    """Worker process: claim frames and render them straight into ring slots"""
+    try:
+        while not failed.is_set():
+            with next_index.get_lock():
+                index = next_index.value
+                next_index.value += 1
+            if index >= frame_count:
+                return
+
+            if not ring.can_write(index):
+                waited = wait_until(lambda: ring.can_write(index), failed.is_set)
+                if waited is None:
+                    return
+                with waits.get_lock():
+                    waits[0] += 1
+                    waits[1] += waited
+
+            render_frame(index, ring.frames[ring.slot(index)])
+            ring.publish(index, header_lock)
+    except Exception:
+        traceback.print_exc()
+        failed.set()
+
+
+def write_frames_multiprocess(render_frame, frame_count, size, fps, output_path, encoder=None,
+                              workers=DEFAULT_WORKERS, slots=DEFAULT_SLOTS, audio_path=None,
+                              audio_codec="copy", output_args=None):
+    """Render frames in worker processes and encode them with a single ffmpeg process"""
+    width, height = size
+    # fork shares render_frame's state with the workers; spawn needs it to be picklable
+    context = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else "spawn")
+    workers = max(1, workers)
+    slots = max(slots, workers + 1)
+
+    if output_path and os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    ring = SharedFrameRing(slots, (height, width, 3))
+    next_index = context.Value("q", 0)
+    header_lock = context.Lock()
+    failed = context.Event()
+    producer_waits = context.Array("d", 2)
+
+    processes = [
+        context.Process(target=render_worker, daemon=True,
+                        args=(ring, render_frame, frame_count, next_index, header_lock, failed, producer_waits))
+        for _ in range(workers)
+    ]
+    print(f"⚙️  Shared-memory ring: {frame_count} frames, {workers} render processes, "
+          f"{slots} slots of {ring.frame_bytes / 1e6:.1f} MB")
+
+    tracer = get_tracer()
+    stalls, stall_s, written = 0, 0.0, 0
+    start = time.perf_counter()
+    try:
+        for process in processes:
+            process.start()
+
+        def workers_lost():
+            return failed.is_set() or not any(p.is_alive() for p in processes)
+
+        cmd = build_ffmpeg_command(size, fps, output_path, encoder, audio_path, output_args, audio_codec)
+        with tempfile.TemporaryFile() as stderr:
+            ffmpeg = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=stderr)
+            try:
+                for index in range(frame_count):
+                    if not ring.is_ready(index):
+                        stalls += 1
+                        # Re-check readiness once more before declaring the workers gone
+                        waited = wait_until(lambda: ring.is_ready(index),
+                                            lambda: workers_lost() and not ring.is_ready(index))
+                        if waited is None:
+                            raise RuntimeError(f"Render workers stopped before frame {index}")
+                        stall_s += waited
+
+                    write_start = time.perf_counter()
+                    ffmpeg.stdin.write(ring.frames[ring.slot(index)].data)
+                    tracer.observe("frame.encode", time.perf_counter() - write_start)
+                    ring.consume(index, header_lock)
+                    written += 1
+            except BrokenPipeError:
+                pass
+            finally:
+                ffmpeg.stdin.close()
+                returncode = ffmpeg.wait()
+            if returncode != 0:
+                stderr.seek(0)
+                raise RuntimeError(f"ffmpeg failed ({returncode}): {stderr.read().decode(errors='replace')}")
+    finally:
+        failed.set()  # Releases workers still waiting for a slot
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        ring.close()
+
+    wall_s = time.perf_counter() - start
+    stats = {
+        "frames": written,
+        "workers": workers,
+        "slots": slots,
+        "wall_s": round(wall_s, 3),
+        "fps": round(written / wall_s, 2) if wall_s else None,
+        "encoder_stalls": stalls,
+        "encoder_stall_s": round(stall_s, 3),
+        "producer_waits": int(producer_waits[0]),
+        "producer_wait_s": round(producer_waits[1], 3),
+    }
+    print(f"✅ Encoded {written} frames in {wall_s:.2f}s ({stats['fps']} fps) | "
+          f"encoder waited {stalls}x ({stall_s:.2f}s), "
+          f"renderers waited for a slot {stats['producer_waits']}x ({stats['producer_wait_s']:.2f}s)")
+    return stats
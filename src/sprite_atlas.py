@@ -0,0 +1,167 @@
+"""
+Sprite Atlas
+============
+
+Tight text sprites packed into one shared array per job:
+- Each sprite is trimmed to the bounding box of its ink (non-zero alpha), so a
+  sentence drawn on a 1180x100 canvas becomes a sprite of roughly 700x40
+- Positions are shifted by the trim offset, so every pixel lands exactly where
+  the untrimmed canvas put it (same frames, bit for bit)
+- All of a job's sprites are shelf-packed into one RGB atlas plus one alpha
+  atlas; clips read views into the atlas instead of owning their own arrays
+- MoviePy blends the whole rectangle of every masked layer, so the per-frame
+  blend area shrinks with the sprites
+
+Usage:
+    atlas = SpriteAtlas()
+    title = atlas.clip(title_img, ('center', 100), frame_size).set_start(0).set_duration(3)
+    ...
+    atlas.pack()   # once every sprite is added, before rendering
+"""
+
+import numpy as np
+
+from culled_composite import resolve_position
+
+# === Configuration ===
+MAX_ATLAS_WIDTH = 4096
+MASK_BYTES = 8  # MoviePy blends with float64 masks; keeping them float64 keeps frames identical
+MEGABYTE = 1024 * 1024
+
+
+def ink_bbox(rgba):
+    """(x0, y0, x1, y1) of the non-transparent pixels, or None if there are none"""
+    alpha = rgba[:, :, 3]
+    columns = np.flatnonzero(alpha.any(axis=0))
+    if not len(columns):
+        return None
+    rows = np.flatnonzero(alpha.any(axis=1))
+    return int(columns[0]), int(rows[0]), int(columns[-1]) + 1, int(rows[-1]) + 1
+
+
+def trim_sprite(rgba):
+    """Crop an RGBA array to its ink; returns (cropped view, (dx, dy) offset)"""
+    bbox = ink_bbox(rgba)
+    if bbox is None:
+        return rgba[:1, :1], (0, 0)  # Empty text: keep a single transparent pixel
+    x0, y0, x1, y1 = bbox
+    return rgba[y0:y1, x0:x1], (x0, y0)
+
+
+def offset_position(position, canvas_size, offset, frame_size):
+    """Position of a trimmed sprite that puts its pixels where the full canvas had them"""
+    if callable(position):
+        return lambda t: offset_position(position(t), canvas_size, offset, frame_size)
+    x, y = resolve_position(position, canvas_size, frame_size)
+    return x + offset[0], y + offset[1]
+
+
+class Sprite:
+    """Trimmed RGB and alpha of one sprite; views into the atlas once packed"""
+
+    def __init__(self, rgba, offset, canvas_size):
+        self.rgb = np.ascontiguousarray(rgba[:, :, :3])
+        self.alpha = rgba[:, :, 3] / 255.0
+        self.offset = offset
+        self.canvas_size = canvas_size
+        self.page = None
+
+    @property
+    def size(self):
+        return self.rgb.shape[1], self.rgb.shape[0]
+
+    @property
+    def area(self):
+        return self.size[0] * self.size[1]
+
+
+class SpriteAtlas:
+    """All sprites of one job, trimmed and shelf-packed into a shared array"""
+
+    def __init__(self, max_width=MAX_ATLAS_WIDTH):
+        self.max_width = max_width
+        self.sprites = []
+        self.pages = []  # (rgb, alpha) arrays, normally one per job
+
+    def add(self, image):
+        """Trim a PIL image or RGBA array and register it"""
+        rgba = np.asarray(image)
+        if rgba.ndim != 3 or rgba.shape[2] != 4:
+            raise ValueError(f"Sprites must be RGBA, got an array of shape {rgba.shape}")
+        trimmed, offset = trim_sprite(rgba)
+        sprite = Sprite(trimmed, offset, (rgba.shape[1], rgba.shape[0]))
+        self.sprites.append(sprite)
+        return sprite
+
+    def clip(self, image, position, frame_size):
+        """Masked MoviePy clip of a trimmed sprite, positioned like the full canvas"""
+        from moviepy.editor import VideoClip
+
+        sprite = self.add(image)
+        # The frame functions look the arrays up on every call, so clips made
+        # before pack() read from the atlas afterwards
+        clip = VideoClip(lambda t: sprite.rgb)
+        clip = clip.set_mask(VideoClip(lambda t: sprite.alpha, ismask=True))
+        return clip.set_position(offset_position(position, sprite.canvas_size, sprite.offset, frame_size))
+
+    def pack(self):
+        """Copy sprites added since the last pack into one new atlas page"""
+        pending = [sprite for sprite in self.sprites if sprite.page is None]
+        if not pending:
+            return None
+
+        widest = max(sprite.size[0] for sprite in pending)
+        area = sum(sprite.area for sprite in pending)
+        page_width = max(widest, min(self.max_width, int(np.ceil(np.sqrt(area)))))
+
+        # Shelf packing: tallest first, left to right, a new shelf when a row is full
+        placements = []
+        x = y = shelf_height = 0
+        for sprite in sorted(pending, key=lambda s: (-s.size[1], -s.size[0])):
+            width, height = sprite.size
+            if x + width > page_width:
+                y += shelf_height
+                x = shelf_height = 0
+            placements.append((sprite, x, y))
+            x += width
+            shelf_height = max(shelf_height, height)
+        page_height = y + shelf_height
+
+        rgb = np.zeros((page_height, page_width, 3), dtype=np.uint8)
+        alpha = np.zeros((page_height, page_width), dtype=np.float64)
+        page = len(self.pages)
+        for sprite, x, y in placements:
+            width, height = sprite.size
+            rgb[y:y + height, x:x + width] = sprite.rgb
+            alpha[y:y + height, x:x + width] = sprite.alpha
+            sprite.rgb = rgb[y:y + height, x:x + width]
+            sprite.alpha = alpha[y:y + height, x:x + width]
+            sprite.page = page
+        self.pages.append((rgb, alpha))
+        return self.stats()
+
+    def stats(self):
+        canvas_area = sum(s.canvas_size[0] * s.canvas_size[1] for s in self.sprites)
+        sprite_area = sum(s.area for s in self.sprites)
+        atlas_area = sum(rgb.shape[0] * rgb.shape[1] for rgb, _ in self.pages)
+        return {
+            "sprites": len(self.sprites),
+            "pages": len(self.pages),
+            "canvas_area": canvas_area,
+            "sprite_area": sprite_area,
+            "atlas_area": atlas_area,
+            "atlas_fill": sprite_area / atlas_area if atlas_area else 0.0,
+            "blend_area_ratio": sprite_area / canvas_area if canvas_area else 0.0,
+            # RGB plus the float mask, as MoviePy holds them for an ImageClip
+            "untrimmed_mb": canvas_area * (3 + MASK_BYTES) / MEGABYTE,
+            "atlas_mb": atlas_area * (3 + MASK_BYTES) / MEGABYTE,
+        }
+
+    def report(self):
+        """Pack pending sprites and print the memory and blend area saved"""
+        self.pack()
+        stats = self.stats()
+        print(f"🧩 Sprite atlas: {stats['sprites']} sprites in {stats['pages']} array(s), "
+              f"{stats['atlas_mb']:.1f} MB instead of {stats['untrimmed_mb']:.1f} MB, "
+              f"blend area {stats['blend_area_ratio']:.0%} of the full canvases")
+        return stats
@@ -0,0 +1,173 @@
+"""
+Streaming Output
+================
+
+Output that becomes playable while the intro is still rendering:
+- HLS: an EVENT playlist of fMP4 segments, rewritten after every segment,
+  with segments and playlist written to temp files and renamed into place
+  (a player or uploader never sees a partial file); ENDLIST is added at the end
+- fMP4: one fragmented MP4 (empty moov, a fragment per keyframe) that can be
+  played or uploaded progressively as it grows
+- Keyframes are forced at segment boundaries, so segments close on schedule
+- A watcher thread reports each finished segment (and can hand it to a
+  callback, e.g. to start an upload) with the time since rendering started
+
+Usage:
+    stream_render(final_clip, "output/stream", "shrikanth_intro", fps=24, encoder=profile)
+    # play output/stream/shrikanth_intro.m3u8 while it renders
+"""
+
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+
+from pipelined_writer import write_pipelined, write_audio_track, DEFAULT_WORKERS
+from multi_rendition import segment_keyframe_args
+
+# === Configuration ===
+STREAM_FORMATS = ("hls", "fmp4")
+SEGMENT_SECONDS = 2  # Shorter segments mean an earlier first segment
+POLL_S = 0.2
+
+
+def stream_args(output_dir, name, encoder=None, fmt="hls", segment_seconds=SEGMENT_SECONDS, has_audio=True):
+    """Output side of the ffmpeg command and the file players should open"""
+    if fmt not in STREAM_FORMATS:
+        raise ValueError(f"Unknown stream format: {fmt} (expected one of {', '.join(STREAM_FORMATS)})")
+
+    args = ["-map", "0:v"]
+    if has_audio:
+        args += ["-map", "1:a", "-c:a", "copy"]
+    if encoder is not None:
+        # +faststart rewrites the file at the end, which a growing stream cannot wait for
+        args += encoder.ffmpeg_args(faststart=False)
+    else:
+        args += ["-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p", "-crf", "23"]
+    args += segment_keyframe_args(segment_seconds)
+
+    if fmt == "hls":
+        playlist = os.path.join(output_dir, f"{name}.m3u8")
+        args += [
+            "-f", "hls",
+            "-hls_time", str(segment_seconds),
+            "-hls_playlist_type", "event",
+            "-hls_segment_type", "fmp4",
+            "-hls_fmp4_init_filename", f"{name}_init.mp4",
+            "-hls_segment_filename", os.path.join(output_dir, f"{name}_%05d.m4s"),
+            "-hls_flags", "independent_segments+temp_file",
+            playlist,
+        ]
+        return args, playlist
+
+    path = os.path.join(output_dir, f"{name}.mp4")
+    args += [
+        "-movflags", "+frag_keyframe+empty_moov+default_base_moof",
+        # Small fragments would otherwise wait in the output buffer
+        "-flush_packets", "1",
+        "-f", "mp4", path,
+    ]
+    return args, path
+
+
+def playlist_segments(playlist):
+    """Segment URIs listed in an HLS playlist so far"""
+    try:
+        with open(playlist, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    except FileNotFoundError:
+        return []
+
+
+class SegmentWatcher:
+    """Background thread reporting segments (or fragments) as ffmpeg finishes them"""
+
+    def __init__(self, path, fmt, on_segment=None):
+        self.path = path
+        self.fmt = fmt
+        self.on_segment = on_segment
+        self.segments = 0
+        self.first_segment_s = None
+        self.scanned = 0
+        self.start = time.perf_counter()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True, name="segment-watcher")
+
+    def new_fragments(self):
+        """Walk the top-level MP4 boxes written so far; each complete mdat is a playable fragment"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+        fragments = []
+        with open(self.path, "rb") as f:
+            while self.scanned + 8 <= size:
+                f.seek(self.scanned)
+                box_size, box_type = struct.unpack(">I4s", f.read(8))
+                if box_size == 1:  # 64-bit size follows the type
+                    box_size = struct.unpack(">Q", f.read(8))[0]
+                if box_size < 8 or self.scanned + box_size > size:
+                    break  # Box still being written
+                if box_type == b"mdat":
+                    fragments.append(self.path)
+                self.scanned += box_size
+        return fragments
+
+    def new_segments(self):
+        if self.fmt == "hls":
+            return playlist_segments(self.path)[self.segments:]
+        return self.new_fragments()
+
+    def poll(self):
+        for segment in self.new_segments():
+            self.segments += 1
+            elapsed = time.perf_counter() - self.start
+            if self.first_segment_s is None:
+                self.first_segment_s = elapsed
+                print(f"📡 First segment playable after {elapsed:.2f}s: {self.path}")
+            if self.on_segment is not None:
+                path = os.path.join(os.path.dirname(self.path), segment) if self.fmt == "hls" else segment
+                try:
+                    self.on_segment(path, self.segments, elapsed)
+                except Exception as e:
+                    print(f"⚠️  Segment callback failed: {e}")
+
+    def run(self):
+        while not self.stop_event.wait(POLL_S):
+            self.poll()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_event.set()
+        self.thread.join()
+        self.poll()  # Segments closed by the final flush
+        return False
+
+
+def stream_render(clip, output_dir, name, fps, encoder=None, workers=DEFAULT_WORKERS, fmt="hls",
+                  segment_seconds=SEGMENT_SECONDS, on_segment=None):
+    """Render a clip into HLS segments or a fragmented MP4 that is playable while it grows"""
+    os.makedirs(output_dir, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(prefix="stream_")
+    try:
+        audio_path = write_audio_track(clip, temp_dir)
+        output_args, path = stream_args(output_dir, name, encoder, fmt, segment_seconds,
+                                        has_audio=audio_path is not None)
+        print(f"📡 Streaming {fmt.upper()} to {path} ({segment_seconds}s segments)")
+        with SegmentWatcher(path, fmt, on_segment) as watcher:
+            stats = write_pipelined(clip, None, fps, workers=workers, audio_path=audio_path,
+                                    output_args=output_args)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    stats["segments"] = watcher.segments
+    stats["first_segment_s"] = round(watcher.first_segment_s, 3) if watcher.first_segment_s else None
+    if watcher.first_segment_s is not None:
+        print(f"✅ Stream complete: {watcher.segments} segments, first one after "
+              f"{watcher.first_segment_s:.2f}s of a {stats['wall_s']:.2f}s render")
+    return path, stats
@@ -0,0 +1,206 @@
+"""
+Text Layout Engine
+==================
+
+Linear-time word wrapping for the PIL text sprites:
+- Each distinct word is measured once with font.getlength and cached per font
+- Lines are fitted greedily on prefix sums of word advances (no re-measuring
+  of the growing line)
+- Line boxes (text, x, y, width, height) come out of a single pass, ready to draw
+- Fonts are cached too, so repeated sprites reuse both font and advances
+- ink=True reproduces the original make_text_image exactly: lines break on
+  their ink width and are centred and stacked by their own ink box (what
+  draw.textbbox returned per line), from cached per-word boxes
+
+Usage:
+    font = load_font("arial.ttf", 40)
+    lines = layout_text(text, font, max_width=1240, box=(1280, 720))
+    lines = layout_text(text, font, max_width=1240, box=(1280, 720), ink=True)  # create_video.py
+    draw_lines(draw, lines, font, fill="white")
+"""
+
+from bisect import bisect_right
+from functools import lru_cache
+
+from PIL import ImageFont
+
+# === Configuration ===
+ALIGNMENTS = ("left", "center", "right")
+INK_TOLERANCE = 2  # px: ink width estimates closer than this to the limit are measured
+
+
+@lru_cache(maxsize=64)
+def load_font(font_path, fontsize):
+    """TrueType font, falling back to PIL's default font"""
+    try:
+        return ImageFont.truetype(font_path, fontsize)
+    except OSError:
+        return ImageFont.load_default()
+
+
+class FontMetrics:
+    """Cached word advances, word ink boxes and line height of one font"""
+
+    def __init__(self, font):
+        self.font = font
+        self.advances = {}
+        self.boxes = {}
+        self.space = font.getlength(" ")
+        if hasattr(font, "getmetrics"):
+            ascent, descent = font.getmetrics()
+            self.line_height = ascent + descent
+        else:
+            bbox = font.getbbox("Ay")
+            self.line_height = bbox[3] - bbox[1]
+
+    def advance(self, word):
+        width = self.advances.get(word)
+        if width is None:
+            width = self.advances[word] = self.font.getlength(word)
+        return width
+
+    def box(self, word):
+        """Ink box (x0, y0, x1, y1) of a word drawn at the origin"""
+        box = self.boxes.get(word)
+        if box is None:
+            box = self.boxes[word] = self.font.getbbox(word)
+        return box
+
+
+_metrics = {}
+
+
+def font_metrics(font):
+    """Metrics cache shared by every layout using the same font object"""
+    metrics = _metrics.get(id(font))
+    if metrics is None or metrics.font is not font:
+        metrics = _metrics[id(font)] = FontMetrics(font)
+    return metrics
+
+
+class LineBox:
+    """One laid-out line of text"""
+
+    def __init__(self, text, x, y, width, height):
+        self.text = text
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def __repr__(self):
+        return f"LineBox({self.text!r}, x={self.x}, y={self.y}, w={self.width:.0f}, h={self.height})"
+
+
+def wrap_words(words, metrics, max_width):
+    """Greedy line breaks as (start, end, width) word ranges, using prefix sums"""
+    # prefix[i] = advance of words[:i], each followed by a space
+    prefix = [0.0]
+    for word in words:
+        prefix.append(prefix[-1] + metrics.advance(word) + metrics.space)
+
+    ranges = []
+    start = 0
+    while start < len(words):
+        # Last end whose line (minus its trailing space) still fits
+        end = bisect_right(prefix, prefix[start] + max_width + metrics.space) - 1
+        end = max(end, start + 1)  # A word wider than the line gets a line of its own
+        ranges.append((start, end, prefix[end] - prefix[start] - metrics.space))
+        start = end
+    return ranges
+
+
+def ink_width(words, start, end, prefix, metrics):
+    """Estimated ink width of words[start:end] as one line, from the per-word boxes"""
+    # Words sit at their advance offsets; the line's ink runs from the first
+    # word's left edge to the last word's right edge
+    return prefix[end - 1] - prefix[start] + metrics.box(words[end - 1])[2] - metrics.box(words[start])[0]
+
+
+def fits_ink(words, start, end, prefix, metrics, max_width):
+    """Whether words[start:end] fits max_width by ink, measuring the line only when close"""
+    estimate = ink_width(words, start, end, prefix, metrics)
+    # Glyph positions are rounded inside FreeType, so near the limit the
+    # fractional estimate can be off by a pixel or two
+    if abs(estimate - max_width) > INK_TOLERANCE:
+        return estimate <= max_width
+    x0, _, x1, _ = metrics.font.getbbox(" ".join(words[start:end]))
+    return x1 - x0 <= max_width
+
+
+def wrap_words_ink(words, metrics, max_width):
+    """Greedy line breaks on ink width, as (start, end) word ranges"""
+    prefix = [0.0]
+    for word in words:
+        prefix.append(prefix[-1] + metrics.advance(word) + metrics.space)
+
+    starts = [0] if words else []
+    for end in range(2, len(words) + 1):
+        # A word that does not fit starts the next line (alone if it is too wide itself)
+        if not fits_ink(words, starts[-1], end, prefix, metrics, max_width):
+            starts.append(end - 1)
+    return list(zip(starts, starts[1:] + [len(words)]))
+
+
+def layout_ink(words, metrics, max_width, box):
+    """Lines centred by their ink width and stacked by their ink height (no spacing)"""
+    lines = []
+    for start, end in wrap_words_ink(words, metrics, max_width):
+        text = " ".join(words[start:end])
+        x0, y0, x1, y1 = metrics.font.getbbox(text)  # One measure per line
+        lines.append(LineBox(text, x0, y0, x1 - x0, y1 - y0))
+
+    box_width, box_height = box if box else (max_width, sum(line.height for line in lines))
+    y = (box_height - sum(line.height for line in lines)) // 2
+    for line in lines:
+        # draw.text at (x, y) with the ink box width/height, as draw.textbbox measured them
+        line.x = (box_width - line.width) // 2
+        line.y = y
+        y += line.height
+    return lines
+
+
+def layout_text(text, font, max_width, box=None, align="center", valign="center", line_spacing=0, ink=False):
+    """Wrap text to max_width and position every line inside box (width, height)
+
+    ink=True: centred lines measured by their ink box, as make_text_image always drew them
+    """
+    if align not in ALIGNMENTS:
+        raise ValueError(f"Unknown alignment: {align} (expected one of {', '.join(ALIGNMENTS)})")
+
+    metrics = font_metrics(font)
+    words = text.split()
+    if ink:
+        if align != "center" or valign != "center" or line_spacing:
+            raise ValueError("ink layout is centred, without line spacing")
+        return layout_ink(words, metrics, max_width, box)
+    ranges = wrap_words(words, metrics, max_width)
+
+    line_height = metrics.line_height + line_spacing
+    total_height = len(ranges) * line_height - line_spacing
+    box_width, box_height = box if box else (max_width, total_height)
+    if valign == "center":
+        y = (box_height - total_height) // 2
+    elif valign == "bottom":
+        y = box_height - total_height
+    else:
+        y = 0
+
+    lines = []
+    for start, end, width in ranges:
+        if align == "center":
+            x = int((box_width - width) // 2)
+        elif align == "right":
+            x = int(box_width - width)
+        else:
+            x = 0
+        lines.append(LineBox(" ".join(words[start:end]), x, y, width, metrics.line_height))
+        y += line_height
+    return lines
+
+
+def draw_lines(draw, lines, font, fill, offset=(0, 0), **kwargs):
+    """Draw laid-out lines with an ImageDraw"""
+    dx, dy = offset
+    for line in lines:
+        draw.text((line.x + dx, line.y + dy), line.text, font=font, fill=fill, **kwargs)
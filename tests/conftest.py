@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run every test in its own directory, so output/.cache stays out of the repo"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def assets(tmp_path):
+    """Small synthetic photo, voice and text (the benchmark suite's generator)"""
+    from benchmark_pipeline import create_synthetic_assets
+
+    return create_synthetic_assets(str(tmp_path / "assets"), duration=3.0, photo_size=(300, 400))
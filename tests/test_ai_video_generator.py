@@ -0,0 +1,27 @@
+import os
+
+import numpy as np
+import pytest
+
+ai_video_generator = pytest.importorskip("ai_video_generator")  # Needs torch, OpenCLIP and ModelScope
+
+from pipelined_writer import write_frames
+
+
+def test_animation_args_encode_odd_frame_sizes(tmp_path):
+    path = str(tmp_path / "animation.mp4")
+    frames = [np.full((255, 257, 3), 8 * i, dtype=np.uint8) for i in range(5)]
+    assert write_frames(frames, path, 30.0, output_args=ai_video_generator.ANIMATION_ENCODE_ARGS + [path]) == 5
+
+
+def test_frames_to_video_writes_into_the_job_directory(tmp_path, workdir):
+    generator = object.__new__(ai_video_generator.AIVideoGenerator)
+    generator.temp_dir = str(tmp_path / "job")
+    os.makedirs(generator.temp_dir)
+
+    clip = generator.frames_to_video([np.zeros((63, 65, 3), dtype=np.uint8)] * 3)
+    try:
+        assert os.path.dirname(clip.filename) == generator.temp_dir
+        assert not os.path.exists(os.path.join(workdir, "temp_animation.mp4"))
+    finally:
+        clip.close()
@@ -0,0 +1,62 @@
+import cv2
+import numpy as np
+from PIL import Image
+
+from asset_ingest import ingest_photo, ingest_photo_file, oriented_size, working_size
+
+
+def save_rotated_jpeg(path, size=(640, 480), orientation=6):
+    """Landscape JPEG, left half red, tagged to display rotated"""
+    frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+    frame[:, : size[0] // 2] = (255, 0, 0)
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    Image.fromarray(frame).save(path, quality=95, exif=exif)
+
+
+def test_oriented_size_swaps_for_rotated_photos(tmp_path):
+    path = str(tmp_path / "phone.jpg")
+    save_rotated_jpeg(path)
+    assert oriented_size(path) == (480, 640)
+
+
+def test_working_size_floors_like_moviepy_resize():
+    assert working_size((3024, 4032), height=720) == (540, 720)
+    assert working_size((1001, 1000), height=720) == (720, 720)
+    assert working_size((1001, 1000), size=(256, 256)) == (256, 256)
+
+
+def test_ingest_applies_exif_orientation(tmp_path):
+    path = str(tmp_path / "phone.jpg")
+    save_rotated_jpeg(path)
+    frame = ingest_photo(path, height=320)
+    assert frame.shape == (320, 240, 3)
+    # Orientation 6 turns the picture clockwise: the red left half ends up on top
+    assert frame[10, 120, 0] > 200 and frame[10, 120, 2] < 50
+    assert frame[-10, 120, 0] < 50
+
+
+def test_ingest_is_cached_by_content(tmp_path):
+    path = str(tmp_path / "phone.jpg")
+    save_rotated_jpeg(path)
+    first = ingest_photo(path, height=320)
+    assert len(list((tmp_path / "output" / ".cache" / "assets").glob("*.npy"))) == 1
+    second = ingest_photo(path, height=320)
+    np.testing.assert_array_equal(first, second)
+
+
+def test_png_matches_full_decode_and_moviepy_resize(tmp_path):
+    rng = np.random.default_rng(0)
+    photo = rng.integers(0, 256, size=(400, 300, 3), dtype=np.uint8)
+    path = str(tmp_path / "photo.png")
+    Image.fromarray(photo).save(path)
+    expected = cv2.resize(photo, (150, 200), interpolation=cv2.INTER_AREA)
+    np.testing.assert_array_equal(ingest_photo(path, height=200), expected)
+
+
+def test_ingest_photo_file_writes_the_normalized_png(tmp_path):
+    path = str(tmp_path / "phone.jpg")
+    save_rotated_jpeg(path)
+    png_path = ingest_photo_file(path, height=320)
+    with Image.open(png_path) as img:
+        assert img.size == (240, 320)
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+import background_library
+from benchmark_pipeline import BenchmarkSuite, add_e2e_benchmarks, cache_root, cold
+
+CACHE_FILE = os.path.join("output", ".cache", "assets", "entry")
+
+
+def fill_cache():
+    """A render that finds its cache entry, or writes it; returns whether it was warm"""
+    warm = os.path.exists(CACHE_FILE)
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    open(CACHE_FILE, "w").close()
+    return warm
+
+
+def test_cold_runs_start_from_empty_caches_outside_the_working_tree(tmp_path):
+    seen = []
+    (tmp_path / "scratch").mkdir()
+    run = cold(lambda: seen.append(fill_cache()), str(tmp_path / "scratch"))
+    run()
+    run()
+    assert seen == [False, False]
+    assert not os.path.exists("output")
+    assert os.listdir(tmp_path / "scratch") == []
+
+
+def test_cache_root_moves_the_caches_and_the_background_library(tmp_path, monkeypatch):
+    library = object()
+    monkeypatch.setattr(background_library, "_library", library)
+    with cache_root(str(tmp_path / "caches")):
+        assert background_library._library is None
+        assert not fill_cache()
+        assert fill_cache()
+    assert background_library._library is library
+    assert os.path.exists(tmp_path / "caches" / CACHE_FILE) and not os.path.exists("output")
+
+
+def test_e2e_cache_modes(tmp_path):
+    assets = {"photo": "p.png", "voice": "v.wav", "text": "t.txt", "scratch": str(tmp_path)}
+    warm = BenchmarkSuite(name_filter="e2e.create_video")
+    add_e2e_benchmarks(warm, assets, caches="warm")
+    assert [(name, repeat, warmup) for name, _, repeat, warmup in warm.cases] == [("e2e.create_video@warm", 1, True)]
+
+    with pytest.raises(ValueError, match="Unknown cache mode"):
+        add_e2e_benchmarks(BenchmarkSuite(), assets, caches="lukewarm")
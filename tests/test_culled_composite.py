@@ -0,0 +1,68 @@
+import numpy as np
+from moviepy.editor import ColorClip, ImageClip, VideoClip, CompositeVideoClip
+
+from culled_composite import CulledCompositeVideoClip, covers_frame, resolve_position
+
+FRAME_SIZE = (64, 48)
+
+
+def solid(size, color=(0, 0, 80), duration=1.0):
+    return ColorClip(size, color=color).set_duration(duration)
+
+
+def test_covers_frame_needs_an_opaque_clip_over_the_whole_frame():
+    assert covers_frame(solid(FRAME_SIZE), 0.5, FRAME_SIZE)
+    assert not covers_frame(solid((63, 48)), 0.5, FRAME_SIZE)
+    assert not covers_frame(solid(FRAME_SIZE).set_position((1, 0)), 0.5, FRAME_SIZE)
+    # Larger than the frame, partly off-screen or centred
+    assert covers_frame(solid((80, 60)).set_position((-10, -5)), 0.5, FRAME_SIZE)
+    assert covers_frame(solid((80, 60)).set_position("center"), 0.5, FRAME_SIZE)
+    assert not covers_frame(solid((80, 60)).set_position((-20, 0)), 0.5, FRAME_SIZE)
+
+
+def test_covers_frame_rejects_masked_clips():
+    rgba = np.full((48, 64, 4), 255, dtype=np.uint8)
+    assert not covers_frame(ImageClip(rgba).set_duration(1.0), 0.5, FRAME_SIZE)
+    assert not covers_frame(solid(FRAME_SIZE).set_opacity(0.5), 0.5, FRAME_SIZE)
+    assert not covers_frame(ColorClip(FRAME_SIZE, color=1.0, ismask=True).set_duration(1.0), 0.5, FRAME_SIZE)
+
+
+def test_covers_frame_follows_moving_clips():
+    sliding = solid((80, 48)).set_position(lambda t: (-16 + int(32 * t), 0))
+    assert covers_frame(sliding, 0.25, FRAME_SIZE)
+    assert not covers_frame(sliding, 0.75, FRAME_SIZE)
+
+
+def test_resolve_position_matches_blit_on():
+    assert resolve_position("center", (20, 10), FRAME_SIZE) == (22, 19)
+    assert resolve_position(("right", "bottom"), (20, 10), FRAME_SIZE) == (44, 38)
+    assert resolve_position((0.5, 0.25), (20, 10), FRAME_SIZE, relative=True) == (32, 12)
+    assert resolve_position((3.7, -2.2), (20, 10), FRAME_SIZE) == (3, -2)
+
+
+def test_culled_composite_skips_hidden_layers_with_identical_frames():
+    rendered = []
+
+    def hidden_frame(t):
+        rendered.append(t)
+        return np.full((48, 64, 3), 50, dtype=np.uint8)
+
+    hidden = VideoClip(hidden_frame, duration=1.0)
+    # Covers the frame for the first half second only
+    cover = solid(FRAME_SIZE, color=(200, 0, 0)).set_position(lambda t: (0, 0) if t < 0.5 else (0, 10))
+    title = ImageClip(np.full((8, 8, 4), 255, dtype=np.uint8)).set_duration(1.0).set_position((4, 4))
+    layers = [hidden, cover, title]
+
+    culled = CulledCompositeVideoClip(layers, size=FRAME_SIZE).set_fps(10)
+    plain = CompositeVideoClip(layers, size=FRAME_SIZE)
+    times = [i / 10 for i in range(10)]
+    for t in times:
+        rendered.clear()
+        assert np.array_equal(culled.get_frame(t), plain.get_frame(t))
+        # plain renders the hidden layer on every frame, culled only once it shows
+        assert len(rendered) == (1 if t < 0.5 else 2)
+
+    stats = culled.culling_stats()
+    assert stats["culled_layer_frames"] == 5
+    assert stats["culled_per_layer"] == {0: 5}
+    assert stats["rendered_layer_frames"] == 5 * 2 + 5 * 3
@@ -0,0 +1,45 @@
+import numpy as np
+
+from encoding_profiles import probe, analyze_motion, choose_profile, select_encoder_profile
+
+
+def test_probe_accepts_int64_composite_frames():
+    # CompositeVideoClip returns int64 frames where only its ColorClip background shows
+    frame = np.full((720, 1280, 3), 40, dtype=np.int64)
+    small = probe(frame)
+    assert small.shape == (90, 160)
+    assert np.allclose(small, 40)
+
+
+def test_probe_drops_alpha():
+    frame = np.zeros((90, 160, 4), dtype=np.uint8)
+    assert probe(frame).shape == (90, 160)
+
+
+def test_static_timeline_gets_the_static_class(capsys):
+    profile = select_encoder_profile(lambda t: np.zeros((180, 320, 3), dtype=np.int64), 5.0, 24)
+    assert profile.content == "static"
+    assert "Motion analysis failed" not in capsys.readouterr().out
+
+
+def test_moving_timeline_gets_a_motion_class():
+    blocks = (np.indices((180, 320)).sum(axis=0) // 40 % 2 * 255).astype(np.uint8)
+
+    def checkerboard(t):
+        # Flips every frame
+        frame = blocks if round(t * 24) % 2 else 255 - blocks
+        return np.repeat(frame[:, :, None], 3, axis=2)
+
+    stats = analyze_motion(checkerboard, 5.0, 24)
+    assert stats["motion"] > 50
+    assert choose_profile(stats, 24).content == "high_motion"
+
+
+def test_failed_analysis_falls_back_and_says_so(capsys):
+    def broken(t):
+        raise RuntimeError("decoder gone")
+
+    profile = select_encoder_profile(broken, 5.0, 24)
+    assert profile.content == "unknown" and profile.preset == "medium"
+    out = capsys.readouterr().out
+    assert "RuntimeError: decoder gone" in out and "falling back" in out
@@ -0,0 +1,94 @@
+import re
+
+from render_timeline import build_timeline
+from filtergraph_backend import TimelineCompiler, covers_timeline
+
+SENTENCES = ["Hello, my name is Test", "I build things", "I like video", "Thanks for watching"]
+
+
+def compile_graph(timeline, frame_size=None, fps=24, scale=1.0):
+    from PIL import Image
+
+    sprites = {layer.name: Image.new("RGBA", layer.size, (255, 255, 255, 255))
+               for layer in timeline.layers if layer.kind == "sprite"}
+    compiler = TimelineCompiler(timeline, frame_size or timeline.size, fps, scale, sprites, work_dir=".")
+    graph, label = compiler.compile()
+    return compiler, graph, label
+
+
+def test_timeline_runs_until_the_last_layer_ends():
+    # The skill rows are placed at fixed times, past an 8 s voice
+    timeline = build_timeline("dynamic", 8.0, SENTENCES, (300, 400), "photo.png", trim_text=False)
+    assert timeline.duration == 13.5
+    long_timeline = build_timeline("dynamic", 20.0, SENTENCES, (300, 400), "photo.png", trim_text=False)
+    assert long_timeline.duration == 20.0
+
+
+def test_short_voice_drops_empty_layers_and_uses_a_black_base():
+    timeline = build_timeline("dynamic", 3.0, SENTENCES, (300, 400), "photo.png", trim_text=False)
+    compiler, graph, label = compile_graph(timeline, frame_size=(320, 180), fps=8, scale=0.25)
+    text = ";".join(graph.chains)
+    assert not re.search(r"loop=loop=-", text)
+    assert all(layer.duration > 0 for layer in compiler.visible_layers())
+    # The background stops with the voice, so it no longer covers the whole intro
+    assert not covers_timeline(timeline.layers[0], timeline)
+    assert any(chain.startswith("color=c=black") for chain in graph.chains)
+    assert text.endswith(f"format=yuv420p[{label}]")
+
+
+def test_full_frame_video_hides_the_background():
+    timeline = build_timeline("enhanced", 20.0, SENTENCES, lipsync_path="lipsync.mp4", trim_text=False)
+    compiler, graph, _ = compile_graph(timeline)
+    kinds = [layer.kind for layer in compiler.visible_layers()]
+    assert kinds[0] == "video" and "background" not in kinds
+    # The covering video is the base: no black source and one input per remaining layer
+    assert not any(chain.startswith("color=") for chain in graph.chains)
+    assert len(graph.inputs) == len(compiler.visible_layers())
+
+
+def test_overlays_are_enabled_only_while_the_layer_shows():
+    timeline = build_timeline("dynamic", 20.0, SENTENCES, (300, 400), "photo.png", trim_text=False)
+    _, graph, _ = compile_graph(timeline)
+    overlays = [chain for chain in graph.chains if "overlay=" in chain]
+    assert len(overlays) == len(timeline.layers) - 1
+    title = [chain for chain in overlays if "[l2]" in chain][0]
+    assert "enable='gte(t,0.000000)*lt(t,3.000000)'" in title
+    # Bouncing skills get a y expression on the intro clock
+    skill = [chain for chain in overlays if "[l7]" in chain][0]
+    assert "sin(mod(t-8.000000,2)/2*2*PI)" in skill
+
+
+def rendered_duration(path):
+    import subprocess
+    from ffmpeg_tools import ffmpeg_binary
+
+    result = subprocess.run([ffmpeg_binary(), "-hide_banner", "-i", path], capture_output=True, text=True)
+    hours, minutes, seconds = re.search(r"Duration: (\d+):(\d+):([\d.]+)", result.stderr).groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def test_backends_render_the_same_duration(assets, tmp_path):
+    import create_dynamic_video
+    from benchmark_pipeline import patched
+
+    durations = {}
+    for backend in ("moviepy", "ffmpeg"):
+        output = str(tmp_path / backend / "dynamic.mp4")
+        with patched(create_dynamic_video, PHOTO_PATH=assets["photo"], VOICE_PATH=assets["voice"],
+                     TEXT_PATH=assets["text"], OUTPUT_PATH=output):
+            create_dynamic_video.main(["--preview", "--backend", backend])
+        durations[backend] = rendered_duration(str(tmp_path / backend / "dynamic_preview.mp4"))
+    # The skill rows outlast the 3 s voice: both compositors run to 13.5 s
+    assert abs(durations["moviepy"] - 13.5) < 0.2
+    assert abs(durations["ffmpeg"] - durations["moviepy"]) < 0.2
+
+
+def test_ffmpeg_backend_warns_about_ignored_frame_options(assets, capsys):
+    import create_video
+    from benchmark_pipeline import patched
+
+    with patched(create_video, PHOTO_PATH=assets["photo"], VOICE_PATH=assets["voice"], TEXT_PATH=assets["text"]):
+        create_video.main(["--plan", "--backend", "ffmpeg", "--vfr", "--yuv420p"])
+        assert "ignoring --vfr/--yuv420p" in capsys.readouterr().out
+        create_video.main(["--plan", "--backend", "moviepy", "--vfr"])
+        assert "ignoring" not in capsys.readouterr().out
@@ -0,0 +1,105 @@
+import re
+
+import numpy as np
+from moviepy.editor import ColorClip, ImageClip, CompositeVideoClip
+
+from frame_dedup import composite_key, frame_keys, mark_still, plan_duplicates, setpts_expression, DedupPlan
+from encoding_profiles import EncoderProfile
+from pipelined_writer import render_video, write_pipelined
+
+SIZE = (64, 48)
+
+
+def evaluate_setpts(expression, n):
+    """Value of a setpts expression (N, N+k and nested if(lt(N,m),a,b)) at frame N"""
+    python = re.sub(r"if\(lt\(N,(\d+)\),", r"branch(N < \1, ", expression)
+    return eval(python, {"branch": lambda condition, a, b: a if condition else b, "N": n})
+
+
+def sprite(color, position, duration=2.0, size=(16, 16)):
+    frame = np.full((size[1], size[0], 3), color, dtype=np.uint8)
+    return ImageClip(frame).set_duration(duration).set_position(position)
+
+
+def test_setpts_expression_restores_frame_indices():
+    for timestamps in ([0, 1, 2, 3], [0, 5, 6, 7, 20, 21, 40], [0, 3], [0, 2, 4, 6, 8, 10, 12, 59]):
+        expression = setpts_expression(timestamps)
+        assert [evaluate_setpts(expression, n) for n in range(len(timestamps))] == timestamps
+    assert setpts_expression([0, 1, 2]) == "N"
+    assert setpts_expression([4, 5, 6]) == "N+4"
+
+
+def test_composite_key_follows_fades_and_positions():
+    background = mark_still(ColorClip(SIZE, color=(0, 0, 80)).set_duration(2.0))
+    fading = sprite(200, (8, 8)).fadein(0.5)
+    fading = mark_still(fading, fade_in=0.5)
+    composite = CompositeVideoClip([background, fading], size=SIZE)
+
+    assert composite_key(composite, 0.1) != composite_key(composite, 0.2)  # Fading in
+    assert composite_key(composite, 1.0) == composite_key(composite, 1.5)  # Still
+
+    moving = mark_still(sprite(200, lambda t: (int(10 * t), 8)))
+    composite = CompositeVideoClip([background, moving], size=SIZE)
+    assert composite_key(composite, 0.0) != composite_key(composite, 1.0)
+
+
+def test_composite_key_ignores_covered_layers_and_needs_every_visible_key():
+    unkeyed = sprite(100, (0, 0))
+    cover = mark_still(ColorClip(SIZE, color=(0, 0, 80)).set_duration(2.0))
+    title = mark_still(sprite(200, (8, 8)))
+
+    # The unkeyed layer is hidden under the full-frame cover
+    assert composite_key(CompositeVideoClip([unkeyed, cover, title], size=SIZE), 1.0) is not None
+    # On top it is visible, and its frames cannot be predicted
+    assert composite_key(CompositeVideoClip([cover, unkeyed, title], size=SIZE), 1.0) is None
+
+
+def test_keys_go_stale_after_a_later_effect():
+    still = mark_still(sprite(200, (8, 8)))
+    assert frame_keys(still, 10)[0] is not None
+    assert frame_keys(still.fl_image(lambda frame: 255 - frame), 10)[0] is None
+
+
+def test_dedup_plan_copies_and_vfr_timestamps():
+    keys = ["a", "a", "a", None, None, "b", "b", "c", "c", "c"]
+    plan = DedupPlan(keys)
+    assert plan.rendered == [0, 3, 4, 5, 7]
+    assert plan.copies == [3, 1, 1, 2, 3]
+    assert plan.written == len(keys)
+
+    vfr = DedupPlan(keys, vfr=True)
+    assert vfr.copies == [1, 1, 1, 1, 2]
+    assert vfr.timestamps() == [0, 3, 4, 5, 7, 9]
+    assert vfr.duplicates == 5
+
+
+def test_pipelined_writer_renders_each_run_once():
+    background = mark_still(ColorClip(SIZE, color=(0, 0, 80)).set_duration(2.0))
+    title = mark_still(sprite(200, (8, 8)).fadein(0.5), fade_in=0.5)
+    clip = CompositeVideoClip([background, title], size=SIZE)
+
+    plan = plan_duplicates(clip, 10)
+    stats = write_pipelined(clip, "dedup.mp4", 10, workers=2)
+    assert stats["rendered_frames"] == len(plan.rendered) == 6  # 5 fade frames, then one still
+    assert stats["written_frames"] == 20
+
+
+def test_moviepy_writer_reports_the_options_it_ignores(capsys):
+    clip = ColorClip(SIZE, color=(0, 0, 80)).set_duration(0.2)
+    encoder = EncoderProfile("static", "ultrafast", None, 23, 48)
+    render_video(clip, "plain.mp4", 10, encoder, workers=0, vfr=True, pix_fmt="yuv420p")
+    assert "ignoring vfr, pix_fmt=yuv420p" in capsys.readouterr().out
+    render_video(clip, "plain.mp4", 10, encoder, workers=0)
+    assert "ignoring" not in capsys.readouterr().out
+
+
+def test_publish_and_stream_report_vfr_as_ignored(assets, capsys):
+    import create_video
+    from benchmark_pipeline import patched
+
+    with patched(create_video, PHOTO_PATH=assets["photo"], VOICE_PATH=assets["voice"], TEXT_PATH=assets["text"]):
+        create_video.main(["--plan", "--publish", "out", "--vfr"])
+        assert "--publish/--stream encode every RGB frame; ignoring --vfr" in capsys.readouterr().out
+        create_video.main(["--plan", "--stream", "out", "--backend", "ffmpeg", "--yuv420p"])
+        output = capsys.readouterr().out
+        assert "ignoring --yuv420p" in output and "ffmpeg backend encodes" not in output
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from onnx_face_engine import frames_array, to_frames
+
+
+def test_to_frames_accepts_channel_first_and_last():
+    frames = np.random.default_rng(0).random((4, 24, 32, 3)).astype(np.float32)
+    expected = [np.asarray(frame) for frame in to_frames(frames)]
+    assert expected[0].shape == (24, 32, 3)
+
+    for output in (frames.transpose(0, 3, 1, 2), frames[None], frames.transpose(0, 3, 1, 2)[None]):
+        assert all(np.array_equal(np.asarray(a), b) for a, b in zip(to_frames(output), expected))
+
+
+def test_frames_array_rejects_other_layouts():
+    with pytest.raises(ValueError, match="expected frames"):
+        frames_array(np.zeros((4, 24, 32)))
+    with pytest.raises(ValueError, match="expected frames"):
+        frames_array(np.zeros((2, 4, 3, 24, 32)))
+
+
+def test_face_network_explains_unsupported_models():
+    torch = pytest.importorskip("torch")
+    from onnx_face_engine import face_network
+
+    class Pipeline:
+        """Called as infer({'image': ..., 'audio': ...}), like the ModelScope face pipeline"""
+
+        def infer(self, inputs):
+            return []
+
+    with pytest.raises(RuntimeError, match="forward\\(image, audio\\)"):
+        face_network(Pipeline())
+    with pytest.raises(RuntimeError, match="did not load"):
+        face_network(None)
+
+    class Network(torch.nn.Module):
+        def forward(self, image, audio):
+            return image.unsqueeze(1).expand(-1, audio.shape[1], -1, -1, -1)
+
+    network = Network()
+    Pipeline.model = network
+    assert face_network(Pipeline()) is network
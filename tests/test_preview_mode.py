@@ -0,0 +1,41 @@
+import numpy as np
+
+from preview_mode import FINAL_PROFILE, preview_profile, publish_profile
+
+
+def test_final_profile_leaves_layout_values_alone():
+    assert FINAL_PROFILE.px(412.7) == 412.7
+    assert FINAL_PROFILE.size((1280, 720)) == (1280, 720)
+    assert FINAL_PROFILE.fontsize(48) == 48
+
+
+def test_scaled_profiles_round_to_even_sizes():
+    preview = preview_profile(0.25, 8)
+    assert preview.px(412.7) == 103
+    assert preview.size((1280, 720)) == (320, 180)
+    assert preview.size((1001, 999)) == (250, 250)
+    assert preview.fontsize(12) == 6
+    assert publish_profile(1080).size((1280, 720)) == (1920, 1080)
+
+
+def test_final_bounce_matches_the_baseline_blit():
+    """Bouncing rows land where the baseline's float positions put them"""
+    from moviepy.editor import ColorClip, CompositeVideoClip, ImageClip
+
+    import create_dynamic_video
+    from benchmark_pipeline import patched
+    from sprite_atlas import SpriteAtlas
+
+    def baseline_position(t):
+        return ('center', 500 + 20 * np.sin((t % 2) / 2 * 2 * np.pi))
+
+    black = ColorClip((1280, 720), color=(0, 0, 0)).set_duration(1.0)
+    # Positions are computed per frame from the module's PROFILE, so render inside the patch
+    with patched(create_dynamic_video, PROFILE=FINAL_PROFILE, SPRITES=SpriteAtlas()):
+        clip = create_dynamic_video.create_bouncing_element("• Python", 1.0, 0, 500)
+        canvas = np.array(create_dynamic_video.create_text_image_pil("• Python", fontsize=36, color='#00FF00'))
+        baseline = ImageClip(canvas, transparent=True).set_duration(1.0).set_position(baseline_position)
+        current = CompositeVideoClip([black, clip], size=(1280, 720))
+        expected = CompositeVideoClip([black, baseline], size=(1280, 720))
+        for t in (0.2, 0.3, 0.55, 0.8):
+            np.testing.assert_array_equal(current.get_frame(t), expected.get_frame(t))
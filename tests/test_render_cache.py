@@ -0,0 +1,159 @@
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+import render_trace
+from render_cache import RenderCache, render_key, render_atomically, MEGABYTE
+
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_render_key_depends_on_contents_and_canonical_params(tmp_path):
+    photo = write(tmp_path / "photo.png", b"pixels")
+    copy = shutil.copy(photo, tmp_path / "renamed.png")
+    params = {"size": (1280, 720), "fps": 24}
+
+    key = render_key([str(photo)], params, code="v1")
+    assert render_key([str(copy)], {"fps": 24, "size": [1280, 720]}, code="v1") == key
+    assert render_key([str(photo)], dict(params, fps=30), code="v1") != key
+    assert render_key([str(photo)], params, code="v2") != key
+    assert render_key([str(tmp_path / "missing.png")], params, code="v1") != key
+
+    write(photo, b"other pixels")
+    assert render_key([str(photo)], params, code="v1") != key
+
+
+def test_fetch_or_render_renders_once_and_publishes(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    calls = []
+
+    def render(path):
+        calls.append(path)
+        write(path, b"video")
+        return True
+
+    assert not cache.fetch("k" * 64, "out.mp4")
+    assert cache.fetch_or_render("k" * 64, render, "out.mp4")
+    assert cache.fetch_or_render("k" * 64, render, "again.mp4")
+    assert len(calls) == 1
+    assert open("again.mp4", "rb").read() == b"video"
+    assert not [name for name in os.listdir(cache.cache_dir) if "partial" in name or name.endswith(".lock")]
+
+
+def test_writing_the_output_leaves_the_cache_entry_alone(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    cache.fetch_or_render("k" * 64, lambda path: write(path, b"video") and True, "out.mp4")
+
+    # e.g. a later --no-cache render to the same output path
+    with open("out.mp4", "wb") as f:
+        f.write(b"B")
+    with open(cache.entry_path("k" * 64), "rb") as f:
+        assert f.read() == b"video"
+    assert cache.fetch("k" * 64, "again.mp4")
+    assert open("again.mp4", "rb").read() == b"video"
+
+
+def test_render_atomically_keeps_the_old_output_on_failure():
+    write("out.mp4", b"old")
+
+    def crash(path):
+        write(path, b"trunc")
+        raise RuntimeError("ffmpeg died")
+
+    with pytest.raises(RuntimeError):
+        render_atomically(crash, "out.mp4")
+    assert render_atomically(lambda path: write(path, b"half") and False, "out.mp4") is False
+    assert open("out.mp4", "rb").read() == b"old"
+    assert os.listdir(".") == ["out.mp4"]
+
+    assert render_atomically(lambda path: write(path, b"new") and True, "out.mp4")
+    assert open("out.mp4", "rb").read() == b"new"
+
+
+def test_render_once_does_not_repeat_the_lookup(tmp_path, monkeypatch):
+    tracer = render_trace.Tracer()
+    monkeypatch.setattr(render_trace, "_tracer", tracer)
+    cache = RenderCache(str(tmp_path / "cache"))
+
+    assert not cache.fetch("r" * 64, "out.mp4")
+    assert cache.render_once("r" * 64, lambda path: write(path, b"video") and True, "out.mp4")
+    assert tracer.caches["render"] == {"hits": 0, "misses": 1}
+    assert open("out.mp4", "rb").read() == b"video"
+
+
+def test_failed_renders_are_not_cached(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+
+    def render(path):
+        write(path, b"half a video")
+        return False
+
+    assert cache.fetch_or_render("f" * 64, render, "out.mp4") is False
+    assert cache.entries() == []
+
+
+def test_identical_concurrent_requests_coalesce(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    calls = []
+
+    def render(path):
+        calls.append(path)
+        time.sleep(0.3)
+        write(path, b"video")
+        return True
+
+    threads = [threading.Thread(target=cache.fetch_or_render, args=("c" * 64, render, f"out{i}.mp4"))
+               for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert all(open(f"out{i}.mp4", "rb").read() == b"video" for i in range(3))
+
+
+def cache_entries(cache, names):
+    """1 MB entries, each 100 s older than the one before"""
+    now = time.time()
+    for age, name in enumerate(names):
+        path = write(cache.entry_path(name), b"\0" * MEGABYTE)
+        os.utime(path, (now - 100 * age, now - 100 * age))
+
+
+def remaining(cache):
+    return sorted(os.path.basename(path) for path, _, _ in cache.entries())
+
+
+def test_evict_drops_least_recently_used_first(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"), max_mb=2.5)
+    cache_entries(cache, ["newest", "a", "b", "c", "oldest"])
+
+    # A lookup marks the oldest entry as used, and an entry being re-rendered is never evicted
+    assert cache.lookup("oldest")
+    write(cache.entry_path("c") + ".lock", b"")
+
+    assert cache.evict() == 3
+    assert remaining(cache) == ["c.mp4", "oldest.mp4"]
+
+
+def test_evict_spares_the_entry_just_rendered(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"), max_mb=1.5)
+    cache_entries(cache, ["newest", "a", "oldest"])
+    assert cache.evict(keep="oldest") == 2
+    assert remaining(cache) == ["oldest.mp4"]
+
+
+def test_evict_keeps_everything_within_the_bound(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"), max_mb=4)
+    for name in ("a", "b", "c"):
+        write(cache.entry_path(name), b"\0" * MEGABYTE)
+    write(os.path.join(cache.cache_dir, "d.123.partial.mp4"), b"\0" * (4 * MEGABYTE))
+    assert cache.evict() == 0
+    assert len(cache.entries()) == 3
@@ -0,0 +1,67 @@
+import json
+import subprocess
+import sys
+
+import render_planner
+from render_planner import buffered_frames, load_sentences, plan_render
+from render_timeline import build_timeline
+
+from conftest import SRC_DIR
+
+
+def test_load_sentences_matches_generators(assets):
+    from create_dynamic_video import load_intro_text
+
+    assert load_sentences(assets["text"]) == load_intro_text(assets["text"])
+
+
+def test_plan_imports_no_render_modules(assets):
+    """--plan reads metadata only: no MoviePy, cv2 or generator modules"""
+    code = (
+        "import json, sys\n"
+        "from render_planner import plan_render\n"
+        f"plan_render('dynamic', photo_path={assets['photo']!r}, audio_path={assets['voice']!r}, "
+        f"text_path={assets['text']!r})\n"
+        "print(json.dumps(sorted(sys.modules)))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=SRC_DIR, capture_output=True, text=True, check=True)
+    modules = set(json.loads(result.stdout.splitlines()[-1]))
+    assert not modules & {"moviepy", "cv2", "create_dynamic_video", "ai_intro_video"}
+
+
+def test_frame_buffer_settings_mirror_the_renderers():
+    import frame_store
+    import shm_frame_ring
+
+    assert render_planner.FRAME_MEMORY_MB == frame_store.MEMORY_BUDGET_MB
+    assert render_planner.RING_SLOTS == shm_frame_ring.DEFAULT_SLOTS
+
+
+def test_intro_frames_bounded_by_frame_store_and_ring():
+    timeline = build_timeline("intro", 60.0)
+    frame_mb = timeline.size[0] * timeline.size[1] * 3 / render_planner.MEGABYTE
+
+    in_ram = buffered_frames(timeline)
+    assert in_ram < timeline.frame_count
+    assert in_ram * frame_mb <= render_planner.FRAME_MEMORY_MB
+    assert buffered_frames(timeline, frame_memory_mb=64) < in_ram
+    assert buffered_frames(timeline, workers=4) == render_planner.RING_SLOTS
+    assert buffered_frames(timeline, workers=12) == 13
+
+    short = build_timeline("intro", 1.0)
+    assert buffered_frames(short) == short.frame_count
+
+
+def test_intro_memory_stays_flat_with_duration():
+    short = render_planner.plan_timeline(build_timeline("intro", 60.0))
+    long = render_planner.plan_timeline(build_timeline("intro", 600.0))
+    assert long["peak_memory_mb"] == short["peak_memory_mb"]
+
+
+def test_plan_render_follows_the_timeline(assets):
+    plan = plan_render("dynamic", photo_path=assets["photo"], audio_path=assets["voice"], text_path=assets["text"])
+    timeline = build_timeline("dynamic", 3.0, sentences=load_sentences(assets["text"]), photo_size=(300, 400),
+                              photo_path=assets["photo"])
+    assert plan["duration_s"] == round(timeline.duration, 3)
+    assert plan["frames"] == timeline.frame_count
+    assert plan["sentences"] == len(load_sentences(assets["text"]))
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pytest
+from moviepy.editor import ColorClip, ImageClip, CompositeVideoClip
+
+import render_trace
+from render_trace import Tracer, get_tracer
+from frame_dedup import frame_keys, is_composite, mark_still
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    """A fresh enabled tracer for the test"""
+    monkeypatch.setattr(render_trace, "_tracer", Tracer())
+    return get_tracer()
+
+
+def still_composite():
+    background = mark_still(ColorClip((64, 48), color=(0, 0, 80)).set_duration(1.0))
+    photo = mark_still(ImageClip(np.full((16, 16, 3), 200, dtype=np.uint8)).set_duration(1.0).set_position((8, 8)))
+    return CompositeVideoClip([background, photo], size=(64, 48)).set_fps(10)
+
+
+def test_instrument_clip_keeps_frame_keys(tracer):
+    clip = still_composite()
+    keys = frame_keys(clip, 10)
+    assert keys[0] is not None
+
+    tracer.instrument_clip(clip, "frame.composite")
+    assert is_composite(clip)
+    assert frame_keys(clip, 10) == keys
+
+
+def test_instrument_clip_times_written_frames(tracer):
+    clip = tracer.instrument_clip(still_composite(), "frame.composite")
+    clip.write_videofile("traced.mp4", fps=10, audio=False, logger=None)
+    assert os.path.exists("traced.mp4")
+    assert len(tracer.histograms["frame.composite"].samples) == 10
+
+
+def test_caches_report_hits_and_misses(tracer, assets):
+    from asset_ingest import ingest_photo
+    from audio_track_cache import encode_audio_file
+    from background_library import BackgroundLibrary
+    from render_cache import RenderCache
+
+    for _ in range(2):
+        ingest_photo(assets["photo"], height=100)
+        encode_audio_file(assets["voice"])
+        BackgroundLibrary("library").build("professional_wave", (32, 24))
+        RenderCache("renders").fetch("0" * 40, "out.mp4")
+
+    assert tracer.caches["asset"] == {"hits": 1, "misses": 1}
+    assert tracer.caches["audio_track"] == {"hits": 1, "misses": 1}
+    assert tracer.caches["background"] == {"hits": 1, "misses": 1}
+    assert tracer.caches["render"] == {"hits": 0, "misses": 2}
+    assert "asset cache 1/2 hits" in tracer.summary()
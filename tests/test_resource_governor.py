@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+import resource_governor
+from resource_governor import CoreBudget, govern, parse_cpu_list
+
+
+@pytest.fixture
+def governor(monkeypatch):
+    """govern() on an 8-CPU machine, recording the limits instead of applying them"""
+    applied = {}
+    monkeypatch.setattr(resource_governor, "_budget", None)
+    monkeypatch.setattr(resource_governor, "available_cpus", lambda: list(range(8)))
+    monkeypatch.setattr(resource_governor, "pin_cpus", lambda cpus: applied.setdefault("pin", cpus))
+    monkeypatch.setattr(resource_governor, "limit_blas", lambda threads: applied.setdefault("blas", threads))
+    monkeypatch.setattr(resource_governor, "limit_torch", lambda threads: applied.setdefault("torch", threads))
+    monkeypatch.setattr(resource_governor, "limit_opencv", lambda threads: applied.setdefault("opencv", threads))
+    for name in resource_governor.THREAD_ENV_VARS + (resource_governor.CORES_ENV, resource_governor.CPUS_ENV):
+        monkeypatch.delenv(name, raising=False)
+    return applied
+
+
+def test_core_budget_splits_cores_between_render_threads():
+    budget = CoreBudget(8, workers=4)
+    assert (budget.workers, budget.library_threads, budget.ffmpeg_threads) == (4, 2, 8)
+
+    # At most one render thread per core, and every thread gets at least one library thread
+    budget = CoreBudget(2, workers=4)
+    assert (budget.workers, budget.library_threads) == (2, 1)
+    budget = CoreBudget(3, workers=2)
+    assert budget.library_threads == 1
+
+    # 0 workers is MoviePy's own writer: library pools get the whole budget
+    budget = CoreBudget(6, workers=0)
+    assert (budget.workers, budget.library_threads) == (0, 6)
+
+
+def test_parse_cpu_list():
+    assert parse_cpu_list("0-3,8") == [0, 1, 2, 3, 8]
+    assert parse_cpu_list(" 5, 1-2 ,,2") == [1, 2, 5]
+
+
+def test_ungoverned_jobs_change_nothing(governor):
+    assert govern() is None
+    assert governor == {}
+    assert resource_governor.ffmpeg_global_args() == []
+    assert resource_governor.decoder_thread_args() == []
+    assert resource_governor.core_budget() == 8
+
+
+def test_govern_applies_the_budget_everywhere(governor):
+    budget = govern(cores=4, workers=2)
+    assert resource_governor.core_budget() == 4
+    assert governor == {"blas": 2, "torch": 2, "opencv": 2}
+    assert all(os.environ[name] == "2" for name in resource_governor.THREAD_ENV_VARS)
+    assert resource_governor.ffmpeg_global_args() == ["-filter_threads", "4", "-filter_complex_threads", "4"]
+    assert resource_governor.decoder_thread_args() == ["-threads", "2"]
+    assert budget.cpus is None and "pin" not in governor
+
+
+def test_govern_reads_the_environment_and_pins(governor, monkeypatch):
+    monkeypatch.setenv(resource_governor.CPUS_ENV, "2-3")
+    budget = govern(workers=1)
+    assert budget.cores == 2 and budget.cpus == [2, 3]
+    assert governor["pin"] == [2, 3]
+
+    # A core count above the pinned CPUs is capped to them, and to the machine
+    assert govern(cores=6, cpus="0-3").cores == 4
+    monkeypatch.delenv(resource_governor.CPUS_ENV)
+    assert govern(cores=64).cores == 8
+
+
+def test_govern_rejects_unavailable_cpus(governor):
+    with pytest.raises(ValueError, match="CPUs 8,9,10 are not available"):
+        govern(cpus="7-10")
@@ -0,0 +1,74 @@
+import pickle
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from shm_frame_ring import SharedFrameRing, write_frames_multiprocess
+
+SIZE = (16, 8)
+RAW_ARGS = ["-f", "rawvideo", "-pix_fmt", "rgb24"]
+
+
+def test_ring_slots_wait_for_the_encoder():
+    ring = SharedFrameRing(3, (SIZE[1], SIZE[0], 3))
+    lock = threading.Lock()
+    try:
+        assert [ring.can_write(i) for i in range(5)] == [True, True, True, False, False]
+
+        ring.frames[ring.slot(0)] = 7
+        ring.publish(0, lock)
+        assert ring.is_ready(0) and not ring.is_ready(1)
+        # Frame 3 shares slot 0, but is not ready just because frame 0 is
+        assert not ring.is_ready(3)
+
+        ring.consume(0, lock)
+        assert ring.can_write(3) and not ring.can_write(4)
+        assert not ring.is_ready(0)
+    finally:
+        ring.close()
+
+
+def test_ring_reattaches_to_the_same_memory():
+    ring = SharedFrameRing(2, (SIZE[1], SIZE[0], 3))
+    try:
+        attached = pickle.loads(pickle.dumps(ring))
+        attached.frames[1] = 42
+        attached.publish(1, threading.Lock())
+        assert ring.is_ready(1) and (ring.frames[1] == 42).all()
+        attached.close()
+    finally:
+        ring.close()
+
+
+def index_frame(index, out):
+    """Frame whose pixels all hold its index; later frames sometimes finish first"""
+    time.sleep(0.02 * ((index * 7) % 3))
+    out[:] = index
+
+
+def test_frames_are_encoded_in_order(tmp_path):
+    path = str(tmp_path / "frames.raw")
+    stats = write_frames_multiprocess(index_frame, 24, SIZE, 24, None, workers=3, slots=4,
+                                      output_args=RAW_ARGS + [path])
+    assert stats["frames"] == 24
+
+    frames = np.fromfile(path, dtype=np.uint8).reshape(-1, SIZE[1], SIZE[0], 3)
+    assert len(frames) == 24
+    assert [int(frame[0, 0, 0]) for frame in frames] == list(range(24))
+    assert all((frame == frame[0, 0, 0]).all() for frame in frames)
+
+
+def failing_frame(index, out):
+    if index == 5:
+        raise ValueError("broken frame")
+    out[:] = index
+
+
+def test_worker_failure_stops_the_encode(tmp_path):
+    path = str(tmp_path / "frames.raw")
+    # Frames up to the broken one may be encoded, never any after it
+    with pytest.raises(RuntimeError, match=r"Render workers stopped before frame [0-5]$"):
+        write_frames_multiprocess(failing_frame, 12, SIZE, 24, None, workers=2, slots=3,
+                                  output_args=RAW_ARGS + [path])
@@ -0,0 +1,52 @@
+"""End-to-end smoke runs: small synthetic assets through the generator scripts"""
+
+import subprocess
+
+import pytest
+
+import benchmark_pipeline
+import create_dynamic_video
+import create_video
+from benchmark_pipeline import patched
+
+
+def video_info(path):
+    from ffmpeg_tools import ffmpeg_binary
+
+    result = subprocess.run([ffmpeg_binary(), "-hide_banner", "-i", path], capture_output=True, text=True)
+    return result.stderr
+
+
+def test_photo_animation_clip_from_path(assets):
+    # main() leaves the last run's profile behind; render at full scale
+    with patched(create_dynamic_video, VIDEO_SIZE=(320, 180), PROFILE=create_dynamic_video.FINAL_PROFILE):
+        clip = create_dynamic_video.create_photo_animation_clip(assets["photo"], 3.0)
+        frame = clip.get_frame(1.5)
+    assert frame.shape == (180, 135, 3)
+
+
+def test_benchmark_micro_suite_registers(assets):
+    suite = benchmark_pipeline.BenchmarkSuite(name_filter="zoom_effect")
+    benchmark_pipeline.add_micro_benchmarks(suite, assets)
+    results = suite.run()
+    assert results and all(name.startswith("dynamic.zoom_effect") for name in results)
+
+
+@pytest.mark.parametrize("backend", ["moviepy", "ffmpeg"])
+def test_dynamic_preview_render(assets, tmp_path, backend):
+    output = str(tmp_path / "out" / "dynamic.mp4")
+    with patched(create_dynamic_video, PHOTO_PATH=assets["photo"], VOICE_PATH=assets["voice"],
+                 TEXT_PATH=assets["text"], OUTPUT_PATH=output):
+        create_dynamic_video.main(["--preview", "--backend", backend])
+    info = video_info(str(tmp_path / "out" / "dynamic_preview.mp4"))
+    assert "Video: h264" in info and "Audio: aac" in info
+
+
+@pytest.mark.parametrize("backend", ["moviepy", "ffmpeg"])
+def test_basic_render(assets, tmp_path, backend):
+    output = str(tmp_path / "out" / "basic.mp4")
+    with patched(create_video, PHOTO_PATH=assets["photo"], VOICE_PATH=assets["voice"],
+                 TEXT_PATH=assets["text"], OUTPUT_PATH=output):
+        create_video.main(["--backend", backend])
+    info = video_info(output)
+    assert "Video: h264" in info and "Audio: aac" in info
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from moviepy.editor import ColorClip, ImageClip, CompositeVideoClip
+
+from sprite_atlas import SpriteAtlas, trim_sprite
+
+FRAME_SIZE = (160, 90)
+
+
+def text_canvas(width, height, box, seed=0):
+    """RGBA canvas with random opaque-ish ink inside box (x0, y0, x1, y1)"""
+    rng = np.random.default_rng(seed)
+    rgba = np.zeros((height, width, 4), dtype=np.uint8)
+    x0, y0, x1, y1 = box
+    rgba[y0:y1, x0:x1] = rng.integers(1, 256, size=(y1 - y0, x1 - x0, 4), dtype=np.uint8)
+    return rgba
+
+
+def page_offset(view, page):
+    """(x, y) of a view inside its atlas page"""
+    start = view.__array_interface__["data"][0] - page.__array_interface__["data"][0]
+    y, rest = divmod(start, page.strides[0])
+    return rest // page.strides[1], y
+
+
+def test_trim_sprite_crops_to_ink():
+    rgba = text_canvas(120, 40, (10, 5, 70, 30))
+    trimmed, offset = trim_sprite(rgba)
+    assert offset == (10, 5)
+    assert trimmed.shape == (25, 60, 4)
+    assert np.array_equal(trimmed, rgba[5:30, 10:70])
+
+    empty, offset = trim_sprite(np.zeros((40, 120, 4), dtype=np.uint8))
+    assert empty.shape == (1, 1, 4) and offset == (0, 0)
+
+
+def test_add_rejects_images_without_alpha():
+    with pytest.raises(ValueError, match="RGBA"):
+        SpriteAtlas().add(np.zeros((10, 10, 3), dtype=np.uint8))
+
+
+def test_pack_places_every_sprite_once_without_overlap():
+    atlas = SpriteAtlas(max_width=128)
+    boxes = [(0, 0, 50, 12), (5, 3, 40, 30), (2, 2, 90, 9), (0, 0, 7, 7), (10, 10, 30, 20)]
+    sprites = [atlas.add(text_canvas(100, 40, box, seed=i)) for i, box in enumerate(boxes)]
+    before = [(sprite.rgb.copy(), sprite.alpha.copy()) for sprite in sprites]
+
+    stats = atlas.pack()
+    assert stats["pages"] == 1
+    rgb_page, alpha_page = atlas.pages[0]
+    assert rgb_page.shape[1] <= 128
+
+    owner = np.full(rgb_page.shape[:2], -1)
+    for i, (sprite, (rgb, alpha)) in enumerate(zip(sprites, before)):
+        # Views into the page with unchanged pixels
+        assert np.shares_memory(sprite.rgb, rgb_page) and np.shares_memory(sprite.alpha, alpha_page)
+        assert np.array_equal(sprite.rgb, rgb) and np.array_equal(sprite.alpha, alpha)
+        x, y = page_offset(sprite.rgb, rgb_page)
+        region = owner[y:y + sprite.size[1], x:x + sprite.size[0]]
+        assert (region == -1).all()
+        region[:] = i
+
+    # Later sprites go to a new page; packed ones stay where they are
+    atlas.add(text_canvas(100, 40, (0, 0, 20, 20), seed=9))
+    assert atlas.pack()["pages"] == 2
+    assert atlas.pack() is None
+    assert np.shares_memory(sprites[0].rgb, atlas.pages[0][0])
+
+
+@pytest.mark.parametrize("position", [("center", 20), (13, 41), lambda t: (int(20 + 30 * t), 10)])
+def test_atlas_clips_render_like_the_full_canvas(position):
+    canvas = text_canvas(140, 40, (30, 8, 110, 33), seed=3)
+    background = ColorClip(FRAME_SIZE, color=(10, 20, 30)).set_duration(1.0)
+
+    full = ImageClip(canvas).set_duration(1.0).set_position(position)
+    atlas = SpriteAtlas()
+    trimmed = atlas.clip(canvas, position, FRAME_SIZE).set_duration(1.0)
+    atlas.pack()
+
+    expected = CompositeVideoClip([background, full], size=FRAME_SIZE)
+    actual = CompositeVideoClip([background, trimmed], size=FRAME_SIZE)
+    for t in (0.0, 0.5, 0.9):
+        assert np.array_equal(actual.get_frame(t), expected.get_frame(t))
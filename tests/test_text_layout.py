@@ -0,0 +1,57 @@
+import random
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from create_video import make_text_image
+from text_layout import load_font, layout_text
+
+SERIF = "/usr/share/fonts/truetype/dejavu/DejaVuSerif.ttf"
+WORDS = "Hello I'm a passionate software engineer with experience in Python, AVATAR gyp — {braces} Wolf".split()
+
+
+def reference_text_image(text, size, fontsize, font_path):
+    """The original make_text_image: every line measured with draw.textbbox"""
+    img = Image.new("RGBA", size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    font = load_font(font_path, fontsize)
+
+    def text_size(line):
+        bbox = draw.textbbox((0, 0), line, font=font)
+        return bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+    lines = []
+    line = ""
+    for word in text.split():
+        test_line = f"{line} {word}".strip()
+        if text_size(test_line)[0] <= size[0] - 40:
+            line = test_line
+        else:
+            lines.append(line)
+            line = word
+    lines.append(line)
+
+    current_h = (size[1] - sum(text_size(line)[1] for line in lines)) // 2
+    for line in lines:
+        w, h = text_size(line)
+        draw.text(((size[0] - w) // 2, current_h), line, font=font, fill="white")
+        current_h += h
+    return img
+
+
+@pytest.mark.parametrize("font_path", [SERIF, "missing-font.ttf"])
+@pytest.mark.parametrize("size,fontsize", [((1280, 720), 40), ((640, 360), 28), ((200, 400), 90)])
+def test_make_text_image_is_pixel_identical_to_the_original(font_path, size, fontsize):
+    rng = random.Random(fontsize)
+    for _ in range(5):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 60)))
+        expected = reference_text_image(text, size, fontsize, font_path)
+        actual = make_text_image(text, size=size, fontsize=fontsize, fontcolor="white", font_path=font_path)
+        assert np.array_equal(np.asarray(actual), np.asarray(expected)), text
+
+
+def test_ink_layout_only_centres():
+    with pytest.raises(ValueError, match="ink layout"):
+        layout_text("some text", load_font(SERIF, 20), max_width=100, align="left", ink=True)
+    assert layout_text("", load_font(SERIF, 20), max_width=100, ink=True) == []